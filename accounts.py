@@ -0,0 +1,108 @@
+"""
+Кілька акаунтів Instagram з одним спільним конвеєром новин.
+
+Ключові функції/класи:
+- load_accounts: список акаунтів з INSTAGRAM_ACCOUNTS (JSON) або один акаунт з INSTAGRAM_USERNAME / INSTAGRAM_PASSWORD.
+  Кожен акаунт має власні файли сесії, опублікованих статей та історій і розкладу; основний акаунт (INSTAGRAM_USERNAME,
+  прапорець 'primary') зберігає старі імена файлів, тож перехід на кілька акаунтів не губить його стан.
+- primary_account: основний акаунт зі списку.
+- SharedPipeline: один на процес збирач новин, перекладач і клієнт LLM для всіх акаунтів; cycle_lock
+  послідовно пропускає цикли пошуку новин, тож фіди, сторінки та фото завантажуються один раз, а не на кожен акаунт.
+"""
+
+import re
+import json
+import threading
+from news_collector import NewsCollector
+from translator import NewsTranslator
+from llm_client import LLMClient
+from config import (
+    INSTAGRAM_ACCOUNTS, INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD, TELEGRAM_CHANNEL_LINK, OPENAI_API_KEY,
+    POSTED_DB_FILE, POSTED_ARTICLES_JSON, SCHEDULE_FILE, STORY_INDEX_FILE
+)
+
+SESSION_FILE = 'instagram_session.json'
+
+
+def _slug(username):
+    """Безпечна для імені файлу форма імені акаунта."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', username or 'default')
+
+
+def _account(username, password, telegram_link=None, primary=False):
+    """Опис акаунта з шляхами до його файлів стану (основний акаунт — старі імена файлів)."""
+    slug = _slug(username)
+    if primary:
+        session_file, posted_db, legacy_json, schedule_file = SESSION_FILE, POSTED_DB_FILE, POSTED_ARTICLES_JSON, SCHEDULE_FILE
+        story_index_file = STORY_INDEX_FILE
+    else:
+        session_file = f"instagram_session_{slug}.json"
+        posted_db = f"posted_articles_{slug}.sqlite3"
+        legacy_json = None
+        schedule_file = f"posting_schedule_{slug}.json"
+        story_index_file = f"story_index_{slug}.json"
+    return {
+        'username': username,
+        'slug': slug,
+        'password': password,
+        'telegram_link': telegram_link or TELEGRAM_CHANNEL_LINK,
+        'session_file': session_file,
+        'posted_db': posted_db,
+        'posted_json': legacy_json,
+        'schedule_file': schedule_file,
+        'story_index_file': story_index_file,
+        'primary': primary,
+    }
+
+
+def load_accounts(raw=INSTAGRAM_ACCOUNTS):
+    """Повертає список акаунтів; за відсутності (або помилки) INSTAGRAM_ACCOUNTS — один акаунт з INSTAGRAM_USERNAME."""
+    entries = []
+    if raw and raw.strip():
+        try:
+            entries = json.loads(raw)
+            if not isinstance(entries, list):
+                raise ValueError("очікується JSON-список")
+        except ValueError as e:
+            print(f"Некоректний INSTAGRAM_ACCOUNTS ({e}), використовую INSTAGRAM_USERNAME")
+            entries = []
+
+    accounts = []
+    seen = set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get('username') or not entry.get('password'):
+            print("Пропускаю запис INSTAGRAM_ACCOUNTS без username/password")
+            continue
+        username = entry['username']
+        if username in seen:
+            continue
+        seen.add(username)
+        accounts.append(_account(username, entry['password'], entry.get('telegram_link')))
+
+    if not accounts:
+        return [_account(INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD, primary=True)]
+
+    # Основним вважається акаунт з INSTAGRAM_USERNAME, а якщо його немає у списку — перший
+    primary_index = next((i for i, account in enumerate(accounts) if account['username'] == INSTAGRAM_USERNAME), 0)
+    primary = accounts[primary_index]
+    accounts[primary_index] = _account(primary['username'], primary['password'], primary['telegram_link'], primary=True)
+    return accounts
+
+
+def primary_account(accounts=None):
+    """Повертає основний акаунт (load_accounts завжди позначає рівно один)."""
+    accounts = accounts if accounts is not None else load_accounts()
+    return next((account for account in accounts if account['primary']), accounts[0])
+
+
+class SharedPipeline:
+    def __init__(self):
+        """Створює спільні для всіх акаунтів збирач новин, перекладач і клієнт LLM (якщо надано ключ OpenAI)."""
+        self.news_collector = NewsCollector()
+        self.translator = NewsTranslator()
+        if OPENAI_API_KEY and OPENAI_API_KEY.strip():
+            self.llm = LLMClient()
+        else:
+            self.llm = None
+        # Один цикл пошуку новин за раз: наступний акаунт отримує фіди/сторінки/фото з кешів попереднього
+        self.cycle_lock = threading.Lock()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Мікробенчмарк очищення тексту: старий ланцюжок re.sub проти text_cleaner.
+
+Корпус — реальні тексти ТСН, які бот уже зібрав: seen_entries.json (повні тексти статей) та feed_cache.json
+(RSS-описи з HTML). Додатково можна передати файли з текстами: `python bench_text_cleaner.py стаття1.txt ...`.
+Якщо корпусу ще немає (бот не запускався), використовуються синтетичні зразки з усіма видами «сміття».
+
+Скрипт спершу перевіряє, що результати старої і нової реалізацій ідентичні, потім міряє час.
+"""
+
+import re
+import sys
+import json
+import time
+from config import SEEN_ENTRIES_FILE, FEED_CACHE_FILE
+from text_cleaner import clean_text, is_unwanted_sentence
+
+TEXT_FIELDS = ('title', 'text', 'description', 'summary')
+
+# Синтетичні зразки (лише якщо реального корпусу немає) + граничні випадки для перевірки ідентичності
+SAMPLE_TEXTS = [
+    '<p>Сили оборони знищили <b>російський</b> склад боєприпасів&nbsp;на Херсонщині.</p> Фото: ЗСУ',
+    'У Києві пролунали вибухи. Джерело: КМВА\nПовідомляється про роботу ППО. © ТСН.ua',
+    'Курс валют / © unsplash.com Нацбанк встановив офіційний курс. Реклама ***',
+    'Деталі за посиланням https://tsn.ua/ukrayina/novyna-123.html та www.tsn.ua/news',
+    'Getty Images: лідери ЄС зібралися у Брюсселі. Shutterstock Advertisement РЕКЛАМА',
+    'www.http://tsn.ua Рекл*ама Аdvertisement ©  photo.com &am<b>p; <<a>> Повний текст новини на сайті',
+    'Звичайний текст без сміття.\n\n\n   Другий   абзац\t з табуляцією та нерозривним пробілом.  ',
+    'unſplash.com SHUTTERſTOCK gettyimages getty  image',
+]
+
+
+def legacy_clean_content(text):
+    """Стара реалізація ContentGenerator.clean_content (еталон для порівняння)."""
+    if not text:
+        return text
+
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'&[a-zA-Z0-9#]+;', '', text)
+    text = re.sub(r'https?://[^\s]+', '', text)
+    text = re.sub(r'www\.[^\s]+', '', text)
+    text = re.sub(r'\*+', '', text)
+    text = re.sub(r'\b[Рр]еклама\b', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'\b[Аа]dvertisement\b', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'©\s*[^\s]+\.[a-z]{2,4}', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'[Кк]урс валют?\s*/\s*©.*', '', text)
+    text = re.sub(r'unsplash\.com', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'getty\s*images?', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'shutterstock', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'©.*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'Джерело:.*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'Фото:.*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'Повний текст новини.*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\n\s*\n', '\n', text)
+    text = text.strip()
+
+    return text
+
+
+def legacy_is_unwanted_sentence(sentence):
+    """Стара реалізація ContentGenerator.is_unwanted_sentence (еталон для порівняння)."""
+    unwanted_patterns = [
+        r'\*+', r'[Рр]еклама', r'©.*', r'unsplash', r'getty', r'shutterstock',
+        r'[Дд]жерело:', r'[Фф]ото:', r'курс валют.*©',
+    ]
+    for pattern in unwanted_patterns:
+        if re.search(pattern, sentence, re.IGNORECASE):
+            return True
+    return False
+
+
+def _collect_strings(data, texts):
+    """Рекурсивно збирає текстові поля статей з JSON-кешів бота."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in TEXT_FIELDS and isinstance(value, str) and value.strip():
+                texts.append(value)
+            else:
+                _collect_strings(value, texts)
+    elif isinstance(data, list):
+        for item in data:
+            _collect_strings(item, texts)
+
+
+def load_corpus(paths):
+    """Повертає (тексти, опис джерела корпусу)."""
+    texts = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+
+    for path in (SEEN_ENTRIES_FILE, FEED_CACHE_FILE):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                _collect_strings(json.load(f), texts)
+        except (OSError, json.JSONDecodeError):
+            continue
+
+    if texts:
+        return texts, f"{len(texts)} реальних текстів"
+    return list(SAMPLE_TEXTS), f"{len(SAMPLE_TEXTS)} синтетичних зразків (реального корпусу ще немає)"
+
+
+def check_identical(texts):
+    """Перевіряє ідентичність результатів; повертає кількість розбіжностей."""
+    mismatches = 0
+    for text in texts + SAMPLE_TEXTS:
+        if legacy_clean_content(text) != clean_text(text):
+            mismatches += 1
+            print(f"❌ clean_content розходиться: {text[:80]!r}")
+        for sentence in text.split('.'):
+            if legacy_is_unwanted_sentence(sentence) != is_unwanted_sentence(sentence):
+                mismatches += 1
+                print(f"❌ is_unwanted_sentence розходиться: {sentence[:80]!r}")
+    return mismatches
+
+
+def bench(label, func, items, rounds):
+    """Міряє найкращий з кількох прогонів час обробки всього корпусу."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    per_item = best / max(1, len(items)) * 1e6
+    print(f"  {label:<28} {best * 1000:8.2f} мс на корпус, {per_item:7.1f} мкс на текст")
+    return best
+
+
+def main():
+    texts, source = load_corpus(sys.argv[1:])
+    total_chars = sum(len(text) for text in texts)
+    print(f"Корпус: {source}, {total_chars} символів")
+
+    mismatches = check_identical(texts)
+    if mismatches:
+        print(f"❌ Знайдено {mismatches} розбіжностей — нова реалізація НЕ ідентична старій")
+        sys.exit(1)
+    print("✅ Результати старої і нової реалізацій ідентичні")
+
+    # Невеликий корпус повторюємо, щоб заміри були стабільнішими
+    items = texts * max(1, 2000 // len(texts))
+    sentences = [sentence for text in items for sentence in text.split('.')[:10]]
+    rounds = 5
+
+    print("\nclean_content:")
+    old = bench('старий ланцюжок re.sub', legacy_clean_content, items, rounds)
+    new = bench('text_cleaner.clean_text', clean_text, items, rounds)
+    print(f"  прискорення: x{old / new:.1f}")
+
+    print("\nis_unwanted_sentence:")
+    old = bench('окремі re.search', legacy_is_unwanted_sentence, sentences, rounds)
+    new = bench('одна альтернатива', is_unwanted_sentence, sentences, rounds)
+    print(f"  прискорення: x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,41 @@
 
 Опис ключових змінних:
 - INSTAGRAM_USERNAME / INSTAGRAM_PASSWORD: облікові дані Instagram.
+- SESSION_VALIDATE_TTL_MINUTES / SESSION_REFRESH_HOURS / SESSION_STANDBY_COUNT: менеджер сесій Instagram (фонова перевірка,
+  оновлення файлу сесії без входу, резервні сесії — див. session_manager).
+- INSTAGRAM_ACCOUNTS: кілька акаунтів (JSON-список) з одним спільним конвеєром новин (див. accounts).
 - TELEGRAM_CHANNEL_LINK: посилання на Telegram-канал для CTA у підписі.
 - NEWS_SOURCES: список RSS-джерел новин (у поточній конфігурації — тільки ТСН).
+- HTTP_POOL_SIZE / DNS_CACHE_TTL_SECONDS: спільний HTTP-транспорт (пул з'єднань на хост, кеш DNS).
+- RSS_FETCH_WORKERS / RSS_CYCLE_BUDGET_SECONDS: паралельний збір RSS (кількість потоків і бюджет часу на цикл).
+- ENRICH_WORKERS / ENRICH_PER_HOST_LIMIT / ARTICLE_TIMEOUT_SECONDS: паралельне збагачення статей з лімітом на хост.
+- FEED_CACHE_FILE: сховище валідаторів RSS для умовних GET-запитів (304 / незмінне тіло).
+- SHARED_CYCLE_SECONDS: вікно, в якому фіди та сторінки попереднього циклу збору повторно використовуються без запитів.
+- SEEN_ENTRIES_FILE / SEEN_ENTRY_TTL_HOURS: індекс збагачених записів, щоб не завантажувати статті повторно.
+- STORY_INDEX_FILE / STORY_INDEX_TTL_HOURS / STORY_SIMILARITY: ковзний індекс опублікованих історій акаунта (MinHash + LSH
+  заголовка і ліду) — переписані версії вже опублікованого відкидаються до завантаження сторінок і фото.
+- PAGE_CACHE_DIR / PAGE_CACHE_TTL_HOURS: спільний кеш сторінок статей (одне завантаження і один розбір на цикл).
 - IMAGE_REQUIREMENTS: мінімальні вимоги до якості зображення для публікації.
+- INSTAGRAM_IMAGE_WIDTH / INSTAGRAM_ASPECT_RANGE / INSTAGRAM_IMAGE_MAX_KB / INSTAGRAM_JPEG_QUALITY: підготовка фото до
+  публікації (ширина, вікно пропорцій Instagram, бюджет розміру файлу, межі якості JPEG — див. image_preprocess).
+- IMAGE_PROBE_WORKERS: кількість паралельних перевірок кандидатів-зображень.
+- IMAGE_CACHE_DIR / IMAGE_CACHE_MAX_MB / IMAGE_CACHE_TTL_HOURS: дисковий кеш перевірених зображень (LRU + TTL).
+- IMAGE_HASH_MAX_DISTANCE: поріг відстані Геммінга перцептивних хешів, за яким фото вважається вже опублікованим.
+- POSTED_DB_FILE / POSTED_ARTICLES_JSON / POSTED_TTL_DAYS: сховище опублікованих статей (SQLite) і міграція зі старого JSON.
+- TRANSLATION_BACKEND / TRANSLATION_API_URL / TRANSLATION_API_KEY / TRANSLATION_BATCH_CHARS / TRANSLATION_MAX_CONCURRENCY /
+  TRANSLATION_TIMEOUT_SECONDS: пакетний переклад іноземних джерел (бекенд, API, розмір пакета, ліміт запитів).
+- TRANSLATION_CACHE_FILE / TRANSLATION_CACHE_TTL_DAYS: постійний кеш перекладів за хешем вихідного тексту.
 - OPENAI_API_KEY: ключ для генерації описів через OpenAI (за відсутності — локальний режим).
+- OPENAI_BASE_URL / OPENAI_MODEL / OPENAI_TIMEOUT_SECONDS / OPENAI_MAX_CONCURRENCY: OpenAI-сумісний сервер, модель,
+  таймаут і ліміт одночасних запитів.
+- LLM_CACHE_FILE / LLM_CACHE_TTL_HOURS: кеш відповідей моделі за хешем промпту та моделі.
+- PREFETCH_LEAD_MINUTES / PREFETCH_REFRESH_MINUTES: фонова підготовка наступного поста під час паузи між публікаціями.
 - POSTING_INTERVALS: інтервали між публікаціями у годинах (рандомний вибір).
+- OPTIMAL_POSTING_HOURS / POSTING_TIMEZONE / POSTING_JITTER_MINUTES / POSTING_RETRY_MINUTES / SCHEDULE_FILE:
+  планувальник публікацій (оптимальні години за Києвом, джитер, повтор після збою, збережений наступний слот).
+- SCRATCH_DIR / SCRATCH_MAX_MB: тимчасові файли для завантаження в Instagram (за замовчуванням — /dev/shm) і їх ліміт.
+- PUBLISH_UPLOAD_DELAY_SECONDS / PUBLISH_COMMENT_DELAY_SECONDS: «людські» паузи черги публікацій (від-до, сек).
+- PUBLISH_RETRY_DELAY_SECONDS: пауза черги перед повтором завантаження після заміни втраченої сесії (від-до, сек).
 - CTA_PHRASES: пул коротких фраз-призивів до дії для посилення залучення.
 """
 
@@ -21,6 +51,17 @@ load_dotenv()
 INSTAGRAM_USERNAME = os.getenv('INSTAGRAM_USERNAME')
 INSTAGRAM_PASSWORD = os.getenv('INSTAGRAM_PASSWORD')
 
+# Сесії Instagram: фонова перевірка не частіше ніж раз на TTL (хв), збереження свіжих cookies у файл сесії після
+# успішного виклику API раз на SESSION_REFRESH_HOURS (год, без повторного входу) і кількість резервних сесій
+# (кожна — окремий вхід паролем, тому за замовчуванням вимкнено)
+SESSION_VALIDATE_TTL_MINUTES = 30
+SESSION_REFRESH_HOURS = 72
+SESSION_STANDBY_COUNT = 0
+
+# Кілька акаунтів: JSON-список [{"username": ..., "password": ..., "telegram_link": ...}];
+# якщо не задано — один акаунт з INSTAGRAM_USERNAME / INSTAGRAM_PASSWORD
+INSTAGRAM_ACCOUNTS = os.getenv('INSTAGRAM_ACCOUNTS', '')
+
 # Посилання на Telegram-канал (для CTA у підписі)
 TELEGRAM_CHANNEL_LINK = os.getenv('TELEGRAM_CHANNEL_LINK', 'https://t.me/your_channel')
 
@@ -30,6 +71,42 @@ NEWS_SOURCES = [
     'https://tsn.ua/rss/full.rss',  # ТСН - загальні новини
 ]
 
+# Спільний HTTP-транспорт: розмір пулу keep-alive з'єднань на хост і час життя кешу DNS (сек)
+HTTP_POOL_SIZE = 10
+DNS_CACHE_TTL_SECONDS = 300
+
+# Паралельний збір RSS: максимум потоків та загальний бюджет часу (сек) на один цикл збору
+RSS_FETCH_WORKERS = 8
+RSS_CYCLE_BUDGET_SECONDS = 30
+
+# Паралельне збагачення статей (newspaper3k): загальна кількість потоків,
+# одночасні завантаження на один хост (щоб не «бомбити» tsn.ua) та таймаут на статтю (сек)
+ENRICH_WORKERS = 6
+ENRICH_PER_HOST_LIMIT = 2
+ARTICLE_TIMEOUT_SECONDS = 15
+
+# Файл валідаторів RSS (ETag/Last-Modified/хеш тіла) для умовних запитів між циклами
+FEED_CACHE_FILE = 'feed_cache.json'
+
+# Цикли збору, що починаються в межах цього вікна (сек) — наприклад, для різних акаунтів поспіль —
+# беруть фіди та сторінки з попереднього циклу без повторних запитів
+SHARED_CYCLE_SECONDS = 120
+
+# Індекс уже збагачених записів (за канонічним посиланням/GUID) і скільки годин його пам'ятати
+SEEN_ENTRIES_FILE = 'seen_entries.json'
+SEEN_ENTRY_TTL_HOURS = 48
+
+# Майже однакові історії: файл ковзного індексу (основного акаунта; інші — story_index_<акаунт>.json),
+# скільки годин пам'ятати історію після останньої появи у фідах
+# і мінімальна схожість Жаккара слів заголовка й ліду (за MinHash), з якої стаття вважається повтором історії
+STORY_INDEX_FILE = 'story_index.json'
+STORY_INDEX_TTL_HOURS = 24
+STORY_SIMILARITY = 0.5
+
+# Кеш сторінок статей: каталог для стиснутих копій на диску (порожній рядок — лише в пам'яті) і їх час життя (год)
+PAGE_CACHE_DIR = 'page_cache'
+PAGE_CACHE_TTL_HOURS = 6
+
 # Вимоги до якості зображення — реалістичні для RSS картинок
 IMAGE_REQUIREMENTS = {
     'min_width': 300,        # Знижені вимоги для RSS зображень
@@ -42,15 +119,87 @@ IMAGE_REQUIREMENTS = {
     'min_pixels': 60000     # Мінімум 300x200 пікселів (для RSS)
 }
 
+# Підготовка фото для Instagram: ширина результату (px), допустимі пропорції ширина/висота (4:5 … 1.91:1),
+# бюджет розміру JPEG (KB) і межі якості, в яких підбирається найкраща, що вкладається в бюджет
+INSTAGRAM_IMAGE_WIDTH = 1080
+INSTAGRAM_ASPECT_RANGE = (4 / 5, 1.91)
+INSTAGRAM_IMAGE_MAX_KB = 1024
+INSTAGRAM_JPEG_QUALITY = (70, 92)
+
+# Скільки кандидатів-зображень перевіряти паралельно (пріоритет порядку зберігається)
+IMAGE_PROBE_WORKERS = 4
+
+# Дисковий кеш перевірених зображень: каталог, ліміт розміру (MB, LRU-витіснення) та час життя записів (год)
+IMAGE_CACHE_DIR = 'image_cache'
+IMAGE_CACHE_MAX_MB = 200
+IMAGE_CACHE_TTL_HOURS = 72
+
+# Повтор фото: максимальна відстань Геммінга між 64-бітними dHash (0 — лише ідентичні; ~10+ — ризик хибних збігів)
+IMAGE_HASH_MAX_DISTANCE = 6
+
+# Сховище опублікованих статей (SQLite, WAL), старий JSON для одноразової міграції та час зберігання записів (днів)
+POSTED_DB_FILE = 'posted_articles.sqlite3'
+POSTED_ARTICLES_JSON = 'posted_articles.json'
+POSTED_TTL_DAYS = 30
+
 # Мінімальний «вік» новини у годинах для публікації (щоб не брати надто свіжі)
 MIN_ARTICLE_AGE_HOURS = 4
 
+# Переклад іноземних джерел: бекенд ('none' — без перекладу, 'libretranslate' — API, сумісне з LibreTranslate),
+# адреса і ключ API, максимум символів в одному пакеті сегментів, одночасні запити та таймаут запиту (сек)
+TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'none')
+TRANSLATION_API_URL = os.getenv('TRANSLATION_API_URL', 'http://127.0.0.1:5000/translate')
+TRANSLATION_API_KEY = os.getenv('TRANSLATION_API_KEY')
+TRANSLATION_BATCH_CHARS = 20000
+TRANSLATION_MAX_CONCURRENCY = 2
+TRANSLATION_TIMEOUT_SECONDS = 30
+
+# Постійний кеш перекладів (ключ — хеш вихідного тексту) і скільки днів зберігати невикористані записи
+TRANSLATION_CACHE_FILE = 'translation_cache.json'
+TRANSLATION_CACHE_TTL_DAYS = 30
+
 # Ключ OpenAI для генерації описів (за відсутності — локальний генератор)
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
+# OpenAI-сумісний сервер (порожньо — api.openai.com; для тестів — локальний openai_stub_server.py), модель,
+# таймаут одного запиту (сек) і максимум одночасних запитів
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+OPENAI_TIMEOUT_SECONDS = 30
+OPENAI_MAX_CONCURRENCY = 2
+
+# Кеш відповідей моделі на диску (ключ — хеш промпту + моделі) і скільки годин вони дійсні
+LLM_CACHE_FILE = 'llm_cache.json'
+LLM_CACHE_TTL_HOURS = 24
+
+# Фонова підготовка наступного поста: за скільки хвилин до публікації почати і як часто (хв)
+# перевіряти, чи не з'явилась свіжіша новина
+PREFETCH_LEAD_MINUTES = 20
+PREFETCH_REFRESH_MINUTES = 5
+
 # Інтервали між публікаціями (у годинах), береться випадкове значення
 POSTING_INTERVALS = [2, 3]  # Random between 2-3 hours
 
+# Оптимальні години для публікації (за київським часом) і часовий пояс планувальника
+OPTIMAL_POSTING_HOURS = [8, 9, 12, 13, 17, 18, 19, 20, 21]
+POSTING_TIMEZONE = 'Europe/Kyiv'
+
+# Випадковий зсув слоту (± хв), пауза перед повтором після невдалої публікації (хв, від-до)
+# і файл зі збереженим наступним слотом (щоб перезапуск не збивав розклад)
+POSTING_JITTER_MINUTES = 15
+POSTING_RETRY_MINUTES = (30, 60)
+SCHEDULE_FILE = 'posting_schedule.json'
+
+# Тимчасові файли для instagrapi (він приймає лише шлях): каталог (порожньо — /dev/shm, якщо є, інакше temp_images)
+# і ліміт розміру області (MB); фото постів до моменту завантаження тримаються в пам'яті
+SCRATCH_DIR = os.getenv('SCRATCH_DIR', '')
+SCRATCH_MAX_MB = 64
+
+# Черга публікацій: випадкова пауза перед завантаженням фото і перед коментарем з хештегами (сек, від-до)
+PUBLISH_UPLOAD_DELAY_SECONDS = (30, 60)
+PUBLISH_COMMENT_DELAY_SECONDS = (10, 30)
+PUBLISH_RETRY_DELAY_SECONDS = (5, 10)
+
 # Набір фраз (CTA) для додавання у підпис під публікацією
 CTA_PHRASES = [
     "⚡ Останні новини війни та політики у нашому Telegram!",
@@ -2,28 +2,34 @@
 Генератор текстового контенту для постів Instagram.
 
 Ключові методи:
+- generate_ai_post: опис і хештеги одним структурованим (JSON) запитом до OpenAI; відповіді кешуються (llm_client).
 - generate_post_description: опис поста (через OpenAI або локально).
 - generate_fallback_post: локальна генерація розширеного опису без ШІ.
 - detect_news_category: визначає категорію новини для емодзі/хештегів.
-- clean_content: видаляє HTML, посилання, службові фрази та технічні артефакти.
+- clean_content: видаляє HTML, посилання, службові фрази та технічні артефакти (скомпільований конвеєр text_cleaner).
 - generate_hashtags / generate_local_hashtags / generate_ai_hashtags: побудова релевантних хештегів.
-- create_full_post: збір фінального тексту (опис + хештеги) з перевіркою ліміту.
+- create_full_post: збір фінального тексту (опис + хештеги, один запит до ШІ) з перевіркою ліміту.
 - add_story_elements: формує дані для Stories (не використовується у публікації постів).
 """
 
-from openai import OpenAI
 import random
+from llm_client import LLMClient, parse_json_reply
+from keywords import classify
+from text_cleaner import clean_text, is_unwanted_sentence
 from config import OPENAI_API_KEY, CTA_PHRASES, TELEGRAM_CHANNEL_LINK
 
+SMM_SYSTEM_PROMPT = "Ти експерт з створення вірусного контенту для соціальних мереж. Твоя задача - робити пosti, які залучають увагу та отримують високий engagement."
+
 class ContentGenerator:
-    def __init__(self):
-        """Створює клієнт OpenAI (якщо надано ключ) та кешує CTA/Telegram-посилання."""
-        if OPENAI_API_KEY and OPENAI_API_KEY.strip():
-            self.client = OpenAI(api_key=OPENAI_API_KEY)
-        else:
-            self.client = None
+    def __init__(self, telegram_link=None, llm=None):
+        """Створює клієнт OpenAI (якщо надано ключ; `llm` — спільний клієнт кількох акаунтів) та кешує CTA/Telegram-посилання."""
+        if llm is None and OPENAI_API_KEY and OPENAI_API_KEY.strip():
+            # Таймаут, ліміт одночасних запитів і кеш відповідей — у LLMClient
+            llm = LLMClient()
+        self.llm = llm
+        self.client = llm.client if llm else None
         self.cta_phrases = CTA_PHRASES
-        self.telegram_link = TELEGRAM_CHANNEL_LINK
+        self.telegram_link = telegram_link or TELEGRAM_CHANNEL_LINK
     
     def generate_post_description(self, news_title, news_content, max_length=2000):
         """Повертає опис поста: через OpenAI або локальний fallback; завжди без лапок/HTML."""
@@ -48,38 +54,98 @@ class ContentGenerator:
             Напиши пост що розкриває суть новини простими словами, щоб люди зрозуміли що сталося.
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ти експерт з створення вірусного контенту для соціальних мереж. Твоя задача - робити пosti, які залучають увагу та отримують високий engagement."},
+            generated_text, _ = self.llm.complete(
+                [
+                    {"role": "system", "content": SMM_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
                 temperature=0.8
             )
             
-            generated_text = response.choices[0].message.content.strip()
-            
-            # Очищаємо згенерований текст
-            generated_text = self.clean_content(generated_text)
-            
-            # Додаємо call-to-action та посилання на Telegram
-            cta = random.choice(self.cta_phrases)
-            final_post = f"{generated_text}\n\n{cta}\n👉 {self.telegram_link}"
-            
-            # Перевіряємо довжину
-            if len(final_post) > max_length:
-                # Обрізаємо основний текст, щоб влізти в ліміт
-                max_main_text = max_length - len(f"\n\n{cta}\n👉 {self.telegram_link}") - 50
-                generated_text = generated_text[:max_main_text] + "..."
-                final_post = f"{generated_text}\n\n{cta}\n👉 {self.telegram_link}"
-            
-            return final_post
+            return self.finish_description(generated_text, max_length)
             
         except Exception as e:
             print(f"Помилка генерації контенту: {e}")
             return self.generate_fallback_post(news_title, news_content)
     
+    def finish_description(self, generated_text, max_length=2000):
+        """Очищує згенерований текст і додає CTA та посилання на Telegram у межах `max_length`."""
+        generated_text = self.clean_content(generated_text)
+        
+        # Додаємо call-to-action та посилання на Telegram
+        cta = random.choice(self.cta_phrases)
+        final_post = f"{generated_text}\n\n{cta}\n👉 {self.telegram_link}"
+        
+        # Перевіряємо довжину
+        if len(final_post) > max_length:
+            # Обрізаємо основний текст, щоб влізти в ліміт
+            max_main_text = max_length - len(f"\n\n{cta}\n👉 {self.telegram_link}") - 50
+            generated_text = generated_text[:max_main_text] + "..."
+            final_post = f"{generated_text}\n\n{cta}\n👉 {self.telegram_link}"
+        
+        return final_post
+    
+    def generate_ai_post(self, news_title, news_content, max_length=2000):
+        """Один запит до OpenAI: повертає (опис з CTA, рядок хештегів); помилки — винятком."""
+        prompt = f"""
+        Створи пост для Instagram на основі RSS новини і хештеги до нього.
+        
+        Пост має бути:
+        - 2-3 абзаци що пояснюють суть новини
+        - Зрозумілим та інформативним
+        - Українською мовою
+        - БЕЗ лапок, БЕЗ зайвих символів
+        - З емодзі для акцентів
+        - Без посилань (їх додам окремо)
+        
+        Хештеги: 5-10 релевантних, популярних в Україні, українською, без пробілів, кожен починається з #.
+        
+        Заголовок: {news_title}
+        RSS опис: {news_content[:300]}
+        
+        Відповідь — лише JSON-об'єкт: {{"description": "текст поста", "hashtags": ["#хештег", "..."]}}
+        """
+        
+        reply, cache_key = self.llm.complete(
+            [
+                {"role": "system", "content": SMM_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=650,
+            temperature=0.8,
+            json_mode=True
+        )
+        
+        data = parse_json_reply(reply)
+        description = (data or {}).get('description')
+        if not isinstance(description, str) or not description.strip():
+            # Нерозбірну відповідь не кешуємо, щоб наступна спроба запитала модель знову
+            self.llm.forget(cache_key)
+            raise ValueError("модель повернула відповідь без опису")
+        
+        hashtags = self.normalize_hashtags(data.get('hashtags'))
+        if not hashtags:
+            hashtags = self.generate_local_hashtags(news_title, news_content)
+        
+        return self.finish_description(description, max_length), hashtags
+    
+    def normalize_hashtags(self, hashtags, limit=10):
+        """Приводить хештеги моделі (список або рядок) до рядка `#тег #тег` без повторів і пробілів."""
+        if isinstance(hashtags, str):
+            hashtags = hashtags.split()
+        if not isinstance(hashtags, list):
+            return ''
+        
+        normalized = []
+        for tag in hashtags:
+            if not isinstance(tag, str):
+                continue
+            tag = '#' + tag.strip().lstrip('#').replace(' ', '')
+            if len(tag) > 1 and tag not in normalized:
+                normalized.append(tag)
+        return ' '.join(normalized[:limit])
+    
     def generate_fallback_post(self, news_title, news_content):
         """Локальна генерація розширеного поста на основі RSS даних; без лапок/HTML/URL."""
         try:
@@ -150,25 +216,8 @@ class ContentGenerator:
             return f"📰 Важливі новини!\n\n{news_title}\n\n{random.choice(self.cta_phrases)}\n👉 {self.telegram_link}"
     
     def detect_news_category(self, title, content):
-        """Повертає категорію новини за ключовими словами у тексті (для емодзі/хештегів)."""
-        text = f"{title} {content}".lower()
-        
-        categories = {
-            'war': ['війна', 'атака', 'військов', 'фронт', 'оборона', 'обстріл', 'ракет', 'дрон', 'окупац', 'звільнен', 'втрати', 'армія', 'сбу', 'всу'],
-            'politics': ['політика', 'уряд', 'президент', 'вибори', 'парламент', 'міністр'],
-            'economy': ['економіка', 'гроші', 'бізнес', 'ринок', 'банк', 'інвестиції', 'цена'],
-            'technology': ['технологія', 'комп\'ютер', 'інтернет', 'додаток', 'штучний інтелект'],
-            'sports': ['спорт', 'футбол', 'змагання', 'чемпіонат', 'олімпіада'],
-            'entertainment': ['фільм', 'музика', 'зірка', 'шоу', 'концерт'],
-            'health': ['здоров\'я', 'медицина', 'лікування', 'хвороба', 'вакцина'],
-            'world': ['світ', 'країна', 'міжнародний', 'мир']
-        }
-        
-        for category, keywords in categories.items():
-            if any(keyword in text for keyword in keywords):
-                return category
-        
-        return 'default'
+        """Повертає категорію новини за ключовими словами у тексті (для емодзі/хештегів); перемагає найбільше збігів."""
+        return classify('post_category', title, content, default='default')
     
     def format_news_content(self, content):
         """Очищує та стисло форматуює контент новини у 2-3 інформативні речення."""
@@ -243,66 +292,12 @@ class ContentGenerator:
     
     def clean_content(self, text):
         """Повністю прибирає HTML/URL/копірайт/рекламу/службові рядки; нормалізує пробіли."""
-        if not text:
-            return text
-        
-        import re
-        
-        # ВИДАЛЯЄМО ВСІ HTML теги та атрибути
-        text = re.sub(r'<[^>]+>', '', text)  # Всі HTML теги
-        text = re.sub(r'&[a-zA-Z0-9#]+;', '', text)  # HTML entities
-        
-        # Видаляємо посилання та URL
-        text = re.sub(r'https?://[^\s]+', '', text)
-        text = re.sub(r'www\.[^\s]+', '', text)
-        
-        # Видаляємо зірочки
-        text = re.sub(r'\*+', '', text)
-        
-        # Видаляємо слово "Реклама" і варіації
-        text = re.sub(r'\b[Рр]еклама\b', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\b[Аа]dvertisement\b', '', text, flags=re.IGNORECASE)
-        
-        # Видаляємо посилання на джерела зображень
-        text = re.sub(r'©\s*[^\s]+\.[a-z]{2,4}', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'[Кк]урс валют?\s*/\s*©.*', '', text)
-        text = re.sub(r'unsplash\.com', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'getty\s*images?', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'shutterstock', '', text, flags=re.IGNORECASE)
-        
-        # Видаляємо технічну інформацію
-        text = re.sub(r'©.*$', '', text, flags=re.MULTILINE)
-        text = re.sub(r'Джерело:.*$', '', text, flags=re.MULTILINE)
-        text = re.sub(r'Фото:.*$', '', text, flags=re.MULTILINE)
-        text = re.sub(r'Повний текст новини.*$', '', text, flags=re.MULTILINE)
-        
-        # Видаляємо зайві пробіли та порожні рядки
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n\s*\n', '\n', text)
-        text = text.strip()
-        
-        return text
+        # Попередньо скомпільований конвеєр (text_cleaner), результат ідентичний старому ланцюжку re.sub
+        return clean_text(text)
     
     def is_unwanted_sentence(self, sentence):
         """Повертає True, якщо речення містить небажані патерни (реклама/копірайт/посилання тощо)."""
-        unwanted_patterns = [
-            r'\*+',  # Зірочки
-            r'[Рр]еклама',  # Реклама
-            r'©.*',  # Копірайт
-            r'unsplash',  # Unsplash
-            r'getty',  # Getty Images
-            r'shutterstock',  # Shutterstock
-            r'[Дд]жерело:',  # Джерело
-            r'[Фф]ото:',  # Фото
-            r'курс валют.*©',  # Курс валют з копірайтом
-        ]
-        
-        import re
-        for pattern in unwanted_patterns:
-            if re.search(pattern, sentence, re.IGNORECASE):
-                return True
-        
-        return False
+        return is_unwanted_sentence(sentence)
     
     def generate_hashtags(self, news_title, news_content):
         """Повертає рядок з 5-10 релевантних хештегів (локально або через OpenAI)."""
@@ -338,9 +333,8 @@ class ContentGenerator:
         Поверни тільки хештеги через пробіл.
         """
         
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        hashtags, _ = self.llm.complete(
+            [
                 {"role": "system", "content": "Ти експерт з SMM та хештегів для української аудиторії."},
                 {"role": "user", "content": prompt}
             ],
@@ -348,7 +342,7 @@ class ContentGenerator:
             temperature=0.7
         )
         
-        return response.choices[0].message.content.strip()
+        return hashtags
     
     def generate_local_hashtags(self, news_title, news_content):
         """Локальна генерація хештегів на основі ключових слів у заголовку/контенті."""
@@ -385,8 +379,16 @@ class ContentGenerator:
     
     def create_full_post(self, news_title, news_content):
         """Повертає фінальний пост (опис + хештеги) з урахуванням ліміту Instagram (2200 символів)."""
-        description = self.generate_post_description(news_title, news_content)
-        hashtags = self.generate_hashtags(news_title, news_content)
+        description = hashtags = None
+        if self.llm:
+            # Опис і хештеги — одним структурованим запитом (повтор для тієї ж новини береться з кешу)
+            try:
+                description, hashtags = self.generate_ai_post(news_title, news_content)
+            except Exception as e:
+                print(f"Помилка генерації контенту: {e}")
+        if description is None:
+            description = self.generate_fallback_post(news_title, news_content)
+            hashtags = self.generate_local_hashtags(news_title, news_content)
         
         # Об'єднуємо в фінальний пост
         full_post = f"{description}\n\n{hashtags}"
@@ -0,0 +1,180 @@
+"""
+Спільний HTTP-транспорт для всіх мережевих запитів бота.
+
+Ключові можливості:
+- http_get: GET через пул keep-alive сесій (окрема сесія і пул з'єднань на кожен хост).
+- http_post_json: POST JSON через той самий пул (API перекладу тощо).
+- HEADER_PROFILES: єдині заголовки для RSS / HTML-сторінок / зображень / JSON API.
+- Accept-Encoding оголошує лише ті алгоритми стиснення, які реально вміє розпакувати urllib3 (br — за наявності brotli).
+- install_dns_cache: кеш DNS-відповідей з TTL (щоб не резолвити tsn.ua та CDN на кожен запит). Обгортка
+  socket.getaddrinfo ставиться на весь процес, але кешує лише запити, зроблені через http_get / http_post_json;
+  решта бібліотек (instagrapi, openai) резолвить імена як зазвичай.
+- transport_stats / log_transport_stats: лічильники запитів і сумарний час за хостами.
+"""
+
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from config import HTTP_POOL_SIZE, DNS_CACHE_TTL_SECONDS
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def _supported_encodings():
+    """Повертає значення Accept-Encoding з алгоритмами, для яких є декодер."""
+    encodings = ['gzip', 'deflate']
+    try:
+        import brotli  # noqa: F401
+        encodings.append('br')
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append('br')
+        except ImportError:
+            pass
+    return ', '.join(encodings)
+
+
+ACCEPT_ENCODING = _supported_encodings()
+
+HEADER_PROFILES = {
+    'rss': {
+        'Accept': 'application/rss+xml, application/xml, text/xml, */*',
+        'Cache-Control': 'no-cache',
+    },
+    'html': {
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Upgrade-Insecure-Requests': '1',
+    },
+    'image': {
+        'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    },
+    'api': {
+        'Accept': 'application/json',
+    },
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+_dns_cache = {}
+_dns_lock = threading.Lock()
+# Позначка потоку «зараз виконується запит спільного транспорту» — лише такі резолви кешуються
+_dns_scope = threading.local()
+_original_getaddrinfo = socket.getaddrinfo
+
+
+def _cached_getaddrinfo(host, port, *args, **kwargs):
+    """Обгортка socket.getaddrinfo з кешем відповідей на DNS_CACHE_TTL_SECONDS (лише всередині _dns_cached)."""
+    if not getattr(_dns_scope, 'active', False):
+        return _original_getaddrinfo(host, port, *args, **kwargs)
+    key = (host, port, args, tuple(sorted(kwargs.items())))
+    now = time.monotonic()
+    with _dns_lock:
+        cached = _dns_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+    result = _original_getaddrinfo(host, port, *args, **kwargs)
+    with _dns_lock:
+        # Прострочені відповіді видаляємо при кожному промаху — кеш не росте необмежено
+        for stale in [stale for stale, (expires, _) in _dns_cache.items() if expires <= now]:
+            del _dns_cache[stale]
+        _dns_cache[key] = (now + DNS_CACHE_TTL_SECONDS, result)
+    return result
+
+
+@contextmanager
+def _dns_cached():
+    """Вмикає кеш DNS для запитів поточного потоку на час блоку `with`."""
+    previous = getattr(_dns_scope, 'active', False)
+    _dns_scope.active = True
+    try:
+        yield
+    finally:
+        _dns_scope.active = previous
+
+
+def install_dns_cache():
+    """Ставить кешуючу обгортку socket.getaddrinfo (для всього процесу, але кешує лише запити цього модуля)."""
+    if DNS_CACHE_TTL_SECONDS > 0 and socket.getaddrinfo is not _cached_getaddrinfo:
+        socket.getaddrinfo = _cached_getaddrinfo
+
+
+def _record_timing(response, *args, **kwargs):
+    """Хук requests: збирає кількість запитів, статуси та час до отримання заголовків відповіді за хостами."""
+    host = urlparse(response.url).netloc
+    elapsed = response.elapsed.total_seconds()
+    with _stats_lock:
+        stats = _stats.setdefault(host, {'requests': 0, 'seconds': 0.0, 'errors': 0, 'not_modified': 0})
+        stats['requests'] += 1
+        stats['seconds'] += elapsed
+        if response.status_code == 304:
+            stats['not_modified'] += 1
+        elif response.status_code >= 400:
+            stats['errors'] += 1
+    logging.debug(f"HTTP {response.status_code} {response.url[:80]} за {elapsed * 1000:.0f} мс")
+
+
+def get_session(url):
+    """Повертає keep-alive сесію для хоста `url` (створює з власним пулом з'єднань при першому зверненні)."""
+    host = urlparse(url).netloc.lower()
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            install_dns_cache()
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, pool_block=False)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept-Language': 'uk-UA,uk;q=0.9,en;q=0.8',
+                'Accept-Encoding': ACCEPT_ENCODING,
+                'Connection': 'keep-alive',
+            })
+            session.hooks['response'].append(_record_timing)
+            _sessions[host] = session
+        return session
+
+
+def http_get(url, kind='html', headers=None, timeout=15, stream=False, referer=None):
+    """Виконує GET через спільний пул з'єднань з профілем заголовків `kind` ('rss' | 'html' | 'image')."""
+    request_headers = dict(HEADER_PROFILES.get(kind, {}))
+    if referer:
+        request_headers['Referer'] = referer
+    if headers:
+        request_headers.update(headers)
+    with _dns_cached():
+        return get_session(url).get(url, headers=request_headers, timeout=timeout, stream=stream)
+
+
+def http_post_json(url, payload, headers=None, timeout=15):
+    """Виконує POST з JSON-тілом через спільний пул з'єднань (профіль заголовків 'api')."""
+    request_headers = dict(HEADER_PROFILES['api'])
+    if headers:
+        request_headers.update(headers)
+    with _dns_cached():
+        return get_session(url).post(url, json=payload, headers=request_headers, timeout=timeout)
+
+
+def transport_stats():
+    """Повертає копію лічильників запитів за хостами."""
+    with _stats_lock:
+        return {host: dict(stats) for host, stats in _stats.items()}
+
+
+def log_transport_stats():
+    """Пише у лог коротку статистику транспорту (кількість запитів і середній час за хостами)."""
+    for host, stats in sorted(transport_stats().items()):
+        average = stats['seconds'] / stats['requests'] * 1000 if stats['requests'] else 0
+        logging.info(
+            f"🌐 {host}: {stats['requests']} запитів, в середньому {average:.0f} мс, "
+            f"304: {stats['not_modified']}, помилок: {stats['errors']}"
+        )
@@ -0,0 +1,265 @@
+"""
+Постійний дисковий кеш перевірених зображень.
+
+Ключові класи/функції:
+- canonical_image_url: канонічний ключ зображення (без трекінгу, з нормалізованими CDN-параметрами розміру).
+- ImageCache: індекс «URL → розміри/режим/вердикт/перцептивний хеш» + байти прийнятих зображень, адресовані за хешем вмісту;
+  LRU-витіснення за сумарним розміром та TTL записів.
+  Сумарний розмір байтів ведеться лічильником (з підрахунком посилань на спільні файли), а індекс пишеться на диск
+  пакетно — не частіше ніж раз на INDEX_SAVE_INTERVAL_SECONDS (і при виході з процесу); файли, яких немає в
+  збереженому індексі (аварійне завершення між збереженнями), видаляються при відкритті кешу.
+- get_image_cache: спільний екземпляр кешу для всього процесу.
+"""
+
+import os
+import atexit
+import json
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from news_cache import canonicalize_url, content_hash
+from config import IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB, IMAGE_CACHE_TTL_HOURS
+
+# Синоніми CDN-параметрів розміру/якості → єдина назва (різні розміри лишаються різними ключами)
+CDN_PARAM_ALIASES = {
+    'width': 'w', 'wid': 'w',
+    'height': 'h', 'hei': 'h',
+    'quality': 'q', 'qlt': 'q',
+    'format': 'fm', 'fmt': 'fm',
+}
+
+# Як часто (сек) щонайбільше переписувати JSON-індекс кешу
+INDEX_SAVE_INTERVAL_SECONDS = 30
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def canonical_image_url(url):
+    """Повертає канонічний URL зображення: без трекінг-параметрів, з уніфікованими CDN-параметрами розміру."""
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return ''
+    parts = urlsplit(canonical)
+    query = [
+        (CDN_PARAM_ALIASES.get(key.lower(), key.lower()), value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(sorted(query)), ''))
+
+
+class ImageCache:
+    def __init__(self, directory=IMAGE_CACHE_DIR, max_mb=IMAGE_CACHE_MAX_MB, ttl_hours=IMAGE_CACHE_TTL_HOURS):
+        """Відкриває кеш у `directory` (створює за потреби) і відкидає записи, старші за TTL."""
+        self.directory = directory
+        self.blob_dir = os.path.join(directory, 'blobs')
+        self.index_path = os.path.join(directory, 'index.json')
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_hours * 3600
+        self._lock = threading.Lock()
+        # Запис індексу і os.replace — по одному (зберігають потоки перевірки зображень)
+        self._save_lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._entries = self._load()
+        # blob → кількість записів, що на нього посилаються, і розмір; сума розмірів унікальних blob-ів
+        self._blob_refs = {}
+        self._blob_sizes = {}
+        self._total_bytes = 0
+        for entry in self._entries.values():
+            self._retain(entry)
+        self._remove_orphans()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        with self._lock:
+            self._prune_expired()
+            self._evict()
+
+    def _load(self):
+        """Читає індекс у порядку LRU (найдавніше використані — першими)."""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return OrderedDict()
+        entries = sorted(data.items(), key=lambda item: item[1].get('accessed', 0)) if isinstance(data, dict) else []
+        return OrderedDict(entries)
+
+    def _remove_orphans(self):
+        """Видаляє з blob_dir файли без запису в індексі (байти і недописані .tmp) — інакше їх ніхто не витіснить."""
+        try:
+            names = os.listdir(self.blob_dir)
+        except OSError:
+            return
+        removed = 0
+        for name in names:
+            blob, ext = os.path.splitext(name)
+            if ext == '.bin' and blob in self._blob_refs:
+                continue
+            if ext not in ('.bin', '.tmp'):
+                continue
+            try:
+                os.remove(os.path.join(self.blob_dir, name))
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            print(f"🧹 Кеш зображень: видалено {removed} файлів без запису в індексі")
+
+    def save(self):
+        """Атомарно записує індекс на диск (тимчасовий файл свого потоку, записи — по черзі)."""
+        with self._save_lock:
+            with self._lock:
+                snapshot = json.dumps(self._entries, ensure_ascii=False)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            tmp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, self.index_path)
+            except OSError as e:
+                print(f"Не вдалося зберегти індекс кешу зображень: {e}")
+
+    def flush(self):
+        """Записує індекс, якщо в ньому є незбережені зміни."""
+        if self._dirty:
+            self.save()
+
+    def _maybe_save(self):
+        """Пакетне збереження: індекс пишеться не частіше ніж раз на INDEX_SAVE_INTERVAL_SECONDS."""
+        if self._dirty and time.monotonic() - self._saved_at >= INDEX_SAVE_INTERVAL_SECONDS:
+            self.save()
+
+    def _blob_path(self, blob):
+        return os.path.join(self.blob_dir, f"{blob}.bin")
+
+    def _retain(self, entry):
+        """Враховує посилання запису на blob (під self._lock)."""
+        blob = entry.get('blob')
+        if not blob:
+            return
+        if blob not in self._blob_refs:
+            self._blob_refs[blob] = 0
+            self._blob_sizes[blob] = entry.get('size', 0)
+            self._total_bytes += self._blob_sizes[blob]
+        self._blob_refs[blob] += 1
+
+    def _release(self, entry):
+        """Знімає посилання запису на blob; файл видаляється, коли посилань не лишилось (під self._lock)."""
+        blob = entry.get('blob')
+        if not blob or blob not in self._blob_refs:
+            return
+        self._blob_refs[blob] -= 1
+        if self._blob_refs[blob] > 0:
+            return
+        del self._blob_refs[blob]
+        self._total_bytes -= self._blob_sizes.pop(blob)
+        try:
+            os.remove(self._blob_path(blob))
+        except OSError:
+            pass
+
+    def _remove(self, key):
+        """Видаляє запис; файл з байтами — лише якщо на нього більше ніхто не посилається."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._release(entry)
+            self._dirty = True
+
+    def _prune_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        for key in [key for key, entry in self._entries.items() if entry.get('created', 0) < cutoff]:
+            self._remove(key)
+
+    def _evict(self):
+        """Витісняє найдавніше використані записи, доки байти кешу не вмістяться у ліміт."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def get(self, url):
+        """Повертає копію запису для URL (width/height/mode/verdict/...) або None; оновлює LRU-порядок."""
+        key = canonical_image_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.get('created', 0) < time.time() - self.ttl_seconds:
+                self._remove(key)
+                return None
+            entry['accessed'] = time.time()
+            self._entries.move_to_end(key)
+            return dict(entry)
+
+    def read_bytes(self, entry):
+        """Повертає збережені байти зображення для запису (або None, якщо їх немає)."""
+        blob = entry.get('blob')
+        if not blob:
+            return None
+        try:
+            with open(self._blob_path(blob), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, url, verdict, width=None, height=None, mode=None, content_length=None, data=None, image_hash=None):
+        """Запам'ятовує результат перевірки зображення; `data` (байти) і `image_hash` (dHash) — лише для прийнятих."""
+        key = canonical_image_url(url)
+        if not key:
+            return
+        now = time.time()
+        entry = {
+            'url': url,
+            'verdict': verdict,
+            'width': width,
+            'height': height,
+            'mode': mode,
+            'content_length': content_length,
+            'created': now,
+            'accessed': now,
+        }
+        if image_hash is not None:
+            entry['dhash'] = f"{image_hash:016x}"
+        if data is not None:
+            blob = content_hash(data)
+            path = self._blob_path(blob)
+            if not os.path.exists(path):
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                try:
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    print(f"Не вдалося записати зображення в кеш: {e}")
+                    blob = None
+            if blob:
+                entry['blob'] = blob
+                entry['size'] = len(data)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            # Не втрачаємо вже збережені байти, якщо новий результат прийшов без тіла
+            if (previous and previous.get('blob') and 'blob' not in entry and
+                    (previous.get('width'), previous.get('height')) == (width, height)):
+                entry['blob'], entry['size'] = previous['blob'], previous.get('size', 0)
+                entry['mode'] = entry['mode'] or previous.get('mode')
+                if 'dhash' not in entry and previous.get('dhash'):
+                    entry['dhash'] = previous['dhash']
+            # Спершу нове посилання, потім звільнення старого — спільний blob не видаляється між ними
+            self._entries[key] = entry
+            self._retain(entry)
+            if previous is not None:
+                self._release(previous)
+            self._dirty = True
+            self._evict()
+        self._maybe_save()
+
+
+def get_image_cache():
+    """Повертає спільний для процесу ImageCache (створюється при першому зверненні)."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ImageCache()
+            # Незбережені зміни індексу — на диск при виході з процесу
+            atexit.register(_shared_cache.flush)
+        return _shared_cache
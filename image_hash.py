@@ -0,0 +1,143 @@
+"""
+Перцептивні хеші фото, щоб не публікувати те саме зображення двічі (інший URL, розмір, кадрування чи стиснення).
+
+Ключові функції/класи:
+- dhash: 64-бітний difference hash — фото зменшується до 9×8 у відтінках сірого (JPEG — одразу в декодері, режим
+  draft), кожен біт показує, чи світліший сусідній праворуч піксель. Обчислення — NumPy (без нього — чистий Python).
+- hamming: кількість різних бітів двох хешів.
+- BKTree: індекс за відстанню Геммінга — пошук сусідів у радіусі без перебору всіх хешів.
+- PublishedImageIndex: хеші опублікованих фото з PostedArticlesStore; is_duplicate відсікає повтори (відстань
+  не більше IMAGE_HASH_MAX_DISTANCE) ще на етапі перевірки кандидатів-зображень.
+"""
+
+import threading
+from io import BytesIO
+from PIL import Image
+from config import IMAGE_HASH_MAX_DISTANCE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Сторона хешу: HASH_SIZE × HASH_SIZE біт (8 → 64 біти)
+HASH_SIZE = 8
+
+
+def dhash(image, size=HASH_SIZE):
+    """Повертає difference hash PIL-зображення як int (size×size біт)."""
+    if image.format == 'JPEG':
+        # libjpeg одразу зменшує до 1/8 — повне декодування для хешу не потрібне
+        image.draft('L', (size + 1, size))
+    small = image.convert('L').resize((size + 1, size), Image.BILINEAR)
+
+    if numpy is not None:
+        pixels = numpy.asarray(small, dtype=numpy.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+        return int.from_bytes(numpy.packbits(bits).tobytes(), 'big')
+
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col + 1] > pixels[offset + col])
+    return value
+
+
+def dhash_bytes(data, size=HASH_SIZE):
+    """Difference hash зображення з байтів; None — якщо їх не вдалося декодувати."""
+    try:
+        return dhash(Image.open(BytesIO(data)), size)
+    except Exception:
+        return None
+
+
+def hamming(a, b):
+    """Відстань Геммінга між двома хешами."""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    def __init__(self):
+        """Порожнє BK-дерево: вузол — [хеш, значення, {відстань: дочірній вузол}]."""
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key, value=None):
+        """Додає хеш `key` з довільним значенням `value` (наприклад, ID статті)."""
+        self._size += 1
+        if self._root is None:
+            self._root = [key, value, {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(key, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, value, {}]
+                return
+            node = child
+
+    def search(self, key, max_distance):
+        """Повертає [(відстань, хеш, значення)] у радіусі `max_distance`, від найближчих."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(key, node[0])
+            if distance <= max_distance:
+                found.append((distance, node[0], node[1]))
+            # Нерівність трикутника: піддерева за межами [d - r, d + r] не можуть містити сусідів
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+class PublishedImageIndex:
+    def __init__(self, store, max_distance=IMAGE_HASH_MAX_DISTANCE):
+        """Будує індекс з хешів фото, збережених у `store` (PostedArticlesStore)."""
+        self.store = store
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._tree = BKTree()
+        self.reload()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tree)
+
+    def reload(self):
+        """Перебудовує дерево зі сховища (після видалення записів чи очищення за TTL)."""
+        tree = BKTree()
+        for image_hash, article_id, _ in self.store.image_hashes():
+            tree.add(image_hash, article_id)
+        with self._lock:
+            self._tree = tree
+
+    def add(self, image_hash, article_id=None):
+        """Додає хеш щойно опублікованого фото (сховище оновлює PostedArticlesStore.add)."""
+        if image_hash is None:
+            return
+        with self._lock:
+            self._tree.add(image_hash, article_id)
+
+    def find_similar(self, image_hash):
+        """Повертає (відстань, ID статті) найближчого опублікованого фото в межах порогу або None."""
+        if image_hash is None:
+            return None
+        with self._lock:
+            found = self._tree.search(image_hash, self.max_distance)
+        if not found:
+            return None
+        distance, _, article_id = found[0]
+        return distance, article_id
+
+    def is_duplicate(self, image_hash):
+        """True, якщо таке (або майже таке) фото вже публікувалось."""
+        return self.find_similar(image_hash) is not None
@@ -0,0 +1,139 @@
+"""
+Підготовка фото до публікації в Instagram.
+
+Ключові функції:
+- output_size: розмір результату — кадр у вікні пропорцій Instagram (4:5 … 1.91:1) шириною INSTAGRAM_IMAGE_WIDTH;
+  маленькі фото (менше preferred_min_width/height) збільшуються не більш ніж у max_scale_factor разів.
+- decode_draft: декодування JPEG у режимі draft — libjpeg одразу зменшує зображення (1/2, 1/4, 1/8) до потрібного
+  розміру, тож повне декодування великих фото не потрібне.
+- interest_offset: «розумне» кадрування — вікно зсувається туди, де найбільше деталей (енергія країв на мініатюрі).
+- encode_jpeg: JPEG з найвищою якістю в межах INSTAGRAM_JPEG_QUALITY, що вкладається в бюджет INSTAGRAM_IMAGE_MAX_KB.
+- prepare_instagram_image: повний етап (декодування → кадрування → масштаб → кодування); результат — байти в пам'яті.
+  Результат уже має розміри і пропорції, яких вимагає instagrapi, тож його власні crop/resize не спрацьовують.
+"""
+
+import math
+from io import BytesIO
+from PIL import Image, ImageFilter
+from config import (
+    IMAGE_REQUIREMENTS, INSTAGRAM_IMAGE_WIDTH, INSTAGRAM_ASPECT_RANGE, INSTAGRAM_IMAGE_MAX_KB, INSTAGRAM_JPEG_QUALITY
+)
+
+# Розмір мініатюри для пошуку «цікавої» частини кадру
+ANALYSIS_SIZE = 96
+
+
+def output_size(width, height):
+    """Повертає (crop_width, crop_height, out_width, out_height) для джерела `width`×`height`."""
+    min_aspect, max_aspect = INSTAGRAM_ASPECT_RANGE
+    aspect = min(max(width / height, min_aspect), max_aspect)
+    # Найбільше вікно потрібних пропорцій, що вміщується в джерело
+    if width / height > aspect:
+        crop_width, crop_height = round(height * aspect), height
+    else:
+        crop_width, crop_height = width, round(width / aspect)
+
+    # Збільшуємо лише замалі фото і не більше ніж у max_scale_factor разів
+    scale = 1.0
+    if crop_width < IMAGE_REQUIREMENTS['preferred_min_width'] or crop_height < IMAGE_REQUIREMENTS['preferred_min_height']:
+        scale = IMAGE_REQUIREMENTS['max_scale_factor']
+    out_width = min(INSTAGRAM_IMAGE_WIDTH, round(crop_width * scale))
+    # Округлення не повинно виводити пропорції за межі вікна Instagram
+    out_height = round(out_width / aspect)
+    out_height = min(max(out_height, math.ceil(out_width / max_aspect)), math.floor(out_width / min_aspect))
+    return crop_width, crop_height, out_width, out_height
+
+
+def decode_draft(image, width, height):
+    """Декодує зображення не менше ніж до `width`×`height` (JPEG — зі зменшенням у декодері); повертає RGB."""
+    if image.format == 'JPEG' and (width < image.width or height < image.height):
+        image.draft(None, (width, height))
+    image.load()
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # Прозорість — на білому тлі (як це робить instagrapi)
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+
+def _best_window(profile, window):
+    """Початок вікна довжини `window` з найбільшою сумою `profile` (за рівності — ближчий до центру)."""
+    prefix = [0]
+    for value in profile:
+        prefix.append(prefix[-1] + value)
+    center = (len(profile) - window) / 2
+    return max(range(len(profile) - window + 1),
+               key=lambda start: (prefix[start + window] - prefix[start], -abs(start - center)))
+
+
+def interest_offset(image, crop_width, crop_height):
+    """Повертає (left, top) вікна `crop_width`×`crop_height` з найбільшою кількістю деталей."""
+    width, height = image.size
+    if crop_width >= width and crop_height >= height:
+        return 0, 0
+
+    scale = ANALYSIS_SIZE / max(width, height)
+    thumb_width, thumb_height = max(1, round(width * scale)), max(1, round(height * scale))
+    edges = image.resize((thumb_width, thumb_height), Image.BILINEAR).convert('L').filter(ImageFilter.FIND_EDGES)
+    pixels = edges.tobytes()
+
+    if crop_width < width:
+        profile = [sum(pixels[x::thumb_width]) for x in range(thumb_width)]
+        window = min(thumb_width, max(1, round(crop_width * scale)))
+        left = round(_best_window(profile, window) / scale)
+        return min(max(0, left), width - crop_width), 0
+
+    profile = [sum(pixels[y * thumb_width:(y + 1) * thumb_width]) for y in range(thumb_height)]
+    window = min(thumb_height, max(1, round(crop_height * scale)))
+    top = round(_best_window(profile, window) / scale)
+    return 0, min(max(0, top), height - crop_height)
+
+
+def encode_jpeg(image, max_bytes, quality_range=INSTAGRAM_JPEG_QUALITY):
+    """Повертає (байти JPEG, якість): найвища якість, що вкладається в `max_bytes` (або мінімальна, якщо жодна)."""
+    def encode(quality):
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=quality, optimize=True)
+        return buffer.getvalue()
+
+    low, high = quality_range
+    data = encode(high)
+    if len(data) <= max_bytes:
+        return data, high
+
+    # Бінарний пошук якості під бюджет
+    best = None
+    high -= 1
+    while low <= high:
+        quality = (low + high) // 2
+        data = encode(quality)
+        if len(data) <= max_bytes:
+            best = (data, quality)
+            low = quality + 1
+        else:
+            high = quality - 1
+    return best or (encode(quality_range[0]), quality_range[0])
+
+
+def prepare_instagram_image(image, max_kb=INSTAGRAM_IMAGE_MAX_KB):
+    """Готує PIL-зображення (бажано ще не декодоване) до публікації; повертає (байти JPEG, width, height)."""
+    crop_width, crop_height, out_width, out_height = output_size(*image.size)
+
+    # Декодуємо лише з тою роздільністю, яка потрібна для результату
+    ratio = min(1.0, out_width / crop_width)
+    source_width, source_height = image.size
+    decoded = decode_draft(image, math.ceil(source_width * ratio), math.ceil(source_height * ratio))
+
+    # Після draft розміри зменшились — перераховуємо вікно в нових координатах
+    factor = decoded.width / source_width
+    crop_width = min(decoded.width, round(crop_width * factor))
+    crop_height = min(decoded.height, round(crop_height * factor))
+    left, top = interest_offset(decoded, crop_width, crop_height)
+    result = decoded.resize(
+        (out_width, out_height), Image.LANCZOS, box=(left, top, left + crop_width, top + crop_height), reducing_gap=3.0
+    )
+
+    data, _ = encode_jpeg(result, max_kb * 1024)
+    return data, out_width, out_height
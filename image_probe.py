@@ -0,0 +1,386 @@
+"""
+Легка перевірка зображень без повного завантаження.
+
+Ключові функції/класи:
+- read_image_size: визначає (width, height) з перших байтів JPEG (SOF), PNG (IHDR), GIF та WebP (VP8/VP8L/VP8X).
+- ImageProbe: результат перевірки (HTTP-статус, розміри, байти для прийнятого зображення, причина відмови).
+- fetch_image: потоково читає лише заголовок файлу, відкидає непридатних кандидатів за розмірами
+  і докачує тіло тільки для прийнятих — з обмеженням `IMAGE_REQUIREMENTS['max_file_size_mb']`.
+- Результати перевірок (розміри, вердикт, перцептивний хеш, байти прийнятих) кешуються на диску в image_cache.ImageCache,
+  тож повторна перевірка відомого зображення не потребує HTTP-запиту.
+- Для прийнятих зображень рахується dHash (image_hash); `duplicate(hash)` відкидає вже опубліковані фото
+  (для кешованих — ще до читання байтів).
+- probe_candidates: паралельно перевіряє список кандидатів, зберігаючи пріоритет (перший придатний у списку виграє).
+"""
+
+import struct
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from http_client import http_get
+from image_cache import get_image_cache
+from image_hash import dhash_bytes
+from config import IMAGE_REQUIREMENTS, IMAGE_PROBE_WORKERS
+
+# Скільки байтів максимум читаємо, шукаючи розміри в заголовку (EXIF у JPEG буває до 64 KB)
+PROBE_LIMIT_BYTES = 128 * 1024
+CHUNK_SIZE = 8 * 1024
+
+# Маркери JPEG Start Of Frame (крім DHT/JPG/DAC, що мають схожі коди)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Маркери без поля довжини
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+
+class UnsupportedImageFormat(ValueError):
+    """Заголовок не належить жодному з підтримуваних форматів (або пошкоджений)."""
+
+
+def _jpeg_size(data):
+    """Повертає (width, height) з першого SOF-сегмента JPEG або None, якщо даних ще замало."""
+    i = 2
+    size = len(data)
+    while True:
+        # Шукаємо початок маркера (0xFF, можливі байти-заповнювачі 0xFF)
+        while i < size and data[i] != 0xFF:
+            i += 1
+        while i < size and data[i] == 0xFF:
+            i += 1
+        if i >= size:
+            return None
+        marker = data[i]
+        i += 1
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # Кінець файлу або початок скану без SOF — файл некоректний
+            raise UnsupportedImageFormat("JPEG без SOF перед даними скану")
+        if i + 2 > size:
+            return None
+        segment_length = struct.unpack('>H', data[i:i + 2])[0]
+        if segment_length < 2:
+            raise UnsupportedImageFormat("Некоректна довжина сегмента JPEG")
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 7 > size:
+                return None
+            height, width = struct.unpack('>HH', data[i + 3:i + 7])
+            return width, height
+        i += segment_length
+
+
+def _webp_size(data):
+    """Повертає (width, height) для WebP (VP8/VP8L/VP8X) або None, якщо даних ще замало."""
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b'VP8 ':
+        if data[23:26] != b'\x9d\x01\x2a':
+            raise UnsupportedImageFormat("Некоректний кадр VP8")
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        if data[20] != 0x2F:
+            raise UnsupportedImageFormat("Некоректний підпис VP8L")
+        b0, b1, b2, b3 = data[21:25]
+        width = 1 + (b0 | ((b1 & 0x3F) << 8))
+        height = 1 + ((b1 >> 6) | (b2 << 2) | ((b3 & 0x0F) << 10))
+        return width, height
+    if chunk == b'VP8X':
+        width = 1 + int.from_bytes(data[24:27], 'little')
+        height = 1 + int.from_bytes(data[27:30], 'little')
+        return width, height
+    raise UnsupportedImageFormat(f"Невідомий WebP-чанк {chunk!r}")
+
+
+def read_image_size(data):
+    """Повертає (width, height) з початку файлу; None — якщо байтів ще недостатньо; UnsupportedImageFormat — інший формат."""
+    if data[:2] == b'\xff\xd8':
+        return _jpeg_size(data)
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        if len(data) < 24:
+            return None
+        if data[12:16] != b'IHDR':
+            raise UnsupportedImageFormat("PNG без IHDR")
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        if len(data) < 10:
+            return None
+        return struct.unpack('<HH', data[6:10])
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _webp_size(data)
+    if len(data) < 12:
+        return None
+    raise UnsupportedImageFormat("Невідомий формат зображення")
+
+
+class ImageProbe:
+    def __init__(self, url):
+        """Порожній результат перевірки для `url` (заповнюється у fetch_image)."""
+        self.url = url
+        self.status_code = None
+        self.content_length = None
+        self.width = None
+        self.height = None
+        self.data = None
+        # 'http_error' | 'too_small' | 'too_large' | 'rejected' | 'duplicate' | 'cancelled' | 'error'
+        self.reason = None
+        self.error = None
+        self.bytes_read = 0
+        self.mode = None
+        # Перцептивний хеш (dHash, int) прийнятого зображення
+        self.hash = None
+        # True — результат узято з дискового кешу без мережі
+        self.cached = False
+
+    @property
+    def ok(self):
+        """True, якщо зображення прийняте і повністю завантажене."""
+        return self.data is not None
+
+    def open(self):
+        """Повертає PIL-зображення з завантажених байтів (декодування відкладене до першого доступу до пікселів)."""
+        return Image.open(BytesIO(self.data))
+
+
+def _probe_from_cache(entry, probe, accept, min_bytes, max_bytes, proceed, cache, duplicate=None):
+    """Відтворює результат перевірки із запису кешу; повертає None, якщо без мережі не обійтись."""
+    content_length = entry.get('content_length')
+    if entry.get('verdict') == 'too_large':
+        probe.reason = 'too_large'
+    elif content_length is not None:
+        if content_length < min_bytes:
+            probe.reason = 'too_small'
+        elif content_length > max_bytes:
+            probe.reason = 'too_large'
+    if probe.reason is None and entry.get('width') is not None:
+        probe.width, probe.height = entry['width'], entry['height']
+        if entry.get('dhash'):
+            probe.hash = int(entry['dhash'], 16)
+        if accept is not None and not accept(probe.width, probe.height):
+            probe.reason = 'rejected'
+        elif duplicate is not None and probe.hash is not None and duplicate(probe.hash):
+            # Повтор уже опублікованого фото — байти з кешу навіть не читаємо
+            probe.reason = 'duplicate'
+        else:
+            data = cache.read_bytes(entry)
+            if data is None or len(data) > max_bytes:
+                # Розміри відомі, але тіла в кеші немає — докачаємо з мережі
+                return None
+            if proceed is not None and not proceed():
+                probe.reason = 'cancelled'
+            else:
+                probe.data = data
+                probe.mode = entry.get('mode')
+    if probe.reason is None and probe.data is None:
+        return None
+    probe.status_code = 200
+    probe.content_length = content_length
+    probe.cached = True
+    return probe
+
+
+def _remember(cache, probe):
+    """Зберігає у кеш лише остаточні результати (мережеві помилки не кешуються)."""
+    if probe.ok:
+        try:
+            probe.mode = probe.open().mode
+        except Exception:
+            probe.mode = None
+        cache.put(probe.url, 'accepted', probe.width, probe.height, probe.mode, probe.content_length, probe.data,
+                  probe.hash)
+    elif probe.reason in ('too_small', 'too_large') and probe.width is None:
+        cache.put(probe.url, probe.reason, content_length=probe.content_length)
+    elif probe.width is not None and probe.reason in ('rejected', 'too_large', 'cancelled'):
+        cache.put(probe.url, probe.reason, probe.width, probe.height, content_length=probe.content_length)
+
+
+def fetch_image(url, headers=None, timeout=15, accept=None, min_bytes=0, max_bytes=None,
+                proceed=None, cancelled=None, use_cache=True, duplicate=None):
+    """Перевіряє зображення за заголовком і докачує його лише якщо `accept(width, height)` повертає True."""
+    # proceed() викликається після прийнятого заголовка (може блокувати) і вирішує, чи качати тіло;
+    # cancelled() перевіряється між блоками даних і перериває завантаження;
+    # duplicate(hash) — True для вже опублікованого фото (такий кандидат відкидається з причиною 'duplicate')
+    if max_bytes is None:
+        max_bytes = int(IMAGE_REQUIREMENTS['max_file_size_mb'] * 1024 * 1024)
+
+    cache = get_image_cache() if use_cache else None
+    if cache is not None:
+        entry = cache.get(url)
+        if entry:
+            probe = _probe_from_cache(entry, ImageProbe(url), accept, min_bytes, max_bytes, proceed, cache, duplicate)
+            if probe is not None:
+                return _reject_duplicate(probe, duplicate)
+
+    probe = _fetch_from_network(url, headers, timeout, accept, min_bytes, max_bytes, proceed, cancelled)
+    if probe.ok:
+        probe.hash = dhash_bytes(probe.data)
+    if cache is not None:
+        _remember(cache, probe)
+    return _reject_duplicate(probe, duplicate)
+
+
+def _reject_duplicate(probe, duplicate):
+    """Відкидає прийняте зображення, якщо `duplicate(probe.hash)` упізнає вже опубліковане фото."""
+    if probe.ok and duplicate is not None:
+        if probe.hash is None:
+            # Старий запис кешу без хешу — рахуємо з байтів
+            probe.hash = dhash_bytes(probe.data)
+        if probe.hash is not None and duplicate(probe.hash):
+            probe.data = None
+            probe.reason = 'duplicate'
+    return probe
+
+
+def _fetch_from_network(url, headers, timeout, accept, min_bytes, max_bytes, proceed, cancelled):
+    """Мережева частина fetch_image: потокове читання заголовка і (для прийнятих) тіла."""
+    probe = ImageProbe(url)
+    try:
+        response = http_get(url, kind='image', headers=headers, timeout=timeout, stream=True)
+    except Exception as e:
+        probe.reason, probe.error = 'error', e
+        return probe
+
+    buffer = bytearray()
+    try:
+        probe.status_code = response.status_code
+        if response.status_code != 200:
+            probe.reason = 'http_error'
+            return probe
+
+        content_length = response.headers.get('content-length')
+        if content_length and content_length.isdigit():
+            probe.content_length = int(content_length)
+            if probe.content_length < min_bytes:
+                probe.reason = 'too_small'
+                return probe
+            if probe.content_length > max_bytes:
+                probe.reason = 'too_large'
+                return probe
+
+        # 1. Читаємо тільки заголовок, доки не з'ясуємо розміри
+        chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+        size = None
+        header_parsed = True
+        for chunk in chunks:
+            if cancelled is not None and cancelled():
+                probe.reason = 'cancelled'
+                return probe
+            buffer.extend(chunk)
+            try:
+                size = read_image_size(buffer)
+            except UnsupportedImageFormat:
+                # Невідомий формат — розміри визначить PIL після повного завантаження
+                header_parsed = False
+                break
+            if size is not None or len(buffer) >= PROBE_LIMIT_BYTES:
+                break
+
+        if size is not None:
+            probe.width, probe.height = size
+            if accept is not None and not accept(probe.width, probe.height):
+                probe.reason = 'rejected'
+                return probe
+        elif header_parsed and len(buffer) < PROBE_LIMIT_BYTES:
+            # Потік закінчився раніше, ніж знайшлися розміри — файл обрізаний
+            probe.reason = 'error'
+            probe.error = UnsupportedImageFormat("Файл закінчився до заголовка з розмірами")
+            return probe
+
+        # 2. Кандидат пройшов — докачуємо решту тіла з обмеженням розміру
+        if proceed is not None and not proceed():
+            probe.reason = 'cancelled'
+            return probe
+        for chunk in chunks:
+            if cancelled is not None and cancelled():
+                probe.reason = 'cancelled'
+                return probe
+            buffer.extend(chunk)
+            if len(buffer) > max_bytes:
+                probe.reason = 'too_large'
+                return probe
+
+        if size is None:
+            # Заголовок не розпізнано: беремо розміри з PIL (без декодування пікселів)
+            probe.width, probe.height = Image.open(BytesIO(bytes(buffer))).size
+            if accept is not None and not accept(probe.width, probe.height):
+                probe.reason = 'rejected'
+                return probe
+
+        probe.data = bytes(buffer)
+        return probe
+    except Exception as e:
+        probe.reason, probe.error = 'error', e
+        return probe
+    finally:
+        probe.bytes_read = len(buffer)
+        response.close()
+
+
+class _PriorityRace:
+    def __init__(self, count):
+        """Координатор паралельних перевірок: кандидат з меншим індексом завжди має пріоритет."""
+        self._cond = threading.Condition()
+        self._failed = [False] * count
+        self.winner = None
+
+    def resolve(self, index, ok):
+        """Фіксує результат кандидата `index` і будить тих, хто чекає на свою чергу."""
+        with self._cond:
+            if ok:
+                if self.winner is None or index < self.winner:
+                    self.winner = index
+            else:
+                self._failed[index] = True
+            self._cond.notify_all()
+
+    def cancelled(self, index):
+        """True, якщо вже підтверджено кандидата з вищим пріоритетом."""
+        winner = self.winner
+        return winner is not None and winner < index
+
+    def wait_turn(self, index):
+        """Блокує, доки всі кандидати з вищим пріоритетом не відпадуть (True) або один з них не виграє (False)."""
+        with self._cond:
+            while True:
+                if self.cancelled(index):
+                    return False
+                if all(self._failed[:index]):
+                    return True
+                self._cond.wait()
+
+
+def probe_candidates(urls, headers=None, timeout=15, accept=None, min_bytes=0, max_workers=IMAGE_PROBE_WORKERS,
+                     duplicate=None):
+    """Паралельно перевіряє `urls` (у порядку пріоритету); повертає список ImageProbe (None — не запускались)."""
+    # Тіло качається лише коли всі кандидати з вищим пріоритетом відпали, тож виграє перший
+    # придатний у списку; решта запитів скасовується, щойно переможця підтверджено.
+    # Вже опубліковане фото (duplicate) вважається непридатним — черга переходить до наступного кандидата
+    if not urls:
+        return []
+
+    race = _PriorityRace(len(urls))
+
+    def run(index):
+        if race.cancelled(index):
+            race.resolve(index, False)
+            return None
+        request_headers = headers(urls[index]) if callable(headers) else headers
+        probe = None
+        try:
+            probe = fetch_image(
+                urls[index], headers=request_headers, timeout=timeout, accept=accept,
+                min_bytes=min_bytes,
+                proceed=lambda: race.wait_turn(index),
+                cancelled=lambda: race.cancelled(index),
+                duplicate=duplicate
+            )
+            return probe
+        finally:
+            race.resolve(index, bool(probe and probe.ok))
+
+    # Завдання стартують у порядку подання, тому кандидат чекає лише на вже запущених — без дедлоків
+    workers = max(1, min(max_workers, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-probe') as executor:
+        futures = [executor.submit(run, index) for index in range(len(urls))]
+        return [future.result() for future in futures]
@@ -3,9 +3,9 @@
 Instagram Challenge Solver - допомагає вирішувати challenge для входу в Instagram
 """
 
-import os
 import time
 from instagrapi import Client
+from session_manager import SessionManager
 from config import INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD
 
 class InstagramChallengeSolver:
@@ -49,24 +49,12 @@ class InstagramChallengeSolver:
     
     def try_session_recovery(self):
         """Спроба відновлення через збережену сесію"""
-        session_file = "instagram_session.json"
-        
-        if os.path.exists(session_file):
-            try:
-                print("🔄 Спроба відновлення сесії...")
-                self.client.load_settings(session_file)
-                
-                # Спроба простого запиту для перевірки сесії
-                account_info = self.client.account_info()
-                print(f"✅ Сесія відновлена! Аккаунт: {account_info.username}")
-                return True
-                
-            except Exception as e:
-                print(f"❌ Сесія не працює: {e}")
-                # Видаляємо неробочу сесію
-                os.remove(session_file)
-                print("🗑️ Видалено неробочу сесію")
-        
+        print("🔄 Спроба відновлення сесії...")
+        # Та сама логіка відновлення, що й у публікатора (SessionManager)
+        username = SessionManager(self.username, self.password, "instagram_session.json").recover()
+        if username:
+            print(f"✅ Сесія відновлена! Аккаунт: {username}")
+            return True
         return False
     
     def test_challenge_status(self):
@@ -2,65 +2,60 @@
 Публікатор у Instagram на базі instagrapi.
 
 Ключові можливості:
-- login: авторизація з кешем сесії.
-- publish_photo_post: публікація фото у стрічку.
+- login / ensure_logged_in: готова сесія без запитів до API (SessionManager: збережені й резервні сесії, фонова
+  перевірка після TTL і завчасне оновлення; окремий файл сесії для кожного акаунта).
+- publish_photo_post: публікація фото у стрічку (байти з пам'яті пишуться лише на час завантаження — scratch_area).
 - publish_story: публікація історій.
 - get_account_info / get_post_insights: допоміжні методи інформації/аналітики.
-- schedule_optimal_time: проста евристика «гарного часу» для посту.
+- schedule_optimal_time: евристика «гарного часу» для посту (київський час, див. posting_scheduler).
 - add_hashtags_to_comment: додає хештеги окремим коментарем.
-- safe_publish: обгортач публікації з розділенням підпису/хештегів та таймінгом.
+- submit_publish: ставить публікацію в PublishQueue (людські паузи — відкладеними задачами, статус у PublishJob).
+- safe_publish: обгортач публікації з розділенням підпису/хештегів; не чекає — повертає PublishJob (результат
+  завантаження — PublishJob.on_uploaded / wait_uploaded).
 - logout: вихід із акаунта.
 """
 
-from instagrapi import Client
 from instagrapi.exceptions import LoginRequired, ChallengeRequired, PleaseWaitFewMinutes
 import os
-import time
-import random
 from datetime import datetime
+from publish_queue import PublishQueue, LOGIN_REQUIRED
+from session_manager import SessionManager
+from scratch_area import get_scratch_area
+from posting_scheduler import is_optimal_time, next_optimal_time, TIMEZONE
 from config import INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD
 
 class InstagramPublisher:
-    def __init__(self):
-        """Створює клієнт instagrapi та готує поля авторизації/стану."""
-        self.client = Client()
-        self.username = INSTAGRAM_USERNAME
-        self.password = INSTAGRAM_PASSWORD
-        self.is_logged_in = False
-        
-        # Спроба попередньо підвантажити сесію (якщо є)
-        try:
-            if os.path.exists("instagram_session.json"):
-                self.client.load_settings("instagram_session.json")
-        except Exception:
-            pass
+    def __init__(self, username=None, password=None, session_file="instagram_session.json"):
+        """Готує поля авторизації та менеджер сесій (за замовчуванням — акаунт INSTAGRAM_USERNAME)."""
+        self.username = username or INSTAGRAM_USERNAME
+        self.password = password or INSTAGRAM_PASSWORD
+        # Окремий файл сесії для кожного акаунта
+        self.session_file = session_file
+        # Сесії з диска піднімаються без запитів; перевірка, оновлення і резерв — у фоні (SessionManager)
+        self.sessions = SessionManager(self.username, self.password, session_file)
+        # Тимчасові файли для instagrapi (при першому створенні прибирає залишки попередніх запусків)
+        self.scratch = get_scratch_area()
+        # Завантаження та коментарі виконуються окремим потоком за розкладом (без пауз у викликача)
+        self.publish_queue = PublishQueue(self)
+    
+    @property
+    def client(self):
+        """Клієнт instagrapi активної сесії (виклики API — через self.sessions.api(), під замком клієнта)."""
+        return self.sessions.client
+    
+    @property
+    def is_logged_in(self):
+        """True, якщо є готова сесія (без запиту до Instagram)."""
+        return self.sessions.ready()
         
     def login(self):
-        """Виконує вхід у Instagram; за можливості використовує збережену сесію."""
+        """Виконує вхід у Instagram, якщо готової сесії немає (збережена/резервна сесія використовується без входу)."""
         try:
-            print("Вхід в Instagram...")
-            
-            # 1) Спроба через збережені налаштування/сесію
-            if os.path.exists("instagram_session.json"):
-                try:
-                    self.client.load_settings("instagram_session.json")
-                    self.client.login(self.username, self.password)
-                    self.is_logged_in = True
-                    print("✅ Вхід через збережену сесію!")
-                    # Оновимо сесію
-                    self.client.dump_settings("instagram_session.json")
-                    return True
-                except Exception:
-                    print("⚠️ Збережена сесія неактуальна, пробую звичайний вхід...")
-            
-            # 2) Звичайний вхід
-            self.client.login(self.username, self.password)
-            self.is_logged_in = True
-            print("✅ Успішний вхід в Instagram!")
-            
-            # Збереження сесії для подальшого використання
-            self.client.dump_settings("instagram_session.json")
-            
+            if not self.sessions.ready():
+                print("Вхід в Instagram...")
+            self.sessions.login()
+            self.sessions.start()
+            print("✅ Сесія Instagram готова")
             return True
             
         except Exception as e:
@@ -80,76 +75,54 @@ class InstagramPublisher:
             return False
     
     def ensure_logged_in(self):
-        """Перевіряє валідність сесії і виконує повторний вхід за потреби."""
-        try:
-            if not self.is_logged_in:
-                return self.login()
-            # Швидка перевірка сесії викликом API
-            _ = self.client.account_info()
+        """Гарантує готову сесію без запитів до API; валідність перевіряє фоновий SessionManager (після TTL)."""
+        if self.sessions.ready():
+            self.sessions.start()
             return True
-        except LoginRequired:
-            print("⚠️ Сесія недійсна: потрібен повторний вхід")
-            self.is_logged_in = False
-            return self.login()
-        except Exception:
-            # На будь-яку іншу помилку — пробуємо переввійтись
-            self.is_logged_in = False
-            return self.login()
+        return self.login()
 
-    def publish_photo_post(self, image_path, caption, location=None):
-        """Публікує фото у стрічку з підписом; повертає (success, message)."""
+    def publish_photo_post(self, image, caption, location=None):
+        """Публікує фото (шлях або байти JPEG) у стрічку; повертає (success, message, media_id | None)."""
+        if isinstance(image, (bytes, bytearray)):
+            # instagrapi читає фото лише з файлу — тимчасовий файл у керованій області, видаляється за будь-якого результату
+            with self.scratch.temporary(image) as image_path:
+                return self.publish_photo_post(image_path, caption, location)
+        image_path = image
+        
         if not self.ensure_logged_in():
-            return False, "Неможливо увійти в Instagram"
+            return False, "Неможливо увійти в Instagram", None
         
         try:
+            # Рандомна «людська» пауза перед завантаженням — у PublishQueue, тут не блокуємо
             print("📤 Публікую пост в Instagram...")
             
-            # Додаємо рандомну затримку для природності
-            time.sleep(random.uniform(30, 60))
-            
             # Публікуємо фото
-            media = self.client.photo_upload(
-                image_path, 
-                caption,
-                location=location
-            )
+            with self.sessions.api() as client:
+                media = client.photo_upload(
+                    image_path, 
+                    caption,
+                    location=location
+                )
             
             print(f"✅ Пост успішно опубліковано! ID: {media.id}")
+            self.sessions.mark_valid()
             
-            # Видаляємо тимчасовий файл
-            try:
-                os.remove(image_path)
-                print("🗑️ Тимчасовий файл видалено")
-            except:
-                pass
-            
-            return True, f"Пост опубліковано: {media.id}"
+            # Тимчасовий файл прибирає ScratchArea.temporary (або той, хто передав шлях)
+            return True, f"Пост опубліковано: {media.id}", media.id
             
         except (LoginRequired, ChallengeRequired) as e:
-            # Спроба відновлення сесії та повторного аплоаду один раз
-            print(f"⚠️ Сесія втрачена/потрібен челендж: {e}. Перевхід та повтор...")
-            self.is_logged_in = False
+            # Підставляємо резервну сесію (або входимо наново); повтор аплоаду планує PublishQueue
+            print(f"⚠️ Сесія втрачена/потрібен челендж: {e}. Перевхід...")
+            self.sessions.invalidate()
             if self.ensure_logged_in():
-                try:
-                    time.sleep(random.uniform(5, 10))
-                    media = self.client.photo_upload(image_path, caption, location=location)
-                    print(f"✅ Пост успішно опубліковано після перевходу! ID: {media.id}")
-                    try:
-                        os.remove(image_path)
-                        print("🗑️ Тимчасовий файл видалено")
-                    except:
-                        pass
-                    return True, f"Пост опубліковано: {media.id}"
-                except Exception as e2:
-                    print(f"❌ Повторна помилка публікації: {e2}")
-                    return False, f"Помилка: {e2}"
-            return False, "login_required"
+                return False, LOGIN_REQUIRED, None
+            return False, "Неможливо увійти в Instagram", None
         except PleaseWaitFewMinutes as e:
             print(f"⏳ Instagram просить зачекати: {e}")
-            return False, "please_wait_few_minutes"
+            return False, "please_wait_few_minutes", None
         except Exception as e:
             print(f"❌ Помилка публікації: {e}")
-            return False, f"Помилка: {e}"
+            return False, f"Помилка: {e}", None
     
     def publish_story(self, image_path, text_overlay=None):
         """Публікує історію з опціональним текстом; повертає (success, message)."""
@@ -161,10 +134,11 @@ class InstagramPublisher:
             print("📤 Публікую Stories...")
             
             # Публікуємо Stories
-            story = self.client.photo_upload_to_story(
-                image_path,
-                caption=text_overlay
-            )
+            with self.sessions.api() as client:
+                story = client.photo_upload_to_story(
+                    image_path,
+                    caption=text_overlay
+                )
             
             print(f"✅ Stories опубліковано! ID: {story.id}")
             
@@ -187,7 +161,8 @@ class InstagramPublisher:
                 return None
         
         try:
-            user_info = self.client.account_info()
+            with self.sessions.api() as client:
+                user_info = client.account_info()
             return {
                 'username': user_info.username,
                 'followers': user_info.follower_count,
@@ -203,75 +178,68 @@ class InstagramPublisher:
     def get_post_insights(self, media_id):
         """Повертає статистику поста (для бізнес-акаунтів) або None при помилці."""
         try:
-            insights = self.client.insights_media_v1(media_id)
+            with self.sessions.api() as client:
+                insights = client.insights_media_v1(media_id)
             return insights
         except Exception as e:
             print(f"Помилка отримання статистики: {e}")
             return None
     
     def schedule_optimal_time(self):
-        """Повертає (is_optimal, message) для поточної години за простою евристикою таймінгу."""
-        current_hour = datetime.now().hour
-        
-        # Оптимальні години для публікації в Instagram (за українським часом)
-        optimal_hours = [8, 9, 12, 13, 17, 18, 19, 20, 21]
-        
-        if current_hour in optimal_hours:
+        """Повертає (is_optimal, message) для поточної години за київським часом (OPTIMAL_POSTING_HOURS)."""
+        if is_optimal_time():
             return True, "Зараз гарний час для публікації"
         else:
-            next_optimal = min(hour for hour in optimal_hours if hour > current_hour)
-            return False, f"Краще опублікувати о {next_optimal}:00"
+            # Після останньої оптимальної години підказуємо першу годину наступного дня
+            next_optimal = datetime.fromtimestamp(next_optimal_time(), TIMEZONE)
+            return False, f"Краще опублікувати о {next_optimal.hour}:00"
     
     def add_hashtags_to_comment(self, media_id, hashtags):
         """Додає хештеги як коментар під постом; повертає (success, comment_id|error)."""
         try:
-            comment = self.client.media_comment(media_id, hashtags)
+            with self.sessions.api() as client:
+                comment = client.media_comment(media_id, hashtags)
+            self.sessions.mark_valid()
             print("✅ Хештеги додано як коментар")
             return True, comment.id
         except Exception as e:
             print(f"❌ Помилка додавання коментаря: {e}")
             return False, str(e)
     
-    def safe_publish(self, image_path, caption, add_hashtags_as_comment=True):
-        """Публікує фото безпечно: відокремлює хештеги, чекає «гарного часу», додає хештеги коментарем."""
+    def submit_publish(self, image, caption, add_hashtags_as_comment=True):
+        """Ставить публікацію в чергу (хештеги — окремим відкладеним коментарем) і одразу повертає PublishJob."""
+        # Перевіряємо час
+        is_optimal, time_message = self.schedule_optimal_time()
+        print(f"⏰ {time_message}")
+        
+        # Розділяємо контент та хештеги
+        if add_hashtags_as_comment and '\n#' in caption:
+            parts = caption.split('\n#')
+            main_caption = parts[0]
+            hashtags = '#' + '\n#'.join(parts[1:])
+        else:
+            main_caption = caption
+            hashtags = ""
+        
+        return self.publish_queue.submit(image, main_caption, hashtags)
+    
+    def safe_publish(self, image, caption, add_hashtags_as_comment=True):
+        """Ставить фото (шлях або байти JPEG) у чергу публікацій; повертає (PublishJob | None, повідомлення) без очікування."""
         try:
-            # Переконуємось, що сесія робоча перед будь-якими діями
+            # Переконуємось, що сесія є (без запиту до API — перевірку робить фоновий SessionManager)
             if not self.ensure_logged_in():
-                return False, "Неможливо увійти в Instagram"
-            
-            # Перевіряємо час
-            is_optimal, time_message = self.schedule_optimal_time()
-            print(f"⏰ {time_message}")
-            
-            # Розділяємо контент та хештеги
-            if add_hashtags_as_comment and '\n#' in caption:
-                parts = caption.split('\n#')
-                main_caption = parts[0]
-                hashtags = '#' + '\n#'.join(parts[1:])
-            else:
-                main_caption = caption
-                hashtags = ""
-            
-            # Публікуємо основний пост
-            success, message = self.publish_photo_post(image_path, main_caption)
-            
-            if success and hashtags and add_hashtags_as_comment:
-                # Витягуємо ID медіа з повідомлення
-                media_id = message.split(": ")[-1]
-                # Додаємо хештеги як коментар через кілька секунд
-                time.sleep(random.uniform(10, 30))
-                self.add_hashtags_to_comment(media_id, hashtags)
+                return None, "Неможливо увійти в Instagram"
             
-            return success, message
+            job = self.submit_publish(image, caption, add_hashtags_as_comment)
+            return job, "Публікацію поставлено в чергу"
             
         except Exception as e:
-            return False, f"Помилка безпечної публікації: {e}"
+            return None, f"Помилка безпечної публікації: {e}"
     
     def logout(self):
-        """Завершує сесію instagrapi та скидає прапорець авторизації."""
+        """Завершує сесії instagrapi (активну і резервні) та зупиняє їх обслуговування."""
         try:
-            self.client.logout()
-            self.is_logged_in = False
+            self.sessions.logout()
             print("👋 Вихід з Instagram")
         except:
             pass
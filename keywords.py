@@ -0,0 +1,171 @@
+"""
+Єдині таблиці ключових слів і однопрохідний пошук за ними (автомат Ахо-Корасік).
+
+Ключові об'єкти/функції:
+- KEYWORD_TABLES: усі списки ключових слів, згруповані за таблицями (категорії бота/поста, фільтр «Україна», пріоритет війни).
+  Порядок категорій у таблиці — пріоритет при однаковій кількості збігів.
+- KeywordMatcher: автомат, що за один прохід по тексту рахує збіги для кожної категорії кожної таблиці
+  (семантика підрядка, як у `keyword in text.lower()`).
+- keyword_scores / classify: підрахунок збігів і вибір категорії з найбільшою кількістю збігів.
+"""
+
+import threading
+from collections import Counter, deque
+
+KEYWORD_TABLES = {
+    # Категорії SimpleInstagramBot.detect_news_category
+    'news_category': {
+        'war': [
+            'війна', 'war', 'фронт', 'front', 'бойові', 'combat', 'наступ', 'offensive',
+            'оборона', 'defense', 'обстріл', 'shelling', 'ракет', 'missile', 'дрон', 'drone',
+            'військов', 'military', 'армія', 'army', 'втрати', 'casualties', 'загиблі',
+            'поранені', 'wounded', 'танк', 'tank', 'артилерія', 'artillery',
+            'авіаудар', 'airstrike', 'окупац', 'occupation', 'звільнен', 'liberation'
+        ],
+        'politics': [
+            'політика', 'politics', 'уряд', 'government', 'президент', 'president',
+            'парламент', 'parliament', 'міністр', 'minister', 'закон', 'law',
+            'рішення', 'decision', 'санкції', 'sanctions'
+        ],
+        'world': [
+            'нато', 'nato', 'євросоюз', 'eu', 'сша', 'usa', 'росія', 'russia',
+            'міжнародн', 'international', 'дипломат', 'diplomatic'
+        ],
+    },
+    # Категорії ContentGenerator.detect_news_category (емодзі та хештеги поста)
+    'post_category': {
+        'war': ['війна', 'атака', 'військов', 'фронт', 'оборона', 'обстріл', 'ракет', 'дрон', 'окупац', 'звільнен', 'втрати', 'армія', 'сбу', 'всу'],
+        'politics': ['політика', 'уряд', 'президент', 'вибори', 'парламент', 'міністр'],
+        'economy': ['економіка', 'гроші', 'бізнес', 'ринок', 'банк', 'інвестиції', 'цена'],
+        'technology': ['технологія', 'комп\'ютер', 'інтернет', 'додаток', 'штучний інтелект'],
+        'sports': ['спорт', 'футбол', 'змагання', 'чемпіонат', 'олімпіада'],
+        'entertainment': ['фільм', 'музика', 'зірка', 'шоу', 'концерт'],
+        'health': ['здоров\'я', 'медицина', 'лікування', 'хвороба', 'вакцина'],
+        'world': ['світ', 'країна', 'міжнародний', 'мир'],
+    },
+    # NewsTranslator.filter_ukraine_related
+    'ukraine': {
+        'ukraine': [
+            'україн', 'ukraine', 'київ', 'kyiv', 'київський', 'харків', 'kharkiv',
+            'одеса', 'odesa', 'львів', 'lviv', 'дніпро', 'dnipro', 'запоріжжя',
+            'війна', 'war', 'конфлікт', 'conflict', 'росія', 'russia', 'путін', 'putin',
+            'зеленський', 'zelensky', 'нато', 'nato', 'євросоюз', 'eu', 'european union',
+            'санкції', 'sanctions', 'мобілізація', 'mobilization', 'фронт', 'front',
+            'окупац', 'occupation', 'звільнен', 'liberation', 'донбас', 'donbas',
+            'луганськ', 'luhansk', 'донецьк', 'donetsk', 'крим', 'crimea', 'херсон',
+            'миколаїв', 'refugee', 'біженц', 'гуманітар', 'humanitarian', 'обстріл',
+            'ракет', 'missile', 'дрон', 'drone', 'авіаудар', 'airstrike'
+        ],
+    },
+    # NewsTranslator.prioritize_war_news
+    'war_priority': {
+        'war': [
+            'війна', 'war', 'бойові дії', 'combat', 'фронт', 'front', 'наступ', 'offensive',
+            'оборона', 'defense', 'обстріл', 'shelling', 'ракет', 'missile', 'авіаудар',
+            'втрати', 'casualties', 'загиблі', 'killed', 'поранені', 'wounded',
+            'військов', 'military', 'армія', 'army', 'техніка', 'equipment',
+            'танк', 'tank', 'артилерія', 'artillery', 'дрон', 'drone'
+        ],
+    },
+}
+
+_shared_matcher = None
+_shared_matcher_lock = threading.Lock()
+
+
+class KeywordMatcher:
+    def __init__(self, tables=KEYWORD_TABLES):
+        """Компілює всі таблиці в один автомат (детермінований: переходи для кожного символу алфавіту)."""
+        self.tables = {table: list(categories) for table, categories in tables.items()}
+        # Кожне ключове слово → список (таблиця, категорія), до яких воно належить
+        targets = {}
+        for table, categories in tables.items():
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    entry = (table, category)
+                    bucket = targets.setdefault(keyword.lower(), [])
+                    if entry not in bucket:
+                        bucket.append(entry)
+
+        # Бор ключових слів
+        goto = [{}]
+        outputs = [[]]
+        for keyword, entries in targets.items():
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].extend(entries)
+
+        # Суфіксні посилання (BFS) + повна таблиця переходів: у циклі пошуку — один словниковий доступ на символ
+        fail = [0] * len(goto)
+        delta = [dict(transitions) for transitions in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(char, 0) if state else 0
+                queue.append(next_state)
+            for char, next_state in delta[fail[state]].items():
+                delta[state].setdefault(char, next_state)
+
+        # Зв'язані методи `get` і прапорці «є вихід» — найшвидший внутрішній цикл у чистому Python
+        self._step = [transitions.get for transitions in delta]
+        self._outputs = [tuple(entries) for entries in outputs]
+        self._has_output = [bool(entries) for entries in outputs]
+
+    def scores(self, *texts):
+        """Повертає {таблиця: {категорія: кількість збігів}} за один прохід по текстах (як по `' '.join(texts)`)."""
+        step = self._step
+        has_output = self._has_output
+        matched_states = []
+        state = 0
+        for index, text in enumerate(texts):
+            if index:
+                state = step[state](' ', 0)
+                if has_output[state]:
+                    matched_states.append(state)
+            for char in (text or '').lower():
+                state = step[state](char, 0)
+                if has_output[state]:
+                    matched_states.append(state)
+
+        result = {table: dict.fromkeys(categories, 0) for table, categories in self.tables.items()}
+        for state, count in Counter(matched_states).items():
+            for table, category in self._outputs[state]:
+                result[table][category] += count
+        return result
+
+    def classify(self, table, *texts, default=None):
+        """Повертає категорію таблиці з найбільшою кількістю збігів (за рівності — вищу в таблиці) або `default`."""
+        table_scores = self.scores(*texts)[table]
+        best_category, best_score = default, 0
+        for category, score in table_scores.items():
+            if score > best_score:
+                best_category, best_score = category, score
+        return best_category
+
+
+def get_keyword_matcher():
+    """Повертає спільний для процесу KeywordMatcher (компілюється при першому зверненні)."""
+    global _shared_matcher
+    with _shared_matcher_lock:
+        if _shared_matcher is None:
+            _shared_matcher = KeywordMatcher()
+        return _shared_matcher
+
+
+def keyword_scores(*texts):
+    """Кількість збігів за всіма таблицями для текстів (один прохід)."""
+    return get_keyword_matcher().scores(*texts)
+
+
+def classify(table, *texts, default=None):
+    """Категорія з таблиці `table` для текстів (див. KeywordMatcher.classify)."""
+    return get_keyword_matcher().classify(table, *texts, default=default)
@@ -0,0 +1,108 @@
+"""
+Клієнт OpenAI-сумісного API з кешем відповідей і обмеженням навантаження.
+
+Ключові класи/функції:
+- LLMResponseCache: відповіді на диску за хешем (модель + повідомлення + параметри) з TTL — повторна генерація
+  для тієї самої новини (наприклад, після невдалої публікації) не коштує нового запиту.
+- LLMClient: chat.completions з таймаутом, семафором одночасних запитів (OPENAI_MAX_CONCURRENCY) і кешем;
+  OPENAI_BASE_URL дозволяє спрямувати запити на локальний стаб (openai_stub_server.py).
+- parse_json_reply: дістає JSON-об'єкт з відповіді моделі (також з ```json-блоку або тексту навколо).
+"""
+
+import json
+import time
+import threading
+from openai import OpenAI
+from news_cache import JsonFileStore, content_hash
+from config import (
+    OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL, OPENAI_TIMEOUT_SECONDS, OPENAI_MAX_CONCURRENCY,
+    LLM_CACHE_FILE, LLM_CACHE_TTL_HOURS
+)
+
+
+def parse_json_reply(text):
+    """Повертає словник з JSON-відповіді моделі або None, якщо об'єкт не вдалося розібрати."""
+    if not text:
+        return None
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class LLMResponseCache(JsonFileStore):
+    timestamp_field = 'created'
+
+    def __init__(self, path=LLM_CACHE_FILE, ttl_hours=LLM_CACHE_TTL_HOURS):
+        """Завантажує кеш відповідей і відкидає записи, старші за TTL."""
+        super().__init__(path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.prune()
+
+    @staticmethod
+    def key(model, messages, **params):
+        """Ключ запису: хеш моделі, повідомлень і параметрів генерації."""
+        request = json.dumps({'model': model, 'messages': messages, 'params': params}, ensure_ascii=False, sort_keys=True)
+        return content_hash(request)
+
+    def get(self, key):
+        """Повертає збережену відповідь або None (прострочені записи ігноруються)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if not entry or entry.get('created', 0) < time.time() - self.ttl_seconds:
+                return None
+            return entry.get('text')
+
+    def add(self, key, text):
+        """Запам'ятовує відповідь моделі."""
+        with self._lock:
+            self._data[key] = {'created': time.time(), 'text': text}
+
+    def discard(self, key):
+        """Забуває відповідь (наприклад, якщо її не вдалося розібрати)."""
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class LLMClient:
+    def __init__(self, api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, model=OPENAI_MODEL,
+                 timeout=OPENAI_TIMEOUT_SECONDS, max_concurrency=OPENAI_MAX_CONCURRENCY, cache=None):
+        """Створює OpenAI-клієнт з таймаутом; `base_url` (якщо задано) — OpenAI-сумісний сервер."""
+        self.model = model
+        self.client = OpenAI(api_key=api_key, base_url=base_url or None, timeout=timeout, max_retries=1)
+        self.cache = cache if cache is not None else LLMResponseCache()
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+
+    def complete(self, messages, max_tokens=500, temperature=0.7, json_mode=False):
+        """Повертає (текст відповіді, ключ кешу); однаковий запит у межах TTL береться з кешу без мережі."""
+        params = {'max_tokens': max_tokens, 'temperature': temperature, 'json_mode': json_mode}
+        key = LLMResponseCache.key(self.model, messages, **params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, key
+
+        request = {
+            'model': self.model,
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+        }
+        if json_mode:
+            request['response_format'] = {'type': 'json_object'}
+
+        with self._slots:
+            response = self.client.chat.completions.create(**request)
+        text = (response.choices[0].message.content or '').strip()
+        if text:
+            self.cache.add(key, text)
+            self.cache.save()
+        return text, key
+
+    def forget(self, key):
+        """Прибирає відповідь з кешу (щоб наступна спроба зробила новий запит)."""
+        self.cache.discard(key)
+        self.cache.save()
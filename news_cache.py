@@ -0,0 +1,238 @@
+"""
+Постійні кеші для збору новин (зберігаються у JSON між перезапусками).
+
+Ключові класи/функції:
+- canonicalize_url / entry_key: канонічний ключ запису (посилання без трекінгу або GUID).
+- JsonFileStore: базове JSON-сховище з атомарним записом, блокуванням між потоками та очищенням записів за TTL.
+- FeedValidatorStore: валідатори RSS-фідів (ETag, Last-Modified, хеш тіла) та останні розібрані статті,
+  щоб надсилати умовні запити і не запускати feedparser для незмінних фідів; щойно перевірений фід
+  (recent_articles) віддається взагалі без запиту.
+- SeenEntryIndex: індекс уже збагачених записів (результат newspaper3k), щоб не завантажувати їх повторно.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from config import FEED_CACHE_FILE, SEEN_ENTRIES_FILE, SEEN_ENTRY_TTL_HOURS
+
+# Query-параметри, що не змінюють вміст сторінки (трекінг/реклама)
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'yclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', '_ga', '_gl', 'spm'
+}
+
+
+def content_hash(data):
+    """Повертає sha256-хеш байтів (або рядка) у hex-вигляді."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data or b'').hexdigest()
+
+
+def canonicalize_url(url, drop_params=()):
+    """Повертає канонічний URL: нижній регістр схеми/хоста, без фрагмента, трекінг-параметрів і кінцевого `/`."""
+    if not url:
+        return ''
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    
+    scheme = (parts.scheme or 'https').lower()
+    netloc = parts.netloc.lower()
+    if netloc.endswith(':80') and scheme == 'http':
+        netloc = netloc[:-3]
+    elif netloc.endswith(':443') and scheme == 'https':
+        netloc = netloc[:-4]
+    
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+    
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_')
+        and key.lower() not in TRACKING_PARAMS
+        and key.lower() not in drop_params
+    ]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(query)), ''))
+
+
+def entry_key(article):
+    """Повертає стабільний ключ RSS-запису: канонічне посилання, інакше GUID, інакше хеш заголовка."""
+    link = canonicalize_url(article.get('link', ''))
+    if link:
+        return link
+    guid = (article.get('guid') or '').strip()
+    if guid:
+        return f"guid:{guid}"
+    return f"title:{content_hash(article.get('title', ''))}"
+
+
+def _to_json(value):
+    """Перетворює datetime у JSON-сумісну форму (рекурсивно для списків/словників)."""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _from_json(value):
+    """Відновлює datetime, збережені через `_to_json`."""
+    if isinstance(value, dict):
+        if set(value) == {'__datetime__'}:
+            try:
+                return datetime.fromisoformat(value['__datetime__'])
+            except ValueError:
+                return None
+        return {key: _from_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    return value
+
+
+class JsonFileStore:
+    # Поле запису з часом (unix), за яким prune відкидає записи старші за self.ttl_seconds
+    timestamp_field = None
+
+    def __init__(self, path):
+        """Завантажує словник з JSON-файлу `path` (за відсутності файлу — порожнє сховище)."""
+        self.path = path
+        self._lock = threading.Lock()
+        # Запис файлу і os.replace — по одному (сховище зберігають з кількох потоків)
+        self._save_lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        """Читає JSON-файл сховища; пошкоджений або відсутній файл дає порожній словник."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return {}
+
+    def save(self):
+        """Атомарно записує сховище на диск (через тимчасовий файл свого потоку, записи — по черзі)."""
+        with self._save_lock:
+            # Знімок береться вже під замком запису — старіший знімок не перезапише новіший
+            with self._lock:
+                snapshot = json.dumps(self._data, ensure_ascii=False)
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Не вдалося зберегти {self.path}: {e}")
+
+    def prune(self, field=None):
+        """Видаляє записи, у яких час `field` (за замовчуванням timestamp_field) старший за TTL; повертає їх кількість."""
+        field = field or self.timestamp_field
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            stale = [key for key, entry in self._data.items() if entry.get(field, 0) < cutoff]
+            for key in stale:
+                del self._data[key]
+        return len(stale)
+
+
+class FeedValidatorStore(JsonFileStore):
+    def __init__(self, path=FEED_CACHE_FILE):
+        """Завантажує збережені валідатори фідів з `path`."""
+        super().__init__(path)
+
+    def conditional_headers(self, feed_url):
+        """Повертає заголовки If-None-Match / If-Modified-Since для фіду (лише якщо є збережені статті)."""
+        with self._lock:
+            entry = self._data.get(feed_url)
+            if not entry or entry.get('articles') is None:
+                return {}
+            headers = {}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+
+    def is_unchanged(self, feed_url, body_hash):
+        """True, якщо тіло фіду збігається з попереднім (за хешем) і для нього є збережені статті."""
+        with self._lock:
+            entry = self._data.get(feed_url)
+            return bool(entry and entry.get('articles') is not None and entry.get('body_hash') == body_hash)
+
+    def cached_articles(self, feed_url):
+        """Повертає копії статей, розібраних з останньої версії фіду (або None)."""
+        with self._lock:
+            entry = self._data.get(feed_url)
+            if not entry or entry.get('articles') is None:
+                return None
+            return [dict(article) for article in entry['articles']]
+
+    def recent_articles(self, feed_url, max_age_seconds):
+        """Повертає копії статей, якщо фід успішно перевіряли не раніше ніж `max_age_seconds` тому (інакше None)."""
+        with self._lock:
+            entry = self._data.get(feed_url)
+            if not entry or entry.get('articles') is None or entry.get('checked_at', 0) < time.time() - max_age_seconds:
+                return None
+            return [dict(article) for article in entry['articles']]
+
+    def update(self, feed_url, etag=None, last_modified=None, body_hash=None, articles=None):
+        """Оновлює валідатори і час останньої перевірки фіду; `articles=None` залишає попередньо збережені статті."""
+        with self._lock:
+            entry = self._data.setdefault(feed_url, {})
+            entry['checked_at'] = time.time()
+            if etag:
+                entry['etag'] = etag
+            if last_modified:
+                entry['last_modified'] = last_modified
+            if body_hash:
+                entry['body_hash'] = body_hash
+            if articles is not None:
+                entry['articles'] = [dict(article) for article in articles]
+        self.save()
+
+    def forget(self, feed_url):
+        """Видаляє валідатори і статті фіду — наступний запит до нього буде безумовним."""
+        with self._lock:
+            removed = self._data.pop(feed_url, None)
+        if removed is not None:
+            self.save()
+
+
+class SeenEntryIndex(JsonFileStore):
+    timestamp_field = 'seen_at'
+
+    def __init__(self, path=SEEN_ENTRIES_FILE, ttl_hours=SEEN_ENTRY_TTL_HOURS):
+        """Завантажує індекс збагачених записів і відкидає ті, що старші за `ttl_hours`."""
+        super().__init__(path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.prune()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get(self, key):
+        """Повертає збережений результат збагачення (копію) для ключа або None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if not entry:
+                return None
+            return _from_json(entry.get('content'))
+
+    def add(self, key, content):
+        """Запам'ятовує результат збагачення `content` (словник get_article_content) для ключа."""
+        with self._lock:
+            self._data[key] = {'seen_at': time.time(), 'content': _to_json(content)}
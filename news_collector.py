@@ -2,46 +2,106 @@
 Збірник новин із RSS-джерел та сторінок статей.
 
 Ключові методи:
-- fetch_rss_news: завантажує RSS і формує початковий список статей.
+- fetch_rss_news: завантажує RSS і формує початковий список статей (фід, перевірений у межах SHARED_CYCLE_SECONDS, — без запиту).
+- start_cycle: починає цикл збору (скидає кеш сторінок), якщо попередній почався раніше за SHARED_CYCLE_SECONDS.
 - extract_image_from_entry: шукає URL головного зображення в RSS entry.
 - estimate_image_quality_from_url: евристика оцінки якості за URL.
-- get_article_content: тягне повний контент сторінки через newspaper3k (за можливості).
-- collect_fresh_news: збирає та збагачує статті з усіх джерел.
-- filter_recent_news: фільтрує за часом та сортує за релевантністю.
+- get_article_content: тягне повний контент сторінки через newspaper3k (сторінка і розбір — зі спільного PageCache).
+- fetch_all_sources: паралельно завантажує всі RSS-джерела в межах бюджету часу на цикл.
+- dedupe_articles: прибирає повтори одного посилання/GUID між фідами до будь-яких мережевих запитів.
+- enrich_articles: паралельно збагачує статті повним контентом з лімітом одночасних запитів на хост
+  (записи, збагачені в попередніх циклах, беруться з індексу SeenEntryIndex без завантаження).
+- iter_enriched: ледача стадія збагачення — обмежене вікно паралельних завантажень, результат у порядку входу.
+- group_cycle_stories: групує записи циклу в історії (версії однієї події з різних фідів, story_index.group_stories).
+- iter_fresh_news: ледачий конвеєр RSS → історії циклу → фільтр (опубліковане, повтори історій акаунта) → збагачення
+  → перевірка свіжості (зупиняється разом зі споживачем); з історії завантажується лише перша версія, наступна —
+  тільки якщо попередню відкинуто.
+- collect_fresh_news: збирає та збагачує статті з усіх джерел (по одній версії кожної історії).
+- is_recent / filter_recent_news: фільтрують за часом; filter_recent_news ще й сортує за релевантністю.
 - get_random_news: повертає випадкову свіжу новину як fallback.
 """
 
-import requests
 import feedparser
 from bs4 import BeautifulSoup
 import newspaper
 from newspaper import Article
 import random
 import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from config import NEWS_SOURCES
+from urllib.parse import urlparse
+from http_client import http_get
+from page_cache import get_page_cache
+from news_cache import FeedValidatorStore, SeenEntryIndex, content_hash, entry_key
+from story_index import StoryStream, group_stories
+from config import (
+    NEWS_SOURCES, RSS_FETCH_WORKERS, RSS_CYCLE_BUDGET_SECONDS, SHARED_CYCLE_SECONDS,
+    ENRICH_WORKERS, ENRICH_PER_HOST_LIMIT, ARTICLE_TIMEOUT_SECONDS
+)
 
 class NewsCollector:
     def __init__(self):
         """Зберігає конфігураційний список RSS-джерел і буфер зібраних статей."""
         self.sources = NEWS_SOURCES
         self.collected_articles = []
+        # Семафори «одночасних завантажень на хост» для стадії збагачення
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        # Валідатори фідів для умовних запитів (ETag/Last-Modified/хеш тіла)
+        self.feed_cache = FeedValidatorStore()
+        # Індекс записів, уже збагачених у попередніх циклах
+        self.seen_index = SeenEntryIndex()
+        # Спільний з ботом кеш сторінок: кожна стаття завантажується і розбирається один раз за цикл
+        self.page_cache = get_page_cache()
+        # Початок поточного циклу збору (цикли в межах SHARED_CYCLE_SECONDS вважаються одним)
+        self._cycle_started = 0
+    
+    def start_cycle(self):
+        """Починає новий цикл збору; цикл одразу після попереднього (інший акаунт) продовжує його з тими самими кешами."""
+        now = time.time()
+        if now - self._cycle_started < SHARED_CYCLE_SECONDS:
+            return
+        self._cycle_started = now
+        self.page_cache.start_cycle()
     
     def fetch_rss_news(self, rss_url):
-        """Повертає список статей з RSS-каналу з базовими полями та можливим `rss_image`."""
+        """Повертає список статей з RSS-каналу; для незмінного фіду (304/той самий хеш) — збережені статті без парсингу."""
         try:
-            # Покращені headers для обходу блокування
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'application/rss+xml, application/xml, text/xml, */*',
-                'Accept-Language': 'uk-UA,uk;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive'
-            }
+            # Фід щойно перевіряв попередній цикл (наприклад, для іншого акаунта) — без запиту
+            recent = self.feed_cache.recent_articles(rss_url, SHARED_CYCLE_SECONDS)
+            if recent is not None:
+                print(f"RSS {rss_url} перевірено менш ніж {SHARED_CYCLE_SECONDS} с тому, використовую збережені статті")
+                return recent
+            
+            # Умовний запит: сервер відповість 304, якщо фід не змінився
+            headers = self.feed_cache.conditional_headers(rss_url)
+            
+            # Запит через спільний пул з'єднань (єдині заголовки профілю 'rss')
+            response = http_get(rss_url, kind='rss', headers=headers, timeout=20)
+            
+            if response.status_code == 304:
+                cached = self.feed_cache.cached_articles(rss_url)
+                if cached is not None:
+                    print(f"RSS {rss_url} не змінився (304), використовую збережені статті")
+                    self.feed_cache.update(rss_url)
+                    return cached
+                # 304 без збережених статей (валідатори застаріли) — забуваємо їх і повторюємо запит один раз безумовно
+                print(f"RSS {rss_url}: 304 без збережених статей, повторюю запит без валідаторів")
+                self.feed_cache.forget(rss_url)
+                response = http_get(rss_url, kind='rss', timeout=20)
+            
+            body_hash = content_hash(response.content)
+            if response.status_code == 200 and self.feed_cache.is_unchanged(rss_url, body_hash):
+                print(f"RSS {rss_url} не змінився (той самий вміст), пропускаю парсинг")
+                self.feed_cache.update(
+                    rss_url,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+                return self.feed_cache.cached_articles(rss_url)
             
-            # Робимо запит з headers
-            response = requests.get(rss_url, headers=headers, timeout=20)
             feed = feedparser.parse(response.content)
             articles = []
             
@@ -49,6 +109,7 @@ class NewsCollector:
                 article_data = {
                     'title': getattr(entry, 'title', 'Без заголовка'),
                     'link': getattr(entry, 'link', ''),
+                    'guid': entry.get('id', ''),
                     'published': entry.get('published', ''),
                     'summary': entry.get('summary', ''),
                     'description': entry.get('description', entry.get('summary', '')),
@@ -58,6 +119,15 @@ class NewsCollector:
                 }
                 articles.append(article_data)
             
+            if response.status_code == 200:
+                self.feed_cache.update(
+                    rss_url,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                    body_hash=body_hash,
+                    articles=articles
+                )
+            
             return articles
         except Exception as e:
             print(f"Помилка при зборі з RSS {rss_url}: {e}")
@@ -186,30 +256,8 @@ class NewsCollector:
     def get_article_content(self, url):
         """Повертає повний контент статті через newspaper3k (title/text/publish_date/top_image/images)."""
         try:
-            # Налаштовуємо Article з User-Agent для обходу блокування
-            article = Article(url)
-            
-            # Додаємо headers для обходу 403 помилок
-            article.set_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'uk-UA,uk;q=0.8,en-US;q=0.5,en;q=0.3',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            })
-            
-            article.download()
-            article.parse()
-            
-            return {
-                'title': article.title,
-                'text': article.text,
-                'authors': article.authors,
-                'publish_date': article.publish_date,
-                'top_image': article.top_image,
-                'images': list(article.images)
-            }
+            content = self.page_cache.parsed(url, 'article', lambda: self._parse_article(url))
+            return dict(content) if content else None
         except Exception as e:
             # Логуємо помилку але не виводимо в консоль для чистоти логів
             # print(f"Помилка при парсингу статті {url}: {e}")
@@ -217,50 +265,189 @@ class NewsCollector:
             # Повертаємо None щоб пропустити неробочі статті
             return None
     
-    def collect_fresh_news(self):
-        """Збирає новини з усіх джерел, збагачує повним контентом (де можливо) та повертає список."""
-        all_news = []
+    def _parse_article(self, url):
+        """Розбирає сторінку newspaper3k; HTML береться з кешу сторінок або качається спільним транспортом."""
+        # Обмежуємо кількість одночасних завантажень з одного хоста
+        html = self.page_cache.fetch(url, timeout=ARTICLE_TIMEOUT_SECONDS, slot=self._host_slot(url))
+        if html is None:
+            return None
+        
+        article = Article(url, request_timeout=ARTICLE_TIMEOUT_SECONDS)
+        article.download(input_html=html)
+        article.parse()
         
-        for source in self.sources:
-            print(f"Збираю новини з {source}")
-            rss_articles = self.fetch_rss_news(source)
+        return {
+            'title': article.title,
+            'text': article.text,
+            'authors': article.authors,
+            'publish_date': article.publish_date,
+            'top_image': article.top_image,
+            'images': list(article.images)
+        }
+    
+    def fetch_all_sources(self):
+        """Паралельно завантажує всі RSS-джерела; повертає статті у порядку `self.sources` (в межах бюджету часу)."""
+        if not self.sources:
+            return []
+        
+        workers = max(1, min(RSS_FETCH_WORKERS, len(self.sources)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rss')
+        try:
+            # dict зберігає порядок подання — саме він і визначає порядок злиття
+            futures = {}
+            for source in self.sources:
+                print(f"Збираю новини з {source}")
+                futures[executor.submit(self.fetch_rss_news, source)] = source
             
-            for article in rss_articles:
-                # Отримуємо повний контент
-                full_content = self.get_article_content(article['link'])
-                if full_content and full_content.get('title') != 'Новина з RSS':
-                    article.update(full_content)
-                    all_news.append(article)
-                elif not full_content:
-                    # Якщо повний контент недоступний, використовуємо RSS дані
-                    if (article.get('title') and len(article.get('title', '')) > 20 and
-                        article.get('description') and len(article.get('description', '')) > 50):
-                        all_news.append(article)
+            done, not_done = wait(futures, timeout=RSS_CYCLE_BUDGET_SECONDS)
+            for future in not_done:
+                future.cancel()
+                print(f"Джерело {futures[future]} не вклалося в бюджет {RSS_CYCLE_BUDGET_SECONDS} с, пропускаю")
             
-            time.sleep(1)  # Пауза між запитами
+            all_articles = []
+            for future, source in futures.items():
+                if future in done:
+                    all_articles.extend(future.result())
+            return all_articles
+        finally:
+            # Не чекаємо «завислих» запитів: вони завершаться по власному таймауту
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _host_slot(self, url):
+        """Повертає семафор, що обмежує одночасні завантаження з хоста `url` до ENRICH_PER_HOST_LIMIT."""
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(max(1, ENRICH_PER_HOST_LIMIT))
+                self._host_slots[host] = slot
+            return slot
+    
+    def dedupe_articles(self, articles):
+        """Повертає статті без повторів за канонічним посиланням/GUID (перше входження виграє)."""
+        unique = []
+        seen_keys = set()
+        for article in articles:
+            key = entry_key(article)
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            unique.append(article)
+        return unique
+    
+    def enrich_article(self, article):
+        """Збагачує RSS-статтю повним контентом; повертає статтю або None, якщо вона непридатна."""
+        key = entry_key(article)
+        full_content = self.seen_index.get(key)
+        if full_content is None:
+            full_content = self.get_article_content(article['link'])
+            # Запам'ятовуємо лише успішні завантаження: мережеві збої повторимо в наступному циклі
+            if full_content:
+                self.seen_index.add(key, full_content)
+        
+        if full_content and full_content.get('title') != 'Новина з RSS':
+            article.update(full_content)
+            return article
+        elif not full_content:
+            # Якщо повний контент недоступний, використовуємо RSS дані
+            if (article.get('title') and len(article.get('title', '')) > 20 and
+                article.get('description') and len(article.get('description', '')) > 50):
+                return article
+        return None
+    
+    def iter_enriched(self, articles, rejected=None):
+        """Ледаче збагачення: тримає не більше ENRICH_WORKERS завантажень наперед і віддає придатні статті по порядку."""
+        articles = iter(articles)
+        executor = ThreadPoolExecutor(max_workers=max(1, ENRICH_WORKERS), thread_name_prefix='enrich')
+        pending = deque()
+        try:
+            while True:
+                # Доповнюємо вікно попереднього завантаження (StoryStream може знову дати запис після reject)
+                while len(pending) < max(1, ENRICH_WORKERS):
+                    article = next(articles, None)
+                    if article is None:
+                        break
+                    pending.append((article, executor.submit(self.enrich_article, article)))
+                if not pending:
+                    break
+                
+                article, future = pending.popleft()
+                enriched = future.result()
+                if enriched is not None:
+                    yield enriched
+                elif rejected:
+                    rejected(article)
+        finally:
+            # Споживач зупинився — скасовуємо ще не розпочаті завантаження
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.seen_index.prune()
+            self.seen_index.save()
+    
+    def enrich_articles(self, articles):
+        """Паралельно збагачує статті (ENRICH_WORKERS потоків) і повертає придатні у вихідному порядку."""
+        if not articles:
+            return []
+        
+        new_count = sum(1 for article in articles if entry_key(article) not in self.seen_index)
+        print(f"Збагачення: {new_count} нових записів, {len(articles) - new_count} з індексу")
+        
+        return list(self.iter_enriched(articles))
+    
+    def group_cycle_stories(self):
+        """Завантажує фіди циклу і повертає історії — списки версій однієї події (підписи рахуються до збагачення)."""
+        rss_articles = self.dedupe_articles(self.fetch_all_sources())
+        stories = group_stories(rss_articles)
+        repeats = len(rss_articles) - len(stories)
+        if repeats:
+            print(f"Історії циклу: {len(stories)} з {len(rss_articles)} записів ({repeats} повторів відкладено)")
+        return stories
+    
+    def iter_fresh_news(self, entry_filter=None, hours_ago=6):
+        """Генератор свіжих збагачених статей у порядку фідів; `entry_filter` відсіює RSS-записи ще до завантаження сторінок."""
+        self.start_cycle()
+        stream = StoryStream(self.group_cycle_stories(), entry_filter)
+        
+        cutoff_time = datetime.now() - timedelta(hours=hours_ago)
+        enriched = self.iter_enriched(stream, rejected=stream.reject)
+        try:
+            for article in enriched:
+                if self.is_recent(article, cutoff_time):
+                    yield article
+                # Споживач попросив наступну статтю (або стаття застаріла) — черга за іншою версією історії
+                stream.reject(article)
+        finally:
+            enriched.close()
+    
+    def collect_fresh_news(self):
+        """Збирає новини з усіх джерел, збагачує повним контентом (де можливо) та повертає список."""
+        self.start_cycle()
+        # Непридатна перша версія історії (немає сторінки) поступається місцем наступній
+        stream = StoryStream(self.group_cycle_stories())
+        all_news = list(self.iter_enriched(stream, rejected=stream.reject))
         
         # Фільтруємо та сортуємо за актуальністю
         fresh_news = self.filter_recent_news(all_news)
         return fresh_news
     
+    def is_recent(self, article, cutoff_time):
+        """True, якщо стаття опублікована після `cutoff_time` (або дата невідома); рядкові дати не приймаються."""
+        try:
+            if article.get('publish_date'):
+                if isinstance(article['publish_date'], str):
+                    # Якщо дата в строковому форматі, спробуємо парсити
+                    return False
+                return article['publish_date'] > cutoff_time
+            # Якщо немає дати, вважаємо новину свіжою
+            return True
+        except:
+            return True
+    
     def filter_recent_news(self, articles, hours_ago=6):
         """Повертає лише статті, опубліковані за останні `hours_ago` годин; сортує за довжиною тексту."""
         cutoff_time = datetime.now() - timedelta(hours=hours_ago)
-        recent_articles = []
-        
-        for article in articles:
-            try:
-                if article.get('publish_date'):
-                    if isinstance(article['publish_date'], str):
-                        # Якщо дата в строковому форматі, спробуємо парсити
-                        continue
-                    elif article['publish_date'] > cutoff_time:
-                        recent_articles.append(article)
-                else:
-                    # Якщо немає дати, вважаємо новину свіжою
-                    recent_articles.append(article)
-            except:
-                recent_articles.append(article)
+        recent_articles = [article for article in articles if self.is_recent(article, cutoff_time)]
         
         # Сортуємо за релевантністю (можна додати більше критеріїв)
         return sorted(recent_articles, key=lambda x: len(x.get('text', '')), reverse=True)
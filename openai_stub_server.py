@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Локальний стаб OpenAI-сумісного API (chat.completions) для ручних тестів генерації постів.
+
+Запуск:
+    python openai_stub_server.py --port 8001
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python test_post.py
+
+POST /v1/chat/completions повертає детерміновану відповідь: для запиту з response_format=json_object —
+JSON {"description": ..., "hashtags": [...]}, інакше — звичайний текст. У консоль пишеться кожен запит,
+тож видно, що на пост іде один запит, а повтор береться з кешу бота.
+"""
+
+import json
+import time
+from stub_server import JsonStubHandler, run_stub
+
+
+class StubChatHandler(JsonStubHandler):
+    def do_POST(self):
+        """POST /v1/chat/completions — детермінована відповідь у форматі OpenAI."""
+        if self.path.rstrip('/') not in ('/v1/chat/completions', '/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+        payload = self._read_json({'error': {'message': 'Invalid JSON'}})
+        if payload is None:
+            return
+
+        messages = payload.get('messages') or [{}]
+        prompt = messages[-1].get('content', '')
+        json_mode = (payload.get('response_format') or {}).get('type') == 'json_object'
+        if json_mode:
+            content = json.dumps({
+                'description': f"🔥 Тестовий опис поста ({len(prompt)} символів промпту).\n\nДругий абзац 📰",
+                'hashtags': ['#новини', '#україна', '#тест', '#актуально', '#важливо'],
+            }, ensure_ascii=False)
+        else:
+            content = f"Тестова відповідь стаба ({len(prompt)} символів промпту)"
+
+        served = self.server.count_request()
+        print(f"Запит #{served}: модель {payload.get('model')}, json_mode={json_mode}")
+
+        self._send_json(200, {
+            'id': f"chatcmpl-stub-{served}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+
+def main():
+    run_stub(StubChatHandler, 'Стаб OpenAI-сумісного API', 8001, '/v1')
+
+
+if __name__ == "__main__":
+    main()
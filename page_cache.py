@@ -0,0 +1,153 @@
+"""
+Спільний кеш сторінок статей на один цикл збору.
+
+Ключові класи/функції:
+- PageCache: HTML сторінок за канонічним URL (один запит на сторінку, навіть якщо її одночасно просять кілька стадій)
+  + мемоізовані результати розбору (текст/top_image/зображення newspaper3k, головні зображення з `<head>`).
+  За наявності PAGE_CACHE_DIR сторінки зберігаються на диску стиснутими (zlib) і живуть PAGE_CACHE_TTL_HOURS.
+- get_page_cache: спільний екземпляр кешу для всього процесу.
+"""
+
+import os
+import time
+import zlib
+import threading
+import weakref
+from contextlib import nullcontext
+from http_client import http_get
+from news_cache import canonicalize_url, content_hash
+from page_parser import decode_html
+from config import PAGE_CACHE_DIR, PAGE_CACHE_TTL_HOURS
+
+_MISSING = object()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+class PageCache:
+    def __init__(self, directory=PAGE_CACHE_DIR, ttl_hours=PAGE_CACHE_TTL_HOURS):
+        """Створює кеш; порожній `directory` вимикає збереження на диск."""
+        self.directory = directory
+        self.ttl_seconds = ttl_hours * 3600
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._parsed = {}
+        # Окреме блокування на ключ: паралельні запити однієї сторінки чекають перше завантаження.
+        # Слабкі посилання: блокування живе, доки його хтось тримає, і зникає саме — чистити вручну не треба
+        self._key_locks = weakref.WeakValueDictionary()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def start_cycle(self):
+        """Починає новий цикл: забуває сторінки та результати розбору в пам'яті і прибирає прострочені файли."""
+        # Блокування ключів не скидаємо: потік, що зараз завантажує сторінку, і ті, хто на неї чекає, мають ділити одне
+        with self._lock:
+            self._pages.clear()
+            self._parsed.clear()
+        self._prune_disk()
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = threading.RLock()
+                self._key_locks[key] = lock
+            return lock
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, f"{content_hash(key)}.html.z")
+
+    def _prune_disk(self):
+        if not self.directory:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                continue
+
+    def get(self, url):
+        """Повертає HTML сторінки з пам'яті або диска (None, якщо її ще не завантажували)."""
+        key = canonicalize_url(url)
+        with self._lock:
+            html = self._pages.get(key)
+        if html is not None or not self.directory:
+            return html
+
+        path = self._disk_path(key)
+        try:
+            if os.path.getmtime(path) < time.time() - self.ttl_seconds:
+                return None
+            with open(path, 'rb') as f:
+                html = zlib.decompress(f.read()).decode('utf-8')
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return None
+        with self._lock:
+            self._pages[key] = html
+        return html
+
+    def put(self, url, html):
+        """Запам'ятовує HTML сторінки (і стиснуту копію на диску, якщо це ввімкнено)."""
+        key = canonicalize_url(url)
+        if not key or html is None:
+            return
+        with self._lock:
+            self._pages[key] = html
+        if not self.directory:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(html.encode('utf-8'), 6))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Не вдалося зберегти сторінку в кеш: {e}")
+
+    def fetch(self, url, timeout=15, slot=None):
+        """Повертає HTML сторінки, завантажуючи її лише за відсутності в кеші; `slot` обмежує одночасні запити."""
+        key = canonicalize_url(url)
+        with self._key_lock(key):
+            html = self.get(url)
+            if html is not None:
+                return html
+
+            with slot or nullcontext():
+                response = http_get(url, kind='html', timeout=timeout)
+            if response.status_code != 200:
+                return None
+            html = decode_html(response, response.content)
+            self.put(url, html)
+            return html
+
+    def parsed(self, url, name, parse):
+        """Повертає мемоізований результат `parse()` для сторінки (`name` — вид розбору); винятки не кешуються."""
+        key = (canonicalize_url(url), name)
+        with self._key_lock(key):
+            with self._lock:
+                value = self._parsed.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            value = parse()
+            with self._lock:
+                self._parsed[key] = value
+            return value
+
+
+def get_page_cache():
+    """Повертає спільний для процесу PageCache (створюється при першому зверненні)."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = PageCache()
+        return _shared_cache
@@ -0,0 +1,120 @@
+"""
+Швидкий розбір сторінок статей без побудови повного DOM.
+
+Ключові функції:
+- read_head: потоково читає відповідь лише до кінця `<head>` (з обмеженням розміру).
+- head_section: вирізає `<head>` з уже завантаженої сторінки.
+- decode_html: декодує байти сторінки за charset із Content-Type.
+- extract_head_images: дістає головні зображення з `<head>`: og:image, twitter:image, link[rel=image_src] та `image` з JSON-LD.
+"""
+
+import re
+import json
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+# Більше за цей обсяг `<head>` не читаємо — далі вже повний розбір сторінки
+HEAD_LIMIT_BYTES = 256 * 1024
+CHUNK_SIZE = 16 * 1024
+
+_HEAD_END = re.compile(rb'</head\s*>|<body[\s>]', re.IGNORECASE)
+_HEAD_END_TEXT = re.compile(r'</head\s*>|<body[\s>]', re.IGNORECASE)
+_CHARSET = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Порядок важливий: перші — найнадійніші джерела головного фото
+HERO_META = [
+    ('property', 'og:image:secure_url'),
+    ('property', 'og:image'),
+    ('property', 'og:image:url'),
+    ('name', 'twitter:image'),
+    ('name', 'twitter:image:src'),
+    ('property', 'twitter:image'),
+]
+
+
+def read_head(response):
+    """Повертає (head_bytes, head_complete, chunks): байти до кінця `<head>` і ітератор решти тіла."""
+    buffer = bytearray()
+    chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+    for chunk in chunks:
+        # Шукаємо кінець head з невеликим перекриттям, щоб не пропустити тег на межі блоків
+        search_from = max(0, len(buffer) - 16)
+        buffer.extend(chunk)
+        match = _HEAD_END.search(buffer, search_from)
+        if match:
+            return bytes(buffer), True, chunks
+        if len(buffer) >= HEAD_LIMIT_BYTES:
+            break
+    return bytes(buffer), False, chunks
+
+
+def head_section(html):
+    """Повертає частину HTML-рядка до кінця `<head>` (або перші HEAD_LIMIT_BYTES символів)."""
+    match = _HEAD_END_TEXT.search(html, 0, HEAD_LIMIT_BYTES)
+    return html[:match.end()] if match else html[:HEAD_LIMIT_BYTES]
+
+
+def decode_html(response, data):
+    """Декодує байти сторінки за charset із Content-Type (за замовчуванням — UTF-8)."""
+    match = _CHARSET.search(response.headers.get('Content-Type', ''))
+    encoding = match.group(1) if match else 'utf-8'
+    try:
+        return data.decode(encoding, errors='replace')
+    except LookupError:
+        return data.decode('utf-8', errors='replace')
+
+
+def _json_ld_images(data):
+    """Рекурсивно збирає значення `image` (рядок, список, об'єкт з `url`) з JSON-LD."""
+    images = []
+    if isinstance(data, list):
+        for item in data:
+            images.extend(_json_ld_images(item))
+    elif isinstance(data, dict):
+        value = data.get('image') or data.get('thumbnailUrl')
+        if isinstance(value, str):
+            images.append(value)
+        elif isinstance(value, dict) and value.get('url'):
+            images.append(value['url'])
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, str):
+                    images.append(item)
+                elif isinstance(item, dict) and item.get('url'):
+                    images.append(item['url'])
+        if '@graph' in data:
+            images.extend(_json_ld_images(data['@graph']))
+    return images
+
+
+def extract_head_images(head_html, base_url):
+    """Повертає унікальні абсолютні URL головних зображень з `<head>` у порядку надійності."""
+    soup = BeautifulSoup(head_html, 'html.parser')
+    found = []
+
+    for attr, name in HERO_META:
+        for tag in soup.find_all('meta', attrs={attr: name}):
+            if tag.get('content'):
+                found.append(tag['content'])
+
+    for tag in soup.find_all('link', rel='image_src'):
+        if tag.get('href'):
+            found.append(tag['href'])
+
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            found.extend(_json_ld_images(json.loads(script.string or '')))
+        except (ValueError, TypeError):
+            continue
+
+    images = []
+    for url in found:
+        url = url.strip()
+        if not url:
+            continue
+        if url.startswith('//'):
+            url = 'https:' + url
+        url = urljoin(base_url, url)
+        if url not in images:
+            images.append(url)
+    return images
@@ -0,0 +1,108 @@
+"""
+Фонова підготовка наступного поста під час паузи між публікаціями.
+
+Ключові методи PostPrefetcher:
+- start: запускає потік, який за PREFETCH_LEAD_MINUTES до публікації збирає готовий пакет
+  (стаття, підготовлене фото в пам'яті, підпис) і кожні PREFETCH_REFRESH_MINUTES перевіряє, чи не з'явилась свіжіша новина;
+  повторний виклик з іншим часом лише переносить підготовку — вже зібраний пакет лишається.
+- take: у момент публікації зупиняє потік (чекає завершення поточної збірки) і віддає пакет, якщо він ще придатний.
+- stop: зупиняє потік і прибирає непотрібний пакет.
+"""
+
+import time
+import logging
+import threading
+from posted_store import article_id as stable_article_id
+from config import PREFETCH_LEAD_MINUTES, PREFETCH_REFRESH_MINUTES
+
+
+class PostPrefetcher:
+    def __init__(self, bot, lead_minutes=PREFETCH_LEAD_MINUTES, refresh_minutes=PREFETCH_REFRESH_MINUTES):
+        """Прив'язує префетчер до бота (використовуються його prepare_post / find_news_with_image)."""
+        self.bot = bot
+        self.lead_seconds = lead_minutes * 60
+        self.refresh_seconds = max(60, refresh_minutes * 60)
+        self._package = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._publish_at = None
+
+    def start(self, publish_at):
+        """Запускає (або переносить на новий `publish_at`, unix-час) фонову підготовку поста; готовий пакет зберігається."""
+        if self._thread and self._thread.is_alive() and self._publish_at == publish_at:
+            return
+        package = self._halt()
+        with self._lock:
+            self._package = package
+        self._publish_at = publish_at
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(publish_at,), name='prefetch', daemon=True)
+        self._thread.start()
+
+    def _run(self, publish_at):
+        # Чекаємо початку вікна підготовки (або сигналу зупинки)
+        if self._stop.wait(max(0, publish_at - self.lead_seconds - time.time())):
+            return
+        logging.info("🧺 Починаю заздалегідь готувати наступний пост...")
+        while not self._stop.is_set():
+            self._refresh()
+            if self._stop.wait(self.refresh_seconds):
+                break
+
+    def _refresh(self):
+        """Збирає пакет; якщо пакет уже є — перебудовує його лише коли найкращою стала інша (свіжіша) новина."""
+        try:
+            news_data = self.bot.find_news_with_image()
+            if not news_data:
+                return
+
+            with self._lock:
+                current = self._package
+            if current and current['article_id'] == stable_article_id(news_data['article']):
+                logging.info("🧺 Підготовлений пост актуальний, свіжіших новин немає")
+                return
+
+            package = self.bot.prepare_post(news_data)
+            if not package:
+                return
+            with self._lock:
+                previous, self._package = self._package, package
+            if previous:
+                logging.info("🔄 З'явилась свіжіша новина — підготовлений пост оновлено")
+                self.bot.discard_prepared_post(previous)
+            else:
+                logging.info(f"🧺 Наступний пост готовий: {package['article'].get('title', '')[:60]}")
+        except Exception as e:
+            logging.warning(f"⚠️ Помилка фонової підготовки поста: {e}")
+
+    def _halt(self):
+        """Зупиняє фоновий потік і забирає пакет (якщо збірка саме триває — чекає її завершення)."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            package, self._package = self._package, None
+        return package
+
+    def take(self):
+        """Зупиняє підготовку і повертає готовий пакет (або None — тоді пост збирається як зазвичай)."""
+        # Дочекатися поточної збірки швидше, ніж починати все з нуля
+        package = self._halt()
+        if not package:
+            return None
+        if (package['article_id'] in self.bot.posted_articles or not package.get('image_data') or
+                self.bot.published_images.is_duplicate(package.get('image_hash'))):
+            self.bot.discard_prepared_post(package)
+            return None
+
+        age_minutes = (time.time() - package['prepared_at']) / 60
+        logging.info(f"🧺 Використовую підготовлений заздалегідь пост (зібрано {age_minutes:.0f} хв тому)")
+        return package
+
+    def stop(self):
+        """Зупиняє фоновий потік і прибирає непотрібний пакет."""
+        package = self._halt()
+        if package:
+            self.bot.discard_prepared_post(package)
@@ -0,0 +1,130 @@
+"""
+Сховище вже опублікованих статей (SQLite у режимі WAL).
+
+Ключові функції/класи:
+- article_id: стабільний ідентифікатор статті (sha256 канонічного посилання/GUID) — однаковий після перезапуску,
+  на відміну від вбудованого `hash()` з рандомізацією.
+- PostedArticlesStore: перевірка членства за індексом, вставки без перезапису файлу, час публікації для кожного запису,
+  перцептивні хеші опублікованих фото (для image_hash.PublishedImageIndex), очищення за TTL
+  та одноразова міграція старого `posted_articles.json`.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from news_cache import content_hash, entry_key
+from config import POSTED_DB_FILE, POSTED_ARTICLES_JSON, POSTED_TTL_DAYS
+
+
+def article_id(article):
+    """Повертає стабільний ідентифікатор статті (не залежить від процесу та від заголовка з парсера)."""
+    return content_hash(entry_key(article))
+
+
+class PostedArticlesStore:
+    def __init__(self, path=POSTED_DB_FILE, legacy_json=POSTED_ARTICLES_JSON, ttl_days=POSTED_TTL_DAYS):
+        """Відкриває (або створює) базу, мігрує старий JSON при першому запуску і прибирає прострочені записи."""
+        self.path = path
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self._lock = threading.Lock()
+        # Автокоміт: кожна вставка — окрема коротка транзакція в WAL
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS posted ("
+            " article_id TEXT PRIMARY KEY,"
+            " posted_at REAL NOT NULL,"
+            " title TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS posted_at_idx ON posted (posted_at)")
+        # 64-бітні dHash опублікованих фото (hex-рядок: INTEGER у SQLite — знаковий)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS posted_images ("
+            " article_id TEXT PRIMARY KEY,"
+            " image_hash TEXT NOT NULL,"
+            " posted_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._migrate_legacy_json(legacy_json)
+        self.prune()
+
+    def _migrate_legacy_json(self, legacy_json):
+        """Одноразово переносить ідентифікатори зі старого JSON-файлу (час — дата зміни файлу)."""
+        if not legacy_json or not os.path.exists(legacy_json):
+            return
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_json_migrated'").fetchone()
+            if done:
+                return
+            try:
+                with open(legacy_json, 'r', encoding='utf-8') as f:
+                    legacy_ids = json.load(f)
+                posted_at = os.path.getmtime(legacy_json)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Не вдалося прочитати {legacy_json} для міграції: {e}")
+                return
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO posted (article_id, posted_at, title) VALUES (?, ?, NULL)",
+                    [(str(legacy), posted_at) for legacy in legacy_ids]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_json_migrated', ?)",
+                    (str(time.time()),)
+                )
+        print(f"Мігровано {len(legacy_ids)} записів з {legacy_json} у {self.path}")
+
+    def __contains__(self, article_id):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM posted WHERE article_id = ?", (article_id,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM posted").fetchone()[0]
+
+    def add(self, article_id, title=None, image_hash=None):
+        """Додає (або оновлює час) запису про публікацію; `image_hash` — dHash опублікованого фото (int)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO posted (article_id, posted_at, title) VALUES (?, ?, ?)",
+                (article_id, now, title)
+            )
+            if image_hash is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO posted_images (article_id, image_hash, posted_at) VALUES (?, ?, ?)",
+                    (article_id, f"{image_hash:016x}", now)
+                )
+
+    def discard(self, article_id):
+        """Видаляє запис (наприклад, якщо публікація не вдалася)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM posted WHERE article_id = ?", (article_id,))
+            self._conn.execute("DELETE FROM posted_images WHERE article_id = ?", (article_id,))
+
+    def image_hashes(self):
+        """Повертає [(image_hash, article_id, posted_at)] для фото, опублікованих у межах TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT image_hash, article_id, posted_at FROM posted_images WHERE posted_at >= ?", (cutoff,)
+            ).fetchall()
+        return [(int(image_hash, 16), article_id, posted_at) for image_hash, article_id, posted_at in rows]
+
+    def prune(self):
+        """Видаляє записи, старші за TTL; повертає кількість видалених."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM posted WHERE posted_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM posted_images WHERE posted_at < ?", (cutoff,))
+            return cursor.rowcount
+
+    def close(self):
+        """Закриває з'єднання з базою."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,169 @@
+"""
+Планувальник публікацій за київським часом.
+
+Ключові класи/функції:
+- PostingScheduler: планує слоти як «остання публікація + інтервал з POSTING_INTERVALS» з джитером,
+  зсуваючи їх у найближчу годину з OPTIMAL_POSTING_HOURS; наступний слот зберігається в SCHEDULE_FILE.
+  Після перезапуску слот не переплановується (без «залпу» постів і без довгої паузи), а пропущений під час
+  простою слот відпрацьовується один раз — щойно настане оптимальна година.
+  - next_slot / upcoming_slots: найближчий слот і прогноз кількох наступних (для підготовки наперед).
+  - sleep_until / wake: очікування слоту; wake() перериває його, коли слот змінився (результат завантаження в railway_run).
+  - reserve_slot: попередній слот, поки пост чекає в черзі завантаження (час останньої публікації не змінюється).
+  - record_post: фіксує результат завантаження і планує наступний слот.
+- is_optimal_time / next_optimal_time: евристика «гарного часу» без стану (для InstagramPublisher).
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from news_cache import JsonFileStore
+from config import (
+    POSTING_INTERVALS, OPTIMAL_POSTING_HOURS, POSTING_TIMEZONE, POSTING_JITTER_MINUTES,
+    POSTING_RETRY_MINUTES, SCHEDULE_FILE
+)
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+    ZoneInfoNotFoundError = Exception
+
+
+def _posting_timezone(name=POSTING_TIMEZONE):
+    """Повертає часовий пояс публікацій (Europe/Kyiv; за відсутності бази tz — локальний час сервера)."""
+    if ZoneInfo is not None:
+        # Старі бази tz знають лише назву Europe/Kiev
+        for candidate in (name, name.replace('Kyiv', 'Kiev')):
+            try:
+                return ZoneInfo(candidate)
+            except (ZoneInfoNotFoundError, ValueError):
+                continue
+    print(f"Часовий пояс {name} недоступний (встановіть tzdata), використовую локальний час сервера")
+    return None
+
+
+TIMEZONE = _posting_timezone()
+
+
+def _local(moment=None):
+    """Перетворює unix-час (або «зараз») на datetime у часовому поясі публікацій."""
+    return datetime.fromtimestamp(time.time() if moment is None else moment, TIMEZONE)
+
+
+def is_optimal_time(moment=None, optimal_hours=OPTIMAL_POSTING_HOURS):
+    """True, якщо `moment` (unix-час, за замовчуванням — зараз) припадає на оптимальну годину."""
+    return not optimal_hours or _local(moment).hour in optimal_hours
+
+
+def next_optimal_time(moment=None, optimal_hours=OPTIMAL_POSTING_HOURS):
+    """Повертає unix-час початку найближчої оптимальної години після `moment` (з переходом на наступну добу)."""
+    current = _local(moment)
+    if not optimal_hours:
+        return current.timestamp()
+    candidate = current.replace(minute=0, second=0, microsecond=0)
+    for _ in range(48):
+        candidate += timedelta(hours=1)
+        if candidate.hour in optimal_hours:
+            return candidate.timestamp()
+    return current.timestamp()
+
+
+def format_slot(moment):
+    """Рядок для логів: час слоту за київським часом."""
+    return _local(moment).strftime('%d.%m %H:%M')
+
+
+class PostingScheduler(JsonFileStore):
+    def __init__(self, path=SCHEDULE_FILE, intervals=POSTING_INTERVALS, optimal_hours=OPTIMAL_POSTING_HOURS,
+                 jitter_minutes=POSTING_JITTER_MINUTES, retry_minutes=POSTING_RETRY_MINUTES):
+        """Завантажує збережений стан (наступний слот, час останньої публікації)."""
+        super().__init__(path)
+        self.min_interval = min(intervals) * 3600
+        self.max_interval = max(intervals) * 3600
+        self.optimal_hours = list(optimal_hours)
+        self.jitter_seconds = jitter_minutes * 60
+        self.retry_minutes = retry_minutes
+        self._wake = threading.Event()
+
+    def _align(self, moment, jitter=True):
+        """Зсуває момент в оптимальну годину; джитер — у межах ±POSTING_JITTER_MINUTES (не виходячи з неї)."""
+        if jitter and self.jitter_seconds:
+            moment += random.uniform(-self.jitter_seconds, self.jitter_seconds)
+        if is_optimal_time(moment, self.optimal_hours):
+            return moment
+        start = next_optimal_time(moment, self.optimal_hours)
+        return start + (random.uniform(0, self.jitter_seconds) if jitter else 0)
+
+    def _plan_after(self, last_post_at):
+        """Планує слот після публікації о `last_post_at`: випадковий інтервал з POSTING_INTERVALS + вирівнювання."""
+        interval = random.uniform(self.min_interval, self.max_interval)
+        # Обмежуємо до вирівнювання, щоб слот лишився в оптимальній годині; запас на джитер —
+        # щоб зсув назад не скоротив мінімальний інтервал між постами
+        return self._align(max(last_post_at + interval, last_post_at + self.min_interval + self.jitter_seconds))
+
+    def _save_slot(self, slot):
+        with self._lock:
+            self._data['next_slot'] = slot
+        self.save()
+
+    def next_slot(self):
+        """Повертає unix-час наступного слоту (планує і зберігає його, якщо ще не заплановано)."""
+        now = time.time()
+        with self._lock:
+            slot = self._data.get('next_slot')
+            last_post_at = self._data.get('last_post_at')
+
+        if slot is None:
+            # Перший запуск — публікуємо щойно настане оптимальна година; інакше — від останньої публікації
+            slot = self._plan_after(last_post_at) if last_post_at else self._align(now, jitter=False)
+            self._save_slot(slot)
+        elif slot < now and not is_optimal_time(now, self.optimal_hours):
+            # Слот пропущено під час простою і зараз «погана» година — переносимо на найближчу оптимальну
+            slot = self._align(now)
+            self._save_slot(slot)
+        # Пропущений слот в оптимальну годину відпрацьовується одразу, але лише один раз:
+        # після публікації наступний слот рахується від фактичного часу поста
+        return slot
+
+    def upcoming_slots(self, count=3):
+        """Повертає найближчий слот і прогноз наступних (середній інтервал, без джитера) — для підготовки наперед."""
+        slots = [self.next_slot()]
+        average_interval = (self.min_interval + self.max_interval) / 2
+        while len(slots) < count:
+            slots.append(self._align(slots[-1] + average_interval, jitter=False))
+        return slots
+
+    def sleep_until(self, slot):
+        """Чекає настання слоту (короткими відрізками, щоб пережити зміну системного часу); False — якщо розбуджено wake()."""
+        while True:
+            remaining = slot - time.time()
+            if remaining <= 0:
+                return True
+            # wake() до початку сну теж враховується — сигнал «з'їдається» лише тут
+            if self._wake.wait(min(remaining, 300)):
+                self._wake.clear()
+                return False
+
+    def wake(self):
+        """Перериває sleep_until (наприклад, коли слот змінився після збою завантаження)."""
+        self._wake.set()
+
+    def reserve_slot(self):
+        """Пост у черзі завантаження: планує попередній слот від поточного часу, не змінюючи час останньої публікації."""
+        slot = self._plan_after(time.time())
+        self._save_slot(slot)
+        return slot
+
+    def record_post(self, success):
+        """Фіксує результат: після успіху — слот від часу публікації, після збою — повтор через POSTING_RETRY_MINUTES."""
+        now = time.time()
+        if success:
+            with self._lock:
+                self._data['last_post_at'] = now
+            slot = self._plan_after(now)
+        else:
+            retry_minutes = random.randint(*self.retry_minutes)
+            slot = self._align(now + retry_minutes * 60)
+        self._save_slot(slot)
+        return slot
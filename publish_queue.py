@@ -0,0 +1,205 @@
+"""
+Черга публікацій Instagram з відкладеними задачами.
+
+Ключові класи:
+- PublishJob: одна публікація — статус (queued → waiting → uploading → published → commenting → done | failed),
+  ID медіа, повідомлення та історія змін; wait_uploaded / wait дозволяють дочекатися потрібного етапу,
+  on_uploaded — отримати результат завантаження колбеком, нікого не блокуючи.
+- PublishQueue: окремий потік виконує задачі за часом: завантаження фото через випадкову «людську» паузу
+  PUBLISH_UPLOAD_DELAY_SECONDS і коментар з хештегами ще через PUBLISH_COMMENT_DELAY_SECONDS; якщо сесію
+  втрачено (LOGIN_REQUIRED), завантаження один раз повторюється відкладеною задачею через PUBLISH_RETRY_DELAY_SECONDS.
+  Усі дії з Instagram ідуть послідовно в одному потоці, а той, хто поставив задачу, не блокується паузами.
+"""
+
+import heapq
+import random
+import threading
+import time
+from collections import OrderedDict
+from config import PUBLISH_UPLOAD_DELAY_SECONDS, PUBLISH_COMMENT_DELAY_SECONDS, PUBLISH_RETRY_DELAY_SECONDS
+
+# Код результату publish_photo_post: сесію втрачено і вже замінено — завантаження варто повторити
+LOGIN_REQUIRED = 'login_required'
+# Скільки разів пробувати завантаження однієї задачі (друга спроба — лише після заміни сесії)
+UPLOAD_ATTEMPTS = 2
+# Скільки завершених задач пам'ятати для перегляду статусів
+JOB_HISTORY_LIMIT = 50
+
+
+class PublishJob:
+    def __init__(self, job_id, image, caption, hashtags=''):
+        """Створює задачу публікації у статусі 'queued'; `image` — шлях до файлу або байти JPEG."""
+        self.id = job_id
+        self.image = image
+        self.caption = caption
+        self.hashtags = hashtags
+        self.status = 'queued'
+        self.media_id = None
+        self.attempts = 0
+        self.message = ''
+        self.created_at = time.time()
+        self.history = [('queued', self.created_at, '')]
+        self._lock = threading.Lock()
+        self._uploaded = threading.Event()
+        self._finished = threading.Event()
+        self._callbacks = []
+
+    def _set(self, status, message=''):
+        with self._lock:
+            self.status = status
+            if message:
+                self.message = message
+            self.history.append((status, time.time(), message))
+
+    @property
+    def success(self):
+        """True, якщо фото опубліковано (незалежно від результату коментаря з хештегами)."""
+        return self.media_id is not None
+
+    def wait_uploaded(self, timeout=None):
+        """Чекає завершення завантаження фото (успішного чи ні); False — якщо вийшов таймаут."""
+        return self._uploaded.wait(timeout)
+
+    def on_uploaded(self, callback):
+        """Викличе `callback(job)` після завантаження фото (успішного чи ні); якщо воно вже завершилось — одразу."""
+        with self._lock:
+            if not self._uploaded.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _mark_uploaded(self):
+        with self._lock:
+            self._uploaded.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠️ Помилка обробника завантаження {self.id}: {e}")
+
+    def wait(self, timeout=None):
+        """Чекає завершення всієї задачі (разом з коментарем); False — якщо вийшов таймаут."""
+        return self._finished.wait(timeout)
+
+    def snapshot(self):
+        """Повертає копію стану задачі для логів/моніторингу."""
+        with self._lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'media_id': self.media_id,
+                'message': self.message,
+                'created_at': self.created_at,
+                'history': list(self.history),
+            }
+
+
+class PublishQueue:
+    def __init__(self, publisher, upload_delay=PUBLISH_UPLOAD_DELAY_SECONDS, comment_delay=PUBLISH_COMMENT_DELAY_SECONDS,
+                 retry_delay=PUBLISH_RETRY_DELAY_SECONDS):
+        """Прив'язує чергу до InstagramPublisher; робочий потік стартує з першою задачею."""
+        self.publisher = publisher
+        self.upload_delay = upload_delay
+        self.comment_delay = comment_delay
+        self.retry_delay = retry_delay
+        self._tasks = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._jobs = OrderedDict()
+        self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='publish-queue', daemon=True)
+            self._worker.start()
+
+    def _schedule(self, run_at, func, job):
+        """Додає задачу `func(job)` на момент `run_at` (unix-час)."""
+        with self._condition:
+            self._sequence += 1
+            heapq.heappush(self._tasks, (run_at, self._sequence, func, job))
+            self._ensure_worker()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._tasks or self._tasks[0][0] > time.time():
+                    timeout = self._tasks[0][0] - time.time() if self._tasks else None
+                    self._condition.wait(timeout)
+                _, _, func, job = heapq.heappop(self._tasks)
+            try:
+                func(job)
+            except Exception as e:
+                self._fail(job, f"Помилка задачі публікації: {e}")
+
+    def submit(self, image, caption, hashtags=''):
+        """Ставить публікацію в чергу і одразу повертає PublishJob; завантаження — після випадкової паузи."""
+        with self._condition:
+            job = PublishJob(f"job-{self._sequence + 1}-{int(time.time())}", image, caption, hashtags)
+            self._jobs[job.id] = job
+            while len(self._jobs) > JOB_HISTORY_LIMIT:
+                self._jobs.popitem(last=False)
+
+        delay = random.uniform(*self.upload_delay)
+        job._set('waiting', f"Завантаження через {delay:.0f} с")
+        print(f"🕒 Публікацію {job.id} заплановано через {delay:.0f} с")
+        self._schedule(time.time() + delay, self._upload, job)
+        return job
+
+    def _fail(self, job, message):
+        job._set('failed', message)
+        job._mark_uploaded()
+        job._finished.set()
+
+    def _upload(self, job):
+        job._set('uploading')
+        job.attempts += 1
+        success, message, media_id = self.publisher.publish_photo_post(job.image, job.caption)
+        if not success and message == LOGIN_REQUIRED and job.attempts < UPLOAD_ATTEMPTS:
+            # Сесію вже замінено — повтор окремою задачею, потік черги не чекає паузу
+            delay = random.uniform(*self.retry_delay)
+            job._set('waiting', f"Сесію замінено, повтор завантаження через {delay:.0f} с")
+            self._schedule(time.time() + delay, self._upload, job)
+            return
+
+        # Байти фото більше не потрібні — не тримаємо їх в історії задач
+        job.image = None
+        if not success:
+            self._fail(job, message)
+            return
+
+        job.media_id = media_id
+        job._set('published', message)
+        job._mark_uploaded()
+
+        if job.hashtags:
+            delay = random.uniform(*self.comment_delay)
+            job._set('commenting', f"Коментар з хештегами через {delay:.0f} с")
+            self._schedule(time.time() + delay, self._comment, job)
+        else:
+            job._set('done')
+            job._finished.set()
+
+    def _comment(self, job):
+        success, result = self.publisher.add_hashtags_to_comment(job.media_id, job.hashtags)
+        job._set('done', '' if success else f"Коментар не додано: {result}")
+        job._finished.set()
+
+    def status(self, job_id):
+        """Повертає стан задачі за ID (або None)."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    def jobs(self):
+        """Повертає стани останніх задач (від найстаріших до найновіших)."""
+        with self._condition:
+            jobs = list(self._jobs.values())
+        return [job.snapshot() for job in jobs]
+
+    def pending(self):
+        """Кількість запланованих, ще не виконаних задач."""
+        with self._condition:
+            return len(self._tasks)
@@ -7,7 +7,7 @@ import os
 import sys
 import time
 import logging
-import random
+import threading
 from datetime import datetime
 
 # Налаштування логування для Railway
@@ -54,6 +54,66 @@ def check_environment():
     logging.info(f"Telegram: {os.getenv('TELEGRAM_CHANNEL_LINK')}")
     return True
 
+def report_upload(bot, scheduler, job):
+    """Колбек черги публікацій: фіксує результат завантаження і замінює попередній слот акаунта."""
+    from posting_scheduler import format_slot
+    
+    # Слот, зарезервований при постановці в чергу, замінюється — будимо очікування
+    next_slot = scheduler.record_post(job.success)
+    scheduler.wake()
+    if job.success:
+        logging.info(f"✅ [{bot.name}] Пост успішно опубліковано! Наступна публікація о {format_slot(next_slot)}")
+        return
+    logging.error(f"❌ [{bot.name}] Помилка публікації - можливо потрібна пауза")
+    logging.info(f"😴 [{bot.name}] Повторна спроба о {format_slot(next_slot)} для відновлення...")
+
+def serve_account(bot):
+    """Постійний режим одного акаунта: очікування слоту, публікація, планування наступного."""
+    from post_prefetcher import PostPrefetcher
+    from posting_scheduler import PostingScheduler, format_slot
+    
+    # Слоти публікацій планує PostingScheduler (київський час, оптимальні години, джитер);
+    # наступний слот зберігається, тож перезапуск не дає ні «залпу» постів, ні довгої паузи.
+    # Під час паузи наступний пост готується у фоні — після пробудження лишається лише завантаження
+    scheduler = PostingScheduler(path=bot.account['schedule_file'])
+    prefetcher = PostPrefetcher(bot)
+    try:
+        while True:
+            slot, *forecast = scheduler.upcoming_slots()
+            wait_minutes = max(0, (slot - time.time()) / 60)
+            logging.info(f"⏰ [{bot.name}] Наступна публікація о {format_slot(slot)} (через {wait_minutes:.0f} хвилин), "
+                         f"далі орієнтовно: {', '.join(format_slot(moment) for moment in forecast)}")
+            
+            if wait_minutes > 0:
+                prefetcher.start(slot)
+                if not scheduler.sleep_until(slot):
+                    # Слот змінився (збій завантаження) — плануємо заново
+                    continue
+            
+            logging.info(f"📝 [{bot.name}] {datetime.now().strftime('%H:%M:%S')} - Створюю новий пост...")
+            package = prefetcher.take()
+            if package is None:
+                try:
+                    package = bot.prepare_post()
+                except Exception as e:
+                    logging.error(f"💥 [{bot.name}] Помилка підготовки поста: {e}")
+            job = bot.publish_prepared_post(package) if package else None
+            
+            # Завантаження не чекаємо: резервуємо попередній слот і відновлюємо підготовку наступного поста,
+            # а результат завантаження (колбек черги) фіксує публікацію, переплановує слот і будить очікування
+            next_slot = scheduler.reserve_slot() if job is not None else scheduler.record_post(False)
+            prefetcher.start(next_slot)
+            if job is not None:
+                logging.info(f"📤 [{bot.name}] Пост поставлено в чергу публікацій ({job.id})")
+                job.on_uploaded(lambda job: report_upload(bot, scheduler, job))
+            else:
+                logging.error(f"❌ [{bot.name}] Пост не підготовлено - можливо потрібна пауза")
+                logging.info(f"😴 [{bot.name}] Повторна спроба о {format_slot(next_slot)} для відновлення...")
+    except Exception as e:
+        logging.error(f"❌ [{bot.name}] Критична помилка: {e}")
+    finally:
+        prefetcher.stop()
+
 def main():
     """Головна функція для Railway"""
     logging.info("🚀 Запуск Instagram Ukrainian News Bot на Railway")
@@ -72,13 +132,15 @@ def main():
         except ImportError:
             logging.warning("⚠️ lxml_html_clean не знайдено, але це не критично")
         
-        from simple_bot import SimpleInstagramBot
+        from simple_bot import create_account_bots
         
-        bot = SimpleInstagramBot()
+        # Один бот на акаунт; збір новин, сторінки, фото і переклад у них спільні
+        bots = create_account_bots()
+        logging.info(f"👥 Акаунти: {', '.join(bot.name for bot in bots)}")
         
-        # Спочатку тест
+        # Спочатку тест (достатньо одного бота — конвеєр спільний)
         logging.info("🧪 Тестування компонентів...")
-        if not bot.test_run():
+        if not bots[0].test_run():
             logging.error("❌ Тести не пройдено")
             sys.exit(1)
         
@@ -86,36 +148,22 @@ def main():
         logging.info("✅ Тести пройдено, запускаю постійний режим...")
         
         logging.info("🤖 Бот запущено на Railway!")
-        logging.info("🚀 Перша публікація зараз...")
         
-        # Перша публікація одразу
-        success = bot.create_and_publish_post()
-        if success:
-            logging.info("✅ Перший пост успішно опубліковано!")
-        else:
-            logging.error("❌ Помилка першої публікації")
+        # Кожен акаунт — власний потік зі своїм розкладом, підготовкою і чергою публікацій, тож слоти
+        # різних акаунтів не стоять один за одним; збір новин спільний (SharedPipeline.cycle_lock)
+        workers = [
+            threading.Thread(target=serve_account, args=(bot,), name=f"account-{bot.account['slug']}", daemon=True)
+            for bot in bots
+        ]
+        for worker in workers:
+            worker.start()
+        
+        # Потік акаунта завершується лише через критичну помилку — тоді перезапускаємо процес (Railway)
+        while all(worker.is_alive() for worker in workers):
+            time.sleep(5)
+        logging.error("❌ Потік акаунта зупинився через критичну помилку")
+        sys.exit(1)
         
-        # Основний цикл з рандомізованими інтервалами (1.5-3 години)
-        while True:
-            # Рандомізований інтервал від 1.5 до 3 годин для природності
-            interval_minutes = random.randint(90, 180)  # 90-180 хвилин
-            interval_seconds = interval_minutes * 60
-            
-            logging.info(f"⏰ Наступна публікація через {interval_minutes} хвилин ({interval_seconds} секунд)...")
-            time.sleep(interval_seconds)
-            
-            logging.info(f"📝 {datetime.now().strftime('%H:%M:%S')} - Створюю новий пост...")
-            success = bot.create_and_publish_post()
-            
-            if success:
-                logging.info("✅ Пост успішно опубліковано!")
-            else:
-                logging.error("❌ Помилка публікації - можливо потрібна пауза")
-                # Додаткова пауза при помилці Instagram
-                extra_wait = random.randint(30, 60)  # 30-60 хвилин
-                logging.info(f"😴 Додаткова пауза {extra_wait} хвилин для відновлення...")
-                time.sleep(extra_wait * 60)
-            
     except KeyboardInterrupt:
         logging.info("👋 Отримано сигнал зупинки...")
         sys.exit(0)
@@ -0,0 +1,142 @@
+"""
+Керована тимчасова область для файлів, без яких не обійтись (instagrapi завантажує фото лише з файлу).
+
+Ключові класи/функції:
+- ScratchArea: окремий каталог — SCRATCH_DIR, якщо його задано, інакше в пам'яті (/dev/shm), якщо він доступний
+  на запис, інакше temp_images на диску — з лімітом SCRATCH_MAX_MB: при переповненні першими видаляються найстаріші файли, що зараз не використовуються.
+  Область керує лише власними файлами (`post_*` — їх створює temporary): інші файли каталогу не рахуються
+  в ліміт і не видаляються, тож SCRATCH_DIR може вказувати і на спільний каталог (наприклад, /tmp).
+  - temporary: контекстний менеджер — записує байти у файл і видаляє його на будь-якому шляху виходу
+    (успіх, помилка, виняток).
+  - sweep: прибирає власні залишки попередніх запусків (і старі `temp_images/post_*.jpg`); викликається при створенні.
+  - cleanup: видаляє файли поточного процесу (зареєстровано в atexit).
+- get_scratch_area: спільний екземпляр для процесу.
+"""
+
+import os
+import glob
+import atexit
+import tempfile
+import threading
+from contextlib import contextmanager
+from config import SCRATCH_DIR, SCRATCH_MAX_MB
+
+# Каталог у RAM (tmpfs) — запис і читання фото без диска
+SHM_DIR = '/dev/shm'
+# Куди старі версії бота складали фото постів
+LEGACY_DIR = 'temp_images'
+# Префікс файлів області: sweep і витіснення не чіпають нічого іншого в каталозі
+FILE_PREFIX = 'post_'
+
+_shared_area = None
+_shared_area_lock = threading.Lock()
+
+
+def default_directory():
+    """Каталог тимчасових файлів: SCRATCH_DIR, інакше /dev/shm (якщо доступний на запис), інакше temp_images."""
+    if SCRATCH_DIR:
+        return SCRATCH_DIR
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        return os.path.join(SHM_DIR, 'instagram_bot')
+    return LEGACY_DIR
+
+
+class ScratchArea:
+    def __init__(self, directory=None, max_mb=SCRATCH_MAX_MB):
+        """Створює каталог і прибирає залишки попередніх запусків."""
+        self.directory = directory or default_directory()
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        # Файли, які зараз використовуються (їх не можна витісняти)
+        self._in_use = set()
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep()
+
+    def _files(self):
+        """Повертає [(mtime, size, path)] файлів області (лише створених нею — з префіксом FILE_PREFIX)."""
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.startswith(FILE_PREFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def sweep(self):
+        """Видаляє файли, що лишилися від попередніх запусків; повертає їх кількість."""
+        removed = 0
+        with self._lock:
+            paths = [path for _, _, path in self._files()]
+            if os.path.abspath(self.directory) != os.path.abspath(LEGACY_DIR):
+                paths += glob.glob(os.path.join(LEGACY_DIR, f'{FILE_PREFIX}*.jpg'))
+            for path in paths:
+                if path in self._in_use:
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+        if removed:
+            print(f"🧹 Видалено {removed} тимчасових файлів попередніх запусків")
+        return removed
+
+    def _make_room(self, size):
+        """Витісняє найстаріші невикористовувані файли, щоб новий файл `size` вмістився в ліміт (під self._lock)."""
+        files = sorted(self._files())
+        total = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in files:
+            if total + size <= self.max_bytes:
+                break
+            if path in self._in_use:
+                continue
+            try:
+                os.remove(path)
+                total -= file_size
+            except OSError:
+                continue
+        if total + size > self.max_bytes:
+            print(f"⚠️ Тимчасова область {self.directory} перевищує ліміт {self.max_bytes // (1024 * 1024)} MB")
+
+    @contextmanager
+    def temporary(self, data, suffix='.jpg'):
+        """Записує `data` у тимчасовий файл і повертає шлях; файл видаляється при виході з блоку `with`."""
+        with self._lock:
+            self._make_room(len(data))
+            fd, path = tempfile.mkstemp(prefix=FILE_PREFIX, suffix=suffix, dir=self.directory)
+            self._in_use.add(path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            yield path
+        finally:
+            with self._lock:
+                self._in_use.discard(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def cleanup(self):
+        """Видаляє всі файли, які зараз тримає процес (для виходу з програми)."""
+        with self._lock:
+            paths, self._in_use = list(self._in_use), set()
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def get_scratch_area():
+    """Повертає спільну для процесу тимчасову область (створюється і прибирається при першому виклику)."""
+    global _shared_area
+    with _shared_area_lock:
+        if _shared_area is None:
+            _shared_area = ScratchArea()
+            atexit.register(_shared_area.cleanup)
+        return _shared_area
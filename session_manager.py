@@ -0,0 +1,287 @@
+"""
+Менеджер сесій Instagram: публікація не платить за вхід чи перевірку сесії.
+
+Ключові класи:
+- ManagedSession: клієнт instagrapi, його файл сесії, час останнього збереження, час останнього успішного виклику API
+  і замок клієнта.
+- SessionManager:
+  - client / ready: активна сесія (відновлюється з файлу без жодного запиту);
+  - api: клієнт активної сесії під її замком — Client не потокобезпечний, тож черга публікацій і фонова
+    перевірка ніколи не викликають API одного клієнта одночасно;
+  - login: синхронний вхід лише тоді, коли готової сесії немає (спершу — резервна, потім вхід паролем);
+  - mark_valid: успішна публікація/коментар підтверджує сесію ще на SESSION_VALIDATE_TTL_MINUTES і, якщо файл сесії
+    старший за SESSION_REFRESH_HOURS, зберігає свіжі cookies клієнта (оновлення без повторного входу паролем);
+  - invalidate: відкидає сесію, яку не прийняв сервер, і одразу підставляє резервну;
+  - start / maintain: фоновий потік перевіряє сесію після TTL (успішна перевірка теж оновлює файл сесії) і тримає
+    SESSION_STANDBY_COUNT перевірених резервних сесій (за замовчуванням 0 — кожна резервна сесія коштує входу паролем);
+  - recover: синхронна перевірка збереженої сесії (instagram_challenge_solver).
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from instagrapi import Client
+from instagrapi.exceptions import LoginRequired, ChallengeRequired
+from config import SESSION_VALIDATE_TTL_MINUTES, SESSION_REFRESH_HOURS, SESSION_STANDBY_COUNT
+
+
+def standby_path(session_file, index):
+    """Файл резервної сесії №`index` поруч з основним (instagram_session.json → instagram_session_standby1.json)."""
+    root, ext = os.path.splitext(session_file)
+    return f"{root}_standby{index}{ext or '.json'}"
+
+
+class ManagedSession:
+    def __init__(self, path, client, validated_at=0):
+        """Сесія `client`, збережена у файлі `path`; `validated_at` — час останнього успішного виклику API."""
+        self.path = path
+        self.client = client
+        self.validated_at = validated_at
+        # Час файлу сесії — коли налаштування клієнта востаннє зберігались (відомий і після перезапуску)
+        self.saved_at = os.path.getmtime(path) if os.path.exists(path) else 0
+        # Запити API і збереження налаштувань цього клієнта — лише під замком (RLock: save() всередині api())
+        self.lock = threading.RLock()
+
+    def save(self):
+        """Зберігає налаштування клієнта (cookies, авторизація, пристрій) у файл сесії."""
+        with self.lock:
+            self.client.dump_settings(self.path)
+            self.saved_at = time.time()
+
+
+class SessionManager:
+    def __init__(self, username, password, session_file, validate_ttl_minutes=SESSION_VALIDATE_TTL_MINUTES,
+                 refresh_hours=SESSION_REFRESH_HOURS, standby_count=SESSION_STANDBY_COUNT):
+        """Відновлює збережені сесії з диска (без мережі); перевірка і резерв — у фоновому потоці (start)."""
+        self.username = username
+        self.password = password
+        self.session_file = session_file
+        self.validate_ttl = validate_ttl_minutes * 60
+        self.refresh_seconds = refresh_hours * 3600
+        self.standby_paths = [standby_path(session_file, index + 1) for index in range(max(0, standby_count))]
+        self._lock = threading.RLock()
+        self._active = None
+        self._standby = []
+        self._idle_client = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+        for path in [session_file] + self.standby_paths:
+            session = self._restore(path)
+            if session is None:
+                continue
+            if self._active is None:
+                self._active = session
+            else:
+                self._standby.append(session)
+
+    def _restore(self, path):
+        """Піднімає сесію з файлу без мережевих запитів; None — якщо файлу немає або в ньому немає авторизації."""
+        if not os.path.exists(path):
+            return None
+        client = Client()
+        try:
+            client.load_settings(path)
+        except Exception as e:
+            print(f"⚠️ Не вдалося прочитати сесію {path}: {e}")
+            return None
+        return ManagedSession(path, client) if client.user_id else None
+
+    def _login(self, path):
+        """Вхід паролем у новий клієнт; налаштування пристрою беруться зі збереженої сесії, щоб не «міняти телефон»."""
+        client = Client()
+        for source in (path, self.session_file):
+            if os.path.exists(source):
+                try:
+                    client.load_settings(source)
+                    break
+                except Exception:
+                    continue
+        # relogin=True: справжній вхід замість перевірки старої авторизації через account_info
+        client.login(self.username, self.password, relogin=True)
+        session = ManagedSession(path, client, validated_at=time.time())
+        session.save()
+        return session
+
+    def _validate(self, session):
+        """Перевіряє сесію запитом до API; False — лише якщо сервер її не приймає (мережеві збої не рахуються)."""
+        try:
+            with session.lock:
+                session.client.account_info()
+        except (LoginRequired, ChallengeRequired):
+            return False
+        except Exception as e:
+            print(f"⚠️ Не вдалося перевірити сесію {session.path}: {e}")
+            return True
+        self._confirm(session)
+        return True
+
+    def _confirm(self, session):
+        """Фіксує успішний виклик API; раз на SESSION_REFRESH_HOURS зберігає оновлені сервером cookies у файл сесії."""
+        now = time.time()
+        session.validated_at = now
+        if self.refresh_seconds and now - session.saved_at > self.refresh_seconds:
+            try:
+                session.save()
+                print(f"🔄 Сесію {session.path} оновлено (збережено свіжі налаштування)")
+            except Exception as e:
+                print(f"⚠️ Не вдалося зберегти сесію {session.path}: {e}")
+
+    def _promote_standby(self):
+        """Робить першу резервну сесію активною (викликається під self._lock); True — якщо резерв був."""
+        if not self._standby:
+            return False
+        self._active = self._standby.pop(0)
+        print(f"🔁 Переключаюсь на резервну сесію {self._active.path}")
+        return True
+
+    @property
+    def client(self):
+        """Клієнт instagrapi активної сесії (без авторизації — якщо сесії ще немає)."""
+        with self._lock:
+            if self._active is not None:
+                return self._active.client
+            if self._idle_client is None:
+                self._idle_client = Client()
+            return self._idle_client
+
+    @contextmanager
+    def api(self):
+        """Видає клієнт активної сесії під її замком (для всіх викликів API з будь-якого потоку)."""
+        with self._lock:
+            session = self._active
+        if session is None:
+            yield self.client
+            return
+        with session.lock:
+            yield session.client
+
+    def ready(self):
+        """True, якщо є активна сесія (жодних запитів до Instagram)."""
+        with self._lock:
+            return self._active is not None
+
+    def login(self):
+        """Гарантує активну сесію: наявна → резервна → вхід паролем (помилки входу прокидаються викликачу)."""
+        with self._lock:
+            if self._active is not None or self._promote_standby():
+                return True
+        session = self._login(self.session_file)
+        with self._lock:
+            self._active = session
+        return True
+
+    def mark_valid(self):
+        """Фіксує успішний виклик API активною сесією — фонова перевірка відкладається на TTL, файл сесії оновлюється."""
+        with self._lock:
+            session = self._active
+        if session is not None:
+            self._confirm(session)
+
+    def invalidate(self):
+        """Відкидає активну сесію і підставляє резервну; True — якщо резервна сесія знайшлась."""
+        with self._lock:
+            broken, self._active = self._active, None
+            promoted = self._promote_standby()
+        if broken is not None:
+            print(f"⚠️ Сесію {broken.path} відкинуто")
+        # Фоновий потік поповнить резерв
+        self._wake.set()
+        return promoted
+
+    def start(self):
+        """Запускає фонове обслуговування сесій (повторний виклик нічого не робить)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"sessions-{self.username}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = max(60, self.validate_ttl / 2)
+        while not self._stop.is_set():
+            try:
+                self.maintain()
+            except Exception as e:
+                print(f"⚠️ Помилка обслуговування сесій Instagram: {e}")
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    def maintain(self):
+        """Один крок обслуговування: перевірка сесій після TTL (з оновленням файлу) і поповнення резерву."""
+        now = time.time()
+        with self._lock:
+            active = self._active
+            standby = list(self._standby)
+
+        if active is None:
+            self.login()
+        elif now - active.validated_at > self.validate_ttl and not self._validate(active):
+            self.invalidate()
+
+        for session in standby:
+            if now - session.validated_at > self.validate_ttl and not self._validate(session):
+                with self._lock:
+                    if session in self._standby:
+                        self._standby.remove(session)
+        self._fill_standby()
+
+    def _fill_standby(self):
+        """Доводить кількість резервних сесій до SESSION_STANDBY_COUNT (відновленням з файлу або входом)."""
+        with self._lock:
+            used = {session.path for session in self._standby}
+            if self._active is not None:
+                used.add(self._active.path)
+            free = [path for path in [self.session_file] + self.standby_paths if path not in used]
+            missing = len(self.standby_paths) - len(self._standby)
+
+        for path in free[:max(0, missing)]:
+            session = self._restore(path)
+            if session is None or not self._validate(session):
+                session = self._login(path)
+            with self._lock:
+                self._standby.append(session)
+            print(f"🧷 Резервна сесія готова: {path}")
+
+    def recover(self):
+        """Синхронно перевіряє збережену сесію; повертає ім'я акаунта або None (неробочий файл сесії видаляється)."""
+        session = self._restore(self.session_file)
+        if session is None:
+            return None
+        try:
+            with session.lock:
+                account_info = session.client.account_info()
+        except Exception as e:
+            print(f"❌ Сесія не працює: {e}")
+            os.remove(self.session_file)
+            print("🗑️ Видалено неробочу сесію")
+            return None
+        session.validated_at = time.time()
+        with self._lock:
+            self._active = session
+        return account_info.username
+
+    def stop(self):
+        """Зупиняє фоновий потік обслуговування."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def logout(self):
+        """Зупиняє обслуговування і завершує всі сесії (активну та резервні)."""
+        self.stop()
+        with self._lock:
+            sessions = ([self._active] if self._active is not None else []) + self._standby
+            self._active = None
+            self._standby = []
+        for session in sessions:
+            try:
+                with session.lock:
+                    session.client.logout()
+            except Exception:
+                pass
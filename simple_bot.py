@@ -4,33 +4,48 @@
 
 Призначення модулю:
 - Клас SimpleInstagramBot: основний оркестратор — збирає новини, підбирає головне фото з тієї ж статті,
-  генерує опис і публікує в Instagram.
+  генерує опис і публікує в Instagram. Один бот — один акаунт; боти кількох акаунтів ділять SharedPipeline
+  (збір, збагачення, фото, переклад), тож вартість збору не росте з кількістю акаунтів.
+- create_account_bots: боти для всіх акаунтів з INSTAGRAM_ACCOUNTS зі спільним конвеєром.
  
 Короткий опис ключових методів:
-- load_posted_articles / save_posted_articles: робота зі списком вже опублікованих новин (щоб не дублювати).
+- load_posted_articles / save_posted_articles: сховище вже опублікованих новин (SQLite, стабільні ID — щоб не дублювати)
+  і перцептивні хеші їх фото (image_hash.PublishedImageIndex) — вже опубліковане фото відкидається ще під час перевірки кандидатів;
+  переписані версії опублікованих історій відсіює StoryIndex акаунта (до завантаження сторінок).
 - extract_images_from_html: дістає URL зображень з HTML-полів RSS (description/summary).
 - try_get_larger_image_url: намагається знайти більший варіант того самого зображення за URL-патернами.
-- detect_news_category: проста евристика для категоризації контенту (для емодзі/хештегів).
-- find_news_with_image: знаходить першу статтю з придатним фото саме з цієї статті.
-- create_and_publish_post: повний цикл створення та публікації одного поста.
+- detect_news_category: категоризація контенту за таблицями keywords (для емодзі/хештегів).
+- find_news_with_image: ледачий конвеєр — збагачує статті на вимогу і зупиняється на першій з придатним фото.
+- create_and_publish_post: повний цикл створення та публікації одного поста (prepare_post + publish_prepared_post).
+- prepare_post / publish_prepared_post / discard_prepared_post: підготовка пакета (стаття, байти фото, підпис) окремо від
+  завантаження в Instagram — пакет можна зібрати заздалегідь (див. post_prefetcher); фото в пакеті вже підготовлене
+  для Instagram (кадр 4:5…1.91:1, 1080 px, бюджет байтів — див. image_preprocess). publish_prepared_post не чекає
+  завантаження — повертає PublishJob черги публікацій.
 - analyze_rss_quality / suggest_new_rss_sources: допоміжні інструменти для оцінки якості джерел (не публікують).
 - get_image_from_news / _analyze_images_only: розширений пошук зображень (використовує і сторінку статті).
-- get_image_from_specific_article: бере фото лише з RSS цієї статті (головне/og-образи).
-- extract_images_from_full_article: завантажує сторінку статті та шукає пріоритетні зображення.
+- get_image_from_specific_article: бере фото лише з RSS цієї статті (головне/og-образи); повертає (фото, dHash).
+- meets_image_requirements: перевірка мінімальних розмірів і пропорцій (розміри читаються з заголовка файлу, див. image_probe).
+- extract_images_from_full_article: потоково читає `<head>` статті (og/twitter/JSON-LD); повний DOM — лише як запасний шлях;
+  сторінки та результати розбору беруться зі спільного PageCache.
 """
 
-import os
 import time
 import random
 import logging
-from datetime import datetime
-from news_collector import NewsCollector
+from accounts import SharedPipeline, load_accounts, primary_account
 from content_generator import ContentGenerator
 from instagram_publisher import InstagramPublisher
-from translator import NewsTranslator
-from PIL import Image
-import requests
-from io import BytesIO
+from image_probe import probe_candidates
+from image_cache import get_image_cache
+from posted_store import PostedArticlesStore, article_id as stable_article_id
+from image_hash import PublishedImageIndex
+from story_index import StoryIndex
+from http_client import http_get, log_transport_stats
+from page_parser import read_head, head_section, decode_html, extract_head_images
+from page_cache import get_page_cache
+from image_preprocess import prepare_instagram_image
+from keywords import classify
+from config import IMAGE_REQUIREMENTS
 from bs4 import BeautifulSoup
 
 # Налаштування логування без емодзі
@@ -44,30 +59,37 @@ logging.basicConfig(
 )
 
 class SimpleInstagramBot:
-    def __init__(self):
-        """Ініціалізує компоненти бота: збирач новин, генератор контенту, публікатор, перекладач та кеш постів."""
-        self.news_collector = NewsCollector()
-        self.content_generator = ContentGenerator()
-        self.instagram_publisher = InstagramPublisher()
-        self.translator = NewsTranslator()
+    def __init__(self, account=None, pipeline=None):
+        """Ініціалізує бота для акаунта `account` (за замовчуванням — основного); `pipeline` — спільний конвеєр новин кількох акаунтів."""
+        self.account = account or primary_account()
+        self.pipeline = pipeline or SharedPipeline()
+        # Збір, збагачення і переклад — спільні; публікатор, підпис, опубліковані статті — окремі для акаунта
+        self.news_collector = self.pipeline.news_collector
+        self.translator = self.pipeline.translator
+        self.content_generator = ContentGenerator(telegram_link=self.account['telegram_link'], llm=self.pipeline.llm)
+        self.instagram_publisher = InstagramPublisher(
+            self.account['username'], self.account['password'], self.account['session_file']
+        )
         self.posted_articles = self.load_posted_articles()
+        # BK-дерево хешів опублікованих фото акаунта (дані — у тому ж SQLite)
+        self.published_images = PublishedImageIndex(self.posted_articles)
+        # Опубліковані акаунтом історії: їх переписані версії з інших фідів — повтори лише для цього акаунта
+        self.story_index = StoryIndex(path=self.account['story_index_file'])
+    
+    @property
+    def name(self):
+        """Ім'я акаунта для логів."""
+        return self.account['username'] or 'default'
     
     def load_posted_articles(self):
-        """Завантажує множину ідентифікаторів опублікованих статей з файлу `posted_articles.json`."""
-        try:
-            import json
-            with open('posted_articles.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return set(data)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return set()
+        """Відкриває сховище опублікованих статей акаунта (основний акаунт при першому запуску мігрує `posted_articles.json`)."""
+        return PostedArticlesStore(path=self.account['posted_db'], legacy_json=self.account['posted_json'])
     
     def save_posted_articles(self):
-        """Зберігає множину ідентифікаторів опублікованих статей у файл `posted_articles.json`."""
+        """Прибирає прострочені записи; нові записи SQLite зберігає одразу при додаванні."""
         try:
-            import json
-            with open('posted_articles.json', 'w', encoding='utf-8') as f:
-                json.dump(list(self.posted_articles), f, ensure_ascii=False, indent=2)
+            if self.posted_articles.prune():
+                self.published_images.reload()
         except Exception as e:
             logging.error(f"Помилка збереження списку постів: {e}")
 
@@ -134,49 +156,44 @@ class SimpleInstagramBot:
         return original_url
     
     def detect_news_category(self, title, content):
-        """Повертає категорію новини ('war'|'politics'|'world'|'news') на основі ключових слів у тексті."""
-        text = f"{title} {content}".lower()
-        
-        # Ключові слова для військових новин
-        war_keywords = [
-            'війна', 'war', 'фронт', 'front', 'бойові', 'combat', 'наступ', 'offensive',
-            'оборона', 'defense', 'обстріл', 'shelling', 'ракет', 'missile', 'дрон', 'drone',
-            'військов', 'military', 'армія', 'army', 'втрати', 'casualties', 'загиблі',
-            'поранені', 'wounded', 'танк', 'tank', 'артилерія', 'artillery',
-            'авіаудар', 'airstrike', 'окупац', 'occupation', 'звільнен', 'liberation'
-        ]
-        
-        # Політичні ключові слова
-        politics_keywords = [
-            'політика', 'politics', 'уряд', 'government', 'президент', 'president',
-            'парламент', 'parliament', 'міністр', 'minister', 'закон', 'law',
-            'рішення', 'decision', 'санкції', 'sanctions'
-        ]
-        
-        # Міжнародні новини
-        world_keywords = [
-            'нато', 'nato', 'євросоюз', 'eu', 'сша', 'usa', 'росія', 'russia',
-            'міжнародн', 'international', 'дипломат', 'diplomatic'
-        ]
-        
-        if any(keyword in text for keyword in war_keywords):
-            return 'war'
-        elif any(keyword in text for keyword in politics_keywords):
-            return 'politics'
-        elif any(keyword in text for keyword in world_keywords):
-            return 'world'
-        else:
-            return 'news'
+        """Повертає категорію новини ('war'|'politics'|'world'|'news') з найбільшою кількістю ключових слів у тексті."""
+        return classify('news_category', title, content, default='news')
     
     def find_news_with_image(self):
         """Повертає першу статтю, де вдається отримати придатне фото саме з цієї статті (RSS-поля)."""
         logging.info("🔍 Пошук новини з якісним фото що збігається з текстом...")
         
-        all_news = self.news_collector.collect_fresh_news()
-        if not all_news:
-            logging.error("❌ RSS джерела недоступні")
-            return None
-            
+        # Вже опубліковані (і переписані версії опублікованих історій) відсіюються ще до завантаження сторінок
+        skipped_before_enrich = []
+        
+        def is_unpublished(article):
+            if stable_article_id(article) in self.posted_articles:
+                skipped_before_enrich.append(article)
+                return False
+            original = self.story_index.find_original(article)
+            if original is not None:
+                logging.info(f"Пропускаю повтор історії: {article.get('title', '')[:60]} (вже опубліковано {original})")
+                skipped_before_enrich.append(article)
+                return False
+            return True
+        
+        # Один цикл за раз на всі акаунти: наступний бере фіди, сторінки і фото з кешів попереднього
+        with self.pipeline.cycle_lock:
+            # Ледачий потік: сторінки завантажуються лише коли до статті дійшла черга,
+            # після першого успіху незапущені завантаження скасовуються
+            fresh_news = self.news_collector.iter_fresh_news(entry_filter=is_unpublished)
+            try:
+                return self._pick_news_with_image(fresh_news, skipped_before_enrich)
+            finally:
+                fresh_news.close()
+                self.story_index.prune()
+                self.story_index.save()
+                log_transport_stats()
+                # Індекс кешу зображень пишеться пакетно — зберігаємо зміни циклу
+                get_image_cache().flush()
+    
+    def _pick_news_with_image(self, all_news, skipped_before_enrich=()):
+        """Проходить потік статей і повертає першу з придатним фото (або None)."""
         analyzed_count = 0
         
         # Шукаємо КОЖНУ новину з фото що збігається з текстом
@@ -188,7 +205,7 @@ class SimpleInstagramBot:
             analyzed_count += 1
             
             # Пропускаємо вже опубліковані
-            article_id = hash(article.get('title', '') + article.get('link', ''))
+            article_id = stable_article_id(article)
             if article_id in self.posted_articles:
                 skipped_published += 1
                 continue
@@ -202,14 +219,16 @@ class SimpleInstagramBot:
             logging.info(f"📊 Перевіряю #{analyzed_count}: {title[:50]}...")
             
             # КЛЮЧОВА ЗМІНА: Перевіряємо що зображення САМЕ з цієї статті
-            image = self.get_image_from_specific_article(article)
+            image, image_hash = self.get_image_from_specific_article(article)
             
             if image:
                 logging.info(f"✅ УСПІШНО! Знайдено новину з фото що збігається з текстом: {title[:50]}...")
+                skipped_published += len(skipped_before_enrich)
                 logging.info(f"📊 Статистика пошуку: перевірено {analyzed_count}, пропущено опубл.: {skipped_published}, погані заголовки: {skipped_poor_title}, без фото: {skipped_no_image}")
                 return {
                     'article': article,
                     'image': image,
+                    'image_hash': image_hash,
                     'source_url': article.get('link', '')  # Додаємо джерело для перевірки
                 }
             else:
@@ -219,6 +238,11 @@ class SimpleInstagramBot:
             # Обмежуємо кількість перевірок
             if analyzed_count >= 50:
                 break
+        
+        skipped_published += len(skipped_before_enrich)
+        if analyzed_count == 0 and not skipped_published:
+            logging.error("❌ RSS джерела недоступні")
+            return None
                 
         logging.warning("❌ НЕ ЗНАЙДЕНО новин з якісними фото що збігаються з текстом")
         logging.warning(f"📊 Підсумкова статистика пошуку:")
@@ -238,77 +262,131 @@ class SimpleInstagramBot:
                 logging.error("❌ Досягнуто максимум спроб")
                 return False
             
-            # 1. Знаходимо новину з фото що збігається з текстом
-            news_data = self.find_news_with_image()
-            if not news_data:
-                logging.error("❌ Не знайдено новин з якісними фото що збігаються з текстом")
+            package = self.prepare_post()
+            if not package:
                 return False
             
-            # Витягуємо дані
-            news_article = news_data['article']
-            image = news_data['image']
-            source_url = news_data.get('source_url', 'N/A')
-            
-            logging.info(f"✅ Обрано новину: {news_article.get('title', 'Без заголовка')}")
-            logging.info(f"📸 Розмір фото: {image.size[0]}x{image.size[1]}")
-            logging.info(f"🔗 Джерело статті: {source_url}")
-            
-            # Додаємо до списку опублікованих ТІЛЬКИ ПІСЛЯ успішного отримання фото
-            article_id = hash(news_article.get('title', '') + news_article.get('link', ''))
-            self.posted_articles.add(article_id)
-            self.save_posted_articles()  # Зберігаємо після кожного додавання
-            
-            # Перекладаємо новину на українську мову
-            logging.info("🔄 Переклад новини на українську...")
-            ukrainian_article = self.translator.translate_news_article(news_article)
-            logging.info(f"✅ Переклад завершено: {ukrainian_article.get('title', 'Без заголовка')}")
-            
-            # 2. Використовуємо оригінальне зображення БЕЗ будь-якої обробки
-            logging.info("✅ Використовую оригінальне фото з тієї ж статті")
-            processed_img = image
-            
-            # Зберігаємо зображення
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            image_filename = f"post_{timestamp}.jpg"
-            image_path = f"temp_images/{image_filename}"
-            
-            # Створюємо папку якщо її немає
-            os.makedirs("temp_images", exist_ok=True)
-            
-            processed_img.save(image_path, "JPEG", quality=95)
-            logging.info(f"✅ РЕАЛЬНЕ фото з статті збережено: {image_path}")
-            
-            # 3. Генеруємо контент з ТІЄЇ Ж української статті
-            logging.info("📝 Генерація контенту з тієї ж статті...")
-            post_content = self.content_generator.create_full_post(
-                ukrainian_article.get('title', ''),
-                ukrainian_article.get('text', ukrainian_article.get('summary', ''))
-            )
+            # Тут (на відміну від railway_run) результат потрібен одразу — чекаємо всю задачу разом
+            # з коментарем: потік черги фоновий і не переживе завершення процесу (--post)
+            job = self.publish_prepared_post(package)
+            if job is None:
+                return False
+            job.wait()
+            return job.success
             
-            logging.info(f"✅ Згенеровано пост ({len(post_content)} символів) з тієї ж статті")
-            logging.info(f"📊 ГАРАНТІЯ: Фото та текст з однієї статті: {source_url}")
+        except Exception as e:
+            logging.error(f"💥 Критична помилка: {e}")
+            return False
+    
+    def prepare_post(self, news_data=None):
+        """Готує пакет до публікації (стаття, збережене фото, підпис) без публікації; None — якщо нічого не знайдено."""
+        # 1. Знаходимо новину з фото що збігається з текстом
+        if news_data is None:
+            news_data = self.find_news_with_image()
+        if not news_data:
+            logging.error("❌ Не знайдено новин з якісними фото що збігаються з текстом")
+            return None
+        
+        # Витягуємо дані
+        news_article = news_data['article']
+        image = news_data['image']
+        source_url = news_data.get('source_url', 'N/A')
+        
+        logging.info(f"✅ Обрано новину: {news_article.get('title', 'Без заголовка')}")
+        logging.info(f"📸 Розмір фото: {image.size[0]}x{image.size[1]}")
+        logging.info(f"🔗 Джерело статті: {source_url}")
+        
+        # Перекладаємо новину на українську мову
+        logging.info("🔄 Переклад новини на українську...")
+        ukrainian_article = self.translator.translate_news_article(news_article)
+        logging.info(f"✅ Переклад завершено: {ukrainian_article.get('title', 'Без заголовка')}")
+        
+        # 2. Готуємо фото з тієї ж статті під Instagram: draft-декодування, кадрування в 4:5…1.91:1,
+        # 1080 px, JPEG у межах бюджету — instagrapi вже не потрібно кадрувати чи масштабувати.
+        # Фото лишається в пам'яті; файл з'являється лише на час завантаження (scratch_area)
+        image_data, width, height = prepare_instagram_image(image)
+        logging.info(f"✅ РЕАЛЬНЕ фото з статті підготовлено: {width}x{height}, {len(image_data) // 1024} KB")
+        
+        # 3. Генеруємо контент з ТІЄЇ Ж української статті
+        logging.info("📝 Генерація контенту з тієї ж статті...")
+        post_content = self.content_generator.create_full_post(
+            ukrainian_article.get('title', ''),
+            ukrainian_article.get('text', ukrainian_article.get('summary', ''))
+        )
+        
+        logging.info(f"✅ Згенеровано пост ({len(post_content)} символів) з тієї ж статті")
+        logging.info(f"📊 ГАРАНТІЯ: Фото та текст з однієї статті: {source_url}")
+        
+        return {
+            'article': news_article,
+            'article_id': stable_article_id(news_article),
+            'image_data': image_data,
+            'image_hash': news_data.get('image_hash'),
+            'caption': post_content,
+            'source_url': source_url,
+            'prepared_at': time.time()
+        }
+    
+    def publish_prepared_post(self, package):
+        """Ставить пакет у чергу публікацій без очікування завантаження; повертає PublishJob (None — пакет пропущено)."""
+        try:
+            article_id = package['article_id']
+            if article_id in self.posted_articles:
+                logging.warning("⚠️ Ця новина вже опублікована, пакет пропущено")
+                self.discard_prepared_post(package)
+                return None
+            image_hash = package.get('image_hash')
+            if self.published_images.is_duplicate(image_hash):
+                logging.warning("⚠️ Це фото вже опубліковане з іншою новиною, пакет пропущено")
+                self.discard_prepared_post(package)
+                return None
+            
+            # Позначаємо як опубліковану до завантаження, щоб паралельні шляхи її не взяли
+            self.posted_articles.add(article_id, package['article'].get('title'), image_hash)
+            self.published_images.add(image_hash, article_id)
             
             # 4. Публікуємо
             logging.info("📤 Публікація в Instagram...")
-            success, message = self.instagram_publisher.safe_publish(
-                image_path, 
-                post_content,
+            job, message = self.instagram_publisher.safe_publish(
+                package['image_data'],
+                package['caption'],
                 add_hashtags_as_comment=True
             )
+            # Байти фото тепер тримає задача черги
+            self.discard_prepared_post(package)
             
-            if success:
-                logging.info(f"🎉 Пост успішно опубліковано з ВІДПОВІДНИМ фото та текстом! {message}")
-                return True
-            else:
+            if job is None:
                 logging.error(f"❌ Помилка публікації: {message}")
-                # Видаляємо з опублікованих якщо публікація не вдалася
-                self.posted_articles.discard(article_id)
-                self.save_posted_articles()
-                return False
+                self._forget_post(article_id)
+                return None
+            
+            job.on_uploaded(lambda job: self._on_uploaded(job, package['article'], article_id))
+            return job
             
         except Exception as e:
-            logging.error(f"💥 Критична помилка: {e}")
-            return False
+            logging.error(f"💥 Критична помилка публікації: {e}")
+            self._forget_post(package.get('article_id'))
+            return None
+    
+    def _on_uploaded(self, job, article, article_id):
+        """Колбек черги публікацій: логує результат; після успіху історія стає оригіналом для повторів, після збою — знову доступна."""
+        if job.success:
+            logging.info(f"🎉 Пост успішно опубліковано з ВІДПОВІДНИМ фото та текстом! {job.message}")
+            self.story_index.mark_published(article)
+            self.story_index.save()
+        else:
+            logging.error(f"❌ Помилка публікації: {job.message}")
+            self._forget_post(article_id)
+    
+    def _forget_post(self, article_id):
+        """Видаляє статтю з опублікованих (публікація не вдалася) і перебудовує індекс хешів фото."""
+        self.posted_articles.discard(article_id)
+        self.published_images.reload()
+    
+    def discard_prepared_post(self, package):
+        """Звільняє фото пакета, який не буде опубліковано (файлів на диску пакет не має)."""
+        if isinstance(package, dict):
+            package.pop('image_data', None)
     
     def test_run(self):
         """Запускає легкий тест компонентів без реальної публікації у Instagram."""
@@ -444,12 +522,28 @@ class SimpleInstagramBot:
         
         logging.info("\n🔧 Додайте ці джерела до config.py для покращення якості!")
     
-    def get_image_from_news(self, news_article):
+    def meets_image_requirements(self, width, height):
+        """True, якщо розміри і пропорції зображення відповідають IMAGE_REQUIREMENTS (надто вузькі панорами не кадруються)."""
+        min_aspect, max_aspect = IMAGE_REQUIREMENTS['aspect_ratio_range']
+        return (width >= IMAGE_REQUIREMENTS['min_width'] and
+                height >= IMAGE_REQUIREMENTS['min_height'] and
+                width * height >= IMAGE_REQUIREMENTS['min_pixels'] and
+                min_aspect <= width / height <= max_aspect)
+    
+    def _to_rgb(self, img):
+        """Конвертує зображення в RGB (Instagram не приймає режими P/RGBA/CMYK)."""
+        if img.mode != 'RGB':
+            original_mode = img.mode
+            img = img.convert('RGB')
+            logging.info(f"🔄 Конвертовано з {original_mode} в RGB")
+        return img
+    
+    def get_image_from_news(self, news_article, test_mode=False):
         """Повертає оригінальне зображення з новини (без обробки), якщо воно відповідає мінімальним вимогам."""
         return self._analyze_images_only(news_article)
     
     def get_image_from_specific_article(self, news_article):
-        """Бере зображення тільки з RSS-полів цієї статті ("головне"/OG/з description), без парсингу повного HTML."""
+        """Бере зображення тільки з RSS-полів цієї статті ("головне"/OG/з description); повертає (фото, dHash) або (None, None)."""
         logging.info(f"🔍 Шукаю зображення ТІЛЬКИ з RSS feed: {news_article.get('link', 'N/A')}")
         
         # Беремо зображення ТІЛЬКИ з RSS (без завантаження повних статей)
@@ -472,57 +566,55 @@ class SimpleInstagramBot:
         
         logging.info(f"📸 Знайдено {len(image_sources)} зображень з RSS feed")
         
-        # Імпортуємо вимоги до якості
-        from config import IMAGE_REQUIREMENTS
         min_width = IMAGE_REQUIREMENTS['min_width']
         min_height = IMAGE_REQUIREMENTS['min_height'] 
-        min_pixels = IMAGE_REQUIREMENTS['min_pixels']
         
-        # Перевіряємо кожне зображення по порядку пріоритету
-        for source_name, image_url in image_sources:
+        # Referer важливий для доступу до CDN; решту заголовків задає спільний транспорт
+        headers = {'Referer': news_article.get('link', '')}
+        
+        # Перевіряємо всі кандидати паралельно, але виграє перший придатний за пріоритетом;
+        # читається лише заголовок файлу, тіло докачується тільки для переможця
+        probes = probe_candidates(
+            [image_url for _, image_url in image_sources], headers=headers, timeout=15,
+            accept=self.meets_image_requirements, min_bytes=10000,  # менше 10KB — відкидаємо
+            duplicate=self.published_images.is_duplicate  # вже опубліковані фото (за dHash) — теж
+        )
+        
+        # Розбираємо результати по порядку пріоритету
+        for (source_name, image_url), probe in zip(image_sources, probes):
             try:
                 logging.info(f"🔍 Перевіряю {source_name}: {image_url[:60]}...")
                 
-                # Спочатку пробуємо оригінальний URL з RSS
-                original_url = image_url
-                
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-                    'Referer': news_article.get('link', ''),  # Важливо для доступу
-                    'Connection': 'keep-alive'
-                }
+                if probe is None or probe.reason == 'cancelled':
+                    continue
+                if probe.reason == 'http_error':
+                    logging.warning(f"❌ Помилка завантаження: HTTP {probe.status_code}")
+                    continue
+                if probe.reason == 'too_small':
+                    logging.warning(f"❌ Файл занадто малий: {probe.content_length} байт")
+                    continue
+                if probe.reason == 'too_large':
+                    logging.warning(f"❌ Файл перевищує {IMAGE_REQUIREMENTS['max_file_size_mb']} MB")
+                    continue
+                if probe.reason == 'duplicate':
+                    match = self.published_images.find_similar(probe.hash)
+                    logging.warning(f"❌ Це фото вже публікувалось (стаття {match[1] if match else '?'})")
+                    continue
+                if probe.reason == 'error':
+                    raise probe.error
                 
-                response = requests.get(image_url, timeout=15, headers=headers, stream=True)
+                width, height = probe.width, probe.height
+                logging.info(f"📏 Розмір зображення: {width}x{height} ({width * height} пікселів)")
                 
-                if response.status_code == 200:
-                    # Перевіряємо розмір файлу
-                    content_length = response.headers.get('content-length')
-                    if content_length and int(content_length) < 10000:  # менше 10KB
-                        logging.warning(f"❌ Файл занадто малий: {content_length} байт")
-                        continue
-                        
-                    img = Image.open(BytesIO(response.content))
-                    width, height = img.size
-                    total_pixels = width * height
-                    
-                    logging.info(f"📏 Розмір зображення: {width}x{height} ({total_pixels} пікселів)")
-                    
-                    # Перевіряємо відповідність вимогам
-                    if width >= min_width and height >= min_height and total_pixels >= min_pixels:
-                        # Конвертуємо в RGB якщо потрібно
-                        if img.mode != 'RGB':
-                            original_mode = img.mode
-                            img = img.convert('RGB')
-                            logging.info(f"🔄 Конвертовано з {original_mode} в RGB")
-                        
-                        logging.info(f"✅ ЗНАЙДЕНО ПІДХОДЯЩЕ ФОТО з {source_name}: {width}x{height}")
-                        return img
-                    else:
-                        logging.warning(f"❌ Не відповідає вимогам: {width}x{height} (мін. {min_width}x{min_height})")
-                        continue
+                # Перевіряємо відповідність вимогам
+                if probe.ok:
+                    # Не декодуємо тут: image_preprocess декодує фото одразу в потрібному розмірі (draft)
+                    img = probe.open()
+                    logging.info(f"✅ ЗНАЙДЕНО ПІДХОДЯЩЕ ФОТО з {source_name}: {width}x{height}")
+                    # Хеш їде разом із фото до пакета і потрапляє в індекс після публікації
+                    return img, probe.hash
                 else:
-                    logging.warning(f"❌ Помилка завантаження: HTTP {response.status_code}")
+                    logging.warning(f"❌ Не відповідає вимогам: {width}x{height} (мін. {min_width}x{min_height})")
                     continue
                     
             except Exception as e:
@@ -530,7 +622,7 @@ class SimpleInstagramBot:
                 continue
         
         logging.warning(f"❌ НЕ ЗНАЙДЕНО підходящих зображень з цієї статті")
-        return None
+        return None, None
     
 
     def _analyze_images_only(self, news_article):
@@ -573,58 +665,50 @@ class SimpleInstagramBot:
         if not image_urls:
             return None
             
-        # Імпортуємо вимоги до якості
-        from config import IMAGE_REQUIREMENTS
         min_width = IMAGE_REQUIREMENTS['min_width']
         min_height = IMAGE_REQUIREMENTS['min_height'] 
         min_pixels = IMAGE_REQUIREMENTS['min_pixels']
         
         logging.info(f"📏 Поточні вимоги: мін. {min_width}x{min_height}, мін. пікселів: {min_pixels}")
         
+        headers = {'Referer': news_article.get('link', '')}
+        probes = probe_candidates(
+            image_urls, headers=headers, timeout=10,
+            accept=self.meets_image_requirements, min_bytes=5000
+        )
+        
         # Перевіряємо кожне зображення
-        for i, image_url in enumerate(image_urls):
+        for probe in probes:
             try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-                    'Accept-Language': 'uk-UA,uk;q=0.9,en;q=0.8',
-                    'Referer': news_article.get('link', ''),
-                    'Connection': 'keep-alive'
-                }
-                response = requests.get(image_url, timeout=10, headers=headers, stream=True)
+                if probe is None or probe.width is None:
+                    continue
                 
-                if response.status_code == 200:
-                    content_length = response.headers.get('content-length')
-                    if content_length and int(content_length) < 5000:
-                        continue
-                        
-                    img = Image.open(BytesIO(response.content))
-                    width, height = img.size
-                    
-                    # РЕАЛІСТИЧНІ ВИМОГИ ДО ЯКОСТІ
-                    logging.info(f"🔍 Перевіряю зображення: {width}x{height}")
-                    
-                    if width < min_width or height < min_height:  # 600x400 мінімум
-                        logging.warning(f"❌ Зображення замале: {width}x{height} (потрібно мінімум {min_width}x{min_height})")
-                        continue
-                        
-                    total_pixels = width * height
-                    if total_pixels < min_pixels:  # 240K пікселів мінімум
-                        logging.warning(f"❌ Недостатньо пікселів: {total_pixels} (потрібно мінімум {min_pixels})")
-                        continue
-                    
-                    # ПРИЙМАЄМО ВСІ ОРІЄНТАЦІЇ - горизонтальні, вертикальні, квадратні
-                    logging.info(f"✅ ЗНАЙДЕНО ЯКІСНЕ ФОТО: {width}x{height} ({total_pixels} пікселів)")
-                    
-                    # Конвертуємо в RGB для Instagram (виправляє помилку з mode P)
-                    if img.mode != 'RGB':
-                        original_mode = img.mode
-                        img = img.convert('RGB')
-                        logging.info(f"🔄 Конвертовано з {original_mode} в RGB")
+                width, height = probe.width, probe.height
+                total_pixels = width * height
+                
+                # РЕАЛІСТИЧНІ ВИМОГИ ДО ЯКОСТІ
+                logging.info(f"🔍 Перевіряю зображення: {width}x{height}")
+                
+                if width < min_width or height < min_height:  # 600x400 мінімум
+                    logging.warning(f"❌ Зображення замале: {width}x{height} (потрібно мінімум {min_width}x{min_height})")
+                    continue
                     
-                    logging.info(f"🎉 ПОВЕРТАЮ ЯКІСНЕ ЗОБРАЖЕННЯ {width}x{height}")
-                    # Якщо дійшли сюди - зображення підходить!
-                    return img
+                if total_pixels < min_pixels:  # 240K пікселів мінімум
+                    logging.warning(f"❌ Недостатньо пікселів: {total_pixels} (потрібно мінімум {min_pixels})")
+                    continue
+                
+                if not probe.ok:
+                    continue
+                
+                # ПРИЙМАЄМО ВСІ ОРІЄНТАЦІЇ - горизонтальні, вертикальні, квадратні
+                logging.info(f"✅ ЗНАЙДЕНО ЯКІСНЕ ФОТО: {width}x{height} ({total_pixels} пікселів)")
+                
+                # Конвертуємо в RGB для Instagram (виправляє помилку з mode P)
+                img = self._to_rgb(probe.open())
+                
+                logging.info(f"🎉 ПОВЕРТАЮ ЯКІСНЕ ЗОБРАЖЕННЯ {width}x{height}")
+                # Якщо дійшли сюди - зображення підходить!
+                return img
                     
             except Exception:
                 continue
@@ -632,100 +716,140 @@ class SimpleInstagramBot:
         return None  # Не знайдено підходящих зображень
     
     def extract_images_from_full_article(self, article_url):
-        """Завантажує HTML статті і повертає список URL зображень, віддаючи пріоритет головним (main/hero/featured)."""
+        """Повертає URL зображень статті: спершу головні з `<head>` (og/twitter/JSON-LD), інакше — розбір усього DOM."""
+        try:
+            # Результат мемоізується в кеші сторінок: повторні виклики за цикл не ходять у мережу
+            images = get_page_cache().parsed(article_url, 'page_images', lambda: self._load_page_images(article_url))
+            return list(images)
+        except Exception as e:
+            logging.warning(f"⚠️ Не вдалося завантажити статтю {article_url}: {e}")
+            return []
+    
+    def _load_page_images(self, article_url):
+        """Шукає зображення сторінки: з кешу сторінок, а якщо її там немає — потоково, до кінця `<head>`."""
+        page_cache = get_page_cache()
+        html = page_cache.get(article_url)
+        if html is not None:
+            # Сторінку вже завантажила стадія збагачення — розбираємо без мережі
+            hero_images = page_cache.parsed(
+                article_url, 'hero', lambda: extract_head_images(head_section(html), article_url)
+            )
+            if hero_images:
+                logging.info(f"📸 Знайдено {len(hero_images)} головних зображень у <head> (сторінка з кешу)")
+                return hero_images[:15]
+            return self._extract_images_from_dom(html, article_url)
+        
+        # Читаємо сторінку потоково і зупиняємось на кінці <head>, якщо там є головне фото
+        response = http_get(article_url, kind='html', timeout=15, stream=True)
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'uk-UA,uk;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = requests.get(article_url, headers=headers, timeout=15)
             if response.status_code != 200:
                 return []
-                
-            soup = BeautifulSoup(response.content, 'html.parser')
             
-            image_urls = []
-            priority_images = []
-            
-            # Шукаємо зображення в різних тегах
-            img_tags = soup.find_all('img')
-            
-            for img in img_tags:
-                # Отримуємо URL з різних атрибутів - включаючи ОРИГІНАЛЬНІ версії
-                potential_srcs = [
-                    img.get('data-original'),    # Оригінал
-                    img.get('data-full'),        # Повний розмір
-                    img.get('data-large'),       # Великий розмір
-                    img.get('data-src'),         # Lazy loading
-                    img.get('data-lazy-src'),    # Lazy loading
-                    img.get('src')               # Стандартний
-                ]
-                
-                src = None
-                for potential_src in potential_srcs:
-                    if potential_src and potential_src.strip():
-                        src = potential_src.strip()
-                        break
-                
-                if not src:
-                    continue
-                    
-                # Перетворюємо відносні URL в абсолютні
-                if src.startswith('//'):
-                    src = 'https:' + src
-                elif src.startswith('/'):
-                    from urllib.parse import urljoin
-                    src = urljoin(article_url, src)
+            head_bytes, head_complete, rest_chunks = read_head(response)
+            head_html = decode_html(response, head_bytes)
+            if head_complete:
+                hero_images = page_cache.parsed(
+                    article_url, 'hero', lambda: extract_head_images(head_html, article_url)
+                )
+            else:
+                # Кінця <head> немає в межах ліміту — результат з обрізаного head не мемоізуємо
+                # (розбір кешованої сторінки має бачити повний head)
+                hero_images = extract_head_images(head_html, article_url)
+            if hero_images:
+                logging.info(f"📸 Знайдено {len(hero_images)} головних зображень у <head> (без розбору всієї сторінки)")
+                return hero_images[:15]
+            
+            # Головного фото в <head> немає — докачуємо решту сторінки для повного розбору
+            html = decode_html(response, head_bytes + b''.join(rest_chunks))
+        finally:
+            response.close()
+        
+        page_cache.put(article_url, html)
+        return self._extract_images_from_dom(html, article_url)
+    
+    def _extract_images_from_dom(self, html, article_url):
+        """Повний розбір HTML: повертає URL зображень, віддаючи пріоритет головним (main/hero/featured)."""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        image_urls = []
+        priority_images = []
+        
+        # Шукаємо зображення в різних тегах
+        img_tags = soup.find_all('img')
+        
+        for img in img_tags:
+            # Отримуємо URL з різних атрибутів - включаючи ОРИГІНАЛЬНІ версії
+            potential_srcs = [
+                img.get('data-original'),    # Оригінал
+                img.get('data-full'),        # Повний розмір
+                img.get('data-large'),       # Великий розмір
+                img.get('data-src'),         # Lazy loading
+                img.get('data-lazy-src'),    # Lazy loading
+                img.get('src')               # Стандартний
+            ]
+            
+            src = None
+            for potential_src in potential_srcs:
+                if potential_src and potential_src.strip():
+                    src = potential_src.strip()
+                    break
+            
+            if not src:
+                continue
                 
-                # Фільтруємо непотрібні зображення ЩЕ ЖОРСТКІШЕ
-                if any(skip in src.lower() for skip in [
-                    'icon', 'logo', 'avatar', 'button', '1x1', 'pixel', 
-                    'advertisement', 'banner', 'social', 'share', 'thumb',
-                    'widget', 'badge', 'flag', 'arrow', 'spacer', 'clear'
-                ]):
-                    continue
+            # Перетворюємо відносні URL в абсолютні
+            if src.startswith('//'):
+                src = 'https:' + src
+            elif src.startswith('/'):
+                from urllib.parse import urljoin
+                src = urljoin(article_url, src)
+            
+            # Фільтруємо непотрібні зображення ЩЕ ЖОРСТКІШЕ
+            if any(skip in src.lower() for skip in [
+                'icon', 'logo', 'avatar', 'button', '1x1', 'pixel', 
+                'advertisement', 'banner', 'social', 'share', 'thumb',
+                'widget', 'badge', 'flag', 'arrow', 'spacer', 'clear'
+            ]):
+                continue
+            
+            # Перевіряємо розміри по URL (якщо вказані)
+            import re
+            size_match = re.search(r'(\d{3,4})x(\d{3,4})', src)
+            if size_match:
+                width, height = int(size_match.group(1)), int(size_match.group(2))
+                if width < 800 or height < 600:
+                    continue  # Пропускаємо маленькі зображення
+            
+            # Перевіряємо чи це реальне зображення
+            if any(ext in src.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp']):
+                # ВИСОКИЙ ПРІОРИТЕТ для головних зображень
+                img_classes = ' '.join(img.get('class', [])).lower()
+                img_id = img.get('id', '').lower()
+                parent_classes = ''
+                if img.parent:
+                    parent_classes = ' '.join(img.parent.get('class', [])).lower()
                 
-                # Перевіряємо розміри по URL (якщо вказані)
-                import re
-                size_match = re.search(r'(\d{3,4})x(\d{3,4})', src)
-                if size_match:
-                    width, height = int(size_match.group(1)), int(size_match.group(2))
-                    if width < 800 or height < 600:
-                        continue  # Пропускаємо маленькі зображення
+                is_priority = any(pattern in img_classes + img_id + parent_classes for pattern in [
+                    'main', 'hero', 'article', 'content', 'featured', 'primary', 
+                    'story', 'news', 'photo', 'image', 'big', 'large', 'full'
+                ])
                 
-                # Перевіряємо чи це реальне зображення
-                if any(ext in src.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp']):
-                    # ВИСОКИЙ ПРІОРИТЕТ для головних зображень
-                    img_classes = ' '.join(img.get('class', [])).lower()
-                    img_id = img.get('id', '').lower()
-                    parent_classes = ''
-                    if img.parent:
-                        parent_classes = ' '.join(img.parent.get('class', [])).lower()
-                    
-                    is_priority = any(pattern in img_classes + img_id + parent_classes for pattern in [
-                        'main', 'hero', 'article', 'content', 'featured', 'primary', 
-                        'story', 'news', 'photo', 'image', 'big', 'large', 'full'
-                    ])
-                    
-                    if is_priority:
-                        priority_images.insert(0, src)  # Найвищий пріоритет
-                    else:
-                        image_urls.append(src)
-            
-            # Об'єднуємо з пріоритетом
-            all_images = priority_images + image_urls
-            
-            logging.info(f"📸 Знайдено {len(all_images)} зображень на сторінці ({len(priority_images)} пріоритетних)")
-            return all_images[:15]  # Беремо більше для аналізу
-            
-        except Exception as e:
-            logging.warning(f"⚠️ Не вдалося завантажити статтю {article_url}: {e}")
-            return []
+                if is_priority:
+                    priority_images.insert(0, src)  # Найвищий пріоритет
+                else:
+                    image_urls.append(src)
+        
+        # Об'єднуємо з пріоритетом
+        all_images = priority_images + image_urls
+        
+        logging.info(f"📸 Знайдено {len(all_images)} зображень на сторінці ({len(priority_images)} пріоритетних)")
+        return all_images[:15]  # Беремо більше для аналізу
+
+def create_account_bots(accounts=None):
+    """Створює ботів для всіх акаунтів (за замовчуванням — з load_accounts) зі спільним конвеєром новин."""
+    pipeline = SharedPipeline()
+    return [SimpleInstagramBot(account, pipeline) for account in (accounts or load_accounts())]
+
 
 def main():
     """Головна функція"""
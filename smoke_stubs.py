@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Smoke-перевірка перекладу і генерації поста через локальні стаби (translation_stub_server, openai_stub_server).
+
+Обидва стаби піднімаються у фонових потоках на вільних портах, кеші — у тимчасовій теці, тож скрипт не чіпає
+ні робочих кешів бота, ні справжніх API:
+- переклад: кілька англійських статей — один запит до стаба, повтор — повністю з кешу TranslationCache;
+- генерація: generate_ai_post — один запит до стаба (опис і хештеги разом), повтор — з кешу LLMResponseCache.
+
+Запуск: python smoke_stubs.py (ненульовий код виходу — якщо перевірка не пройшла).
+"""
+
+import os
+import sys
+import tempfile
+from stub_server import start_stub
+from translation_stub_server import StubTranslateHandler
+from openai_stub_server import StubChatHandler
+from translation_backend import LibreTranslateBackend, BatchTranslator, TranslationCache
+from translator import NewsTranslator
+from llm_client import LLMClient, LLMResponseCache
+from content_generator import ContentGenerator
+
+SAMPLE_ARTICLES = [
+    {
+        'title': 'Air defense repelled a massive drone attack on Kyiv',
+        'summary': 'Debris fell in several districts of the capital.',
+        'text': 'Air defense was active overnight. Debris fell in several districts. No casualties were reported.',
+    },
+    {
+        'title': 'National Bank kept the key rate unchanged',
+        'summary': 'The regulator expects inflation to slow down.',
+        'text': 'The National Bank kept the key rate unchanged. The regulator expects inflation to slow down.',
+    },
+]
+
+
+def check(condition, message):
+    """Друкує результат перевірки; повертає її успіх."""
+    print(f"{'✅' if condition else '❌'} {message}")
+    return condition
+
+
+def smoke_translation(server, workdir):
+    """Статті перекладаються одним пакетом, повтор не звертається до стаба."""
+    backend = LibreTranslateBackend(url=f"{server.base_url}/translate")
+    cache = TranslationCache(path=os.path.join(workdir, 'translation_cache.json'))
+    translator = NewsTranslator(BatchTranslator(backend, cache))
+
+    translated = translator.translate_articles(SAMPLE_ARTICLES)
+    ok = check(server.requests_served == 1, f"переклад {len(SAMPLE_ARTICLES)} статей — запитів: {server.requests_served}")
+    ok &= check(all(article['title'].startswith('[uk] ') for article in translated), "заголовки перекладено")
+
+    translator.translate_articles(SAMPLE_ARTICLES)
+    ok &= check(server.requests_served == 1, "повторний переклад — з кешу")
+    return ok
+
+
+def smoke_generation(server, workdir):
+    """Опис і хештеги — одним запитом до моделі, повтор береться з кешу відповідей."""
+    llm = LLMClient(
+        api_key='stub', base_url=f"{server.base_url}/v1",
+        cache=LLMResponseCache(path=os.path.join(workdir, 'llm_cache.json'))
+    )
+    generator = ContentGenerator(llm=llm)
+    article = SAMPLE_ARTICLES[0]
+
+    description, hashtags = generator.generate_ai_post(article['title'], article['summary'])
+    ok = check(server.requests_served == 1, f"генерація поста — запитів: {server.requests_served}")
+    ok &= check(bool(description.strip()) and hashtags.startswith('#'), "є опис і хештеги")
+
+    generator.generate_ai_post(article['title'], article['summary'])
+    ok &= check(server.requests_served == 1, "повторна генерація — з кешу")
+    return ok
+
+
+def main():
+    translate_server = start_stub(StubTranslateHandler)
+    chat_server = start_stub(StubChatHandler)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            ok = smoke_translation(translate_server, workdir)
+            ok &= smoke_generation(chat_server, workdir)
+    finally:
+        for server in (translate_server, chat_server):
+            server.shutdown()
+            server.server_close()
+
+    print("\n✅ Smoke-перевірка пройдена" if ok else "\n❌ Smoke-перевірка не пройдена")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
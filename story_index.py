@@ -0,0 +1,248 @@
+"""
+Пошук майже однакових новин між фідами та циклами збору (одна подія — кілька трохи різних статей ТСН).
+
+Ключові функції/класи:
+- story_text: нормалізований текст запису RSS — заголовок і лід (без HTML, регістру, пунктуації і службових слів).
+- minhash / similarity: MinHash-підпис множини слів і оцінка схожості Жаккара двох текстів за підписами.
+- story_signature: підпис RSS-заголовка і ліду статті; рахується до збагачення і зберігається в самій статті
+  (збагачення замінює заголовок на заголовок сторінки, а індекс має порівнювати саме RSS-версії).
+- group_stories: групує записи циклу в історії — версії однієї події з різних фідів (LSH по підписах).
+- StoryStream: ітератор для ледачого конвеєра — з кожної історії спершу лише перший запис; наступна версія йде
+  на завантаження тільки якщо попередню відкинуто (reject: немає сторінки, фото, застаріла).
+- StoryIndex: ковзний індекс опублікованих історій (JSON між перезапусками) з LSH-розбиттям підпису на смуги:
+  кандидати — лише історії, що збіглися хоча б в одній смузі (кілька звернень до словника замість перебору),
+  повтором вважається кандидат зі схожістю не менше STORY_SIMILARITY. Оригіналом стає лише опублікована стаття —
+  відкинута (без фото, погана якість) версія не приховує інші версії тієї ж події.
+  - find_original: чи є вже опублікована історія, близька до цього запису;
+  - mark_published: додає опубліковану статтю в індекс;
+  - prune: прибирає історії, яких (і їх повторів) не було у фідах довше за STORY_INDEX_TTL_HOURS.
+"""
+
+import re
+import html
+import time
+from collections import deque
+import struct
+import hashlib
+from functools import lru_cache
+from news_cache import JsonFileStore, entry_key
+from config import STORY_INDEX_FILE, STORY_INDEX_TTL_HOURS, STORY_SIMILARITY
+
+# MinHash: кількість хеш-функцій і розбиття підпису на смуги LSH (BANDS × ROWS = PERMUTATIONS).
+# Поріг LSH ≈ (1 / BANDS) ** (1 / ROWS): 16 × 4 → 0.5, тобто близько STORY_SIMILARITY — кандидатами стають
+# переважно справжні повтори, а не будь-які новини зі спільною лексикою
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+# Скільки слів тримати з готовими хешами
+WORD_CACHE_SIZE = 50000
+
+# Службові слова (українські та англійські) є майже в кожній новині і лише завищують схожість
+STOP_WORDS = frozenset('''
+    та що як не від по про для але чи або його її їх він вона вони воно ми ви це цей ця ці цих той те ті
+    бо так ще вже який яка яке які якого також після через під над при між щодо коли де там тут зі із
+    до за на було були буде має мають може можуть
+    the and of to in on for with is are was were be at by from that this as an it its has have
+'''.split())
+
+_TAG = re.compile(r'<[^>]+>')
+_WORD = re.compile(r'\w+')
+_SIGNATURE = struct.Struct(f'<{PERMUTATIONS}I')
+
+
+def story_text(article):
+    """Нормалізований заголовок і лід статті (RSS-поля, без завантаження сторінки)."""
+    lead = article.get('description') or article.get('summary') or ''
+    text = html.unescape(_TAG.sub(' ', f"{article.get('title', '')} {lead}"))
+    return ' '.join(word for word in _WORD.findall(text.casefold()) if len(word) > 1 and word not in STOP_WORDS)
+
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def _word_hashes(word):
+    """PERMUTATIONS 32-бітних хешів слова одним викликом SHAKE (словник новин повторюється — результат кешується)."""
+    return _SIGNATURE.unpack(hashlib.shake_128(word.encode('utf-8')).digest(_SIGNATURE.size))
+
+
+def minhash(text):
+    """MinHash-підпис множини слів тексту (PERMUTATIONS 32-бітних мінімумів); None — для порожнього тексту."""
+    words = set(text.split())
+    if not words:
+        return None
+    # Мінімуми по стовпцях рахує C (zip/min), без циклу по хеш-функціях у Python
+    return list(map(min, zip(*map(_word_hashes, words))))
+
+
+def similarity(a, b):
+    """Оцінка коефіцієнта Жаккара двох текстів за їх MinHash-підписами."""
+    return sum(x == y for x, y in zip(a, b)) / PERMUTATIONS
+
+
+def _bands(signature):
+    """Ключі кошиків LSH: (номер смуги, ROWS значень підпису) — близькі тексти збігаються хоча б в одній смузі."""
+    return [(index, tuple(signature[index * ROWS:(index + 1) * ROWS])) for index in range(BANDS)]
+
+
+# Поле статті з MinHash-підписом її RSS-заголовка і ліду
+SIGNATURE_FIELD = 'story_signature'
+
+
+def story_signature(article):
+    """Підпис RSS-версії статті: рахується при першому виклику (до збагачення) і зберігається в статті."""
+    if SIGNATURE_FIELD not in article:
+        article[SIGNATURE_FIELD] = minhash(story_text(article))
+    return article[SIGNATURE_FIELD]
+
+
+def group_stories(articles, threshold=STORY_SIMILARITY):
+    """Повертає історії циклу — списки версій однієї події в порядку фідів (перша версія — першою)."""
+    stories = []
+    buckets = {}
+    for article in articles:
+        signature = story_signature(article)
+        if not signature:
+            stories.append([article])
+            continue
+        # Версію порівнюємо з першими версіями історій, що збіглися з нею хоча б в одній смузі
+        match = None
+        for band in _bands(signature):
+            for index in buckets.get(band, ()):
+                if similarity(signature, story_signature(stories[index][0])) >= threshold:
+                    match = index
+                    break
+            if match is not None:
+                break
+        if match is not None:
+            stories[match].append(article)
+            continue
+        for band in _bands(signature):
+            buckets.setdefault(band, []).append(len(stories))
+        stories.append([article])
+    return stories
+
+
+class StoryStream:
+    def __init__(self, stories, entry_filter=None):
+        """Ітератор по історіях (group_stories); `entry_filter` відсіює записи, яких не треба завантажувати."""
+        self._stories = deque(stories)
+        self._fallback = deque()
+        self._pending = {}
+        self.entry_filter = entry_filter
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        """Наступний запис: спершу запасні версії відкинутих історій, потім перші версії нових."""
+        while True:
+            if self._fallback:
+                article, rest = self._fallback.popleft()
+            elif self._stories:
+                story = self._stories.popleft()
+                article, rest = story[0], story[1:]
+            else:
+                # Ітератор «оживає», щойно reject додасть запасну версію
+                raise StopIteration
+            if self.entry_filter and not self.entry_filter(article):
+                # Історію вже висвітлено (опублікована або її повтор) — інші версії теж не потрібні
+                continue
+            self._pending[id(article)] = rest
+            return article
+
+    def reject(self, article):
+        """Запис відкинуто після завантаження — у чергу стає наступна версія тієї ж історії (якщо є)."""
+        rest = self._pending.pop(id(article), None)
+        if rest:
+            self._fallback.append((rest[0], rest[1:]))
+
+
+class StoryIndex(JsonFileStore):
+    timestamp_field = 'last_seen'
+
+    def __init__(self, path=STORY_INDEX_FILE, ttl_hours=STORY_INDEX_TTL_HOURS, threshold=STORY_SIMILARITY):
+        """Завантажує ковзний індекс опублікованих історій і будує кошики LSH у пам'яті."""
+        super().__init__(path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.threshold = threshold
+        self._buckets = {}
+        # Записи старого формату (усі побачені, не лише опубліковані історії) не переносимо
+        self._data = {key: entry for key, entry in self._data.items()
+                      if entry.get('published_at') and entry.get('signature')}
+        self.prune()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def _rebuild(self):
+        """Перебудовує кошики з self._data (під self._lock)."""
+        self._buckets = {}
+        for key, entry in self._data.items():
+            self._index(key, entry['signature'])
+
+    def _index(self, key, signature):
+        for band in _bands(signature):
+            self._buckets.setdefault(band, set()).add(key)
+
+    def _unindex(self, key, signature):
+        """Прибирає ключ з кошиків старого підпису (порожні кошики видаляються)."""
+        for band in _bands(signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def find_original(self, article):
+        """Повертає ключ опублікованої історії, близької до RSS-версії `article` (тоді `article` — повтор), або None."""
+        key = entry_key(article)
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                # Сама опублікована стаття — не повтор; вона ще у фідах, тож тримаємо її в індексі
+                entry['last_seen'] = now
+                return None
+
+        signature = story_signature(article)
+        if not signature:
+            return None
+        with self._lock:
+            candidates = set()
+            for band in _bands(signature):
+                candidates |= self._buckets.get(band, set())
+            best = None
+            for other_key in candidates:
+                other = self._data.get(other_key)
+                if not other or not other.get('signature'):
+                    continue
+                score = similarity(signature, other['signature'])
+                if score >= self.threshold and (best is None or score > best[0]):
+                    best = (score, other_key)
+            if best is None:
+                return None
+            # Поки у фідах з'являються повтори, історія лишається актуальною
+            self._data[best[1]]['last_seen'] = now
+            return best[1]
+
+    def mark_published(self, article):
+        """Додає опубліковану статтю: відтепер її майже однакові версії з інших фідів вважаються повторами."""
+        key = entry_key(article)
+        # Підпис, збережений до збагачення, — з RSS-заголовка і ліду, як у find_original
+        signature = story_signature(article)
+        if not signature:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._unindex(key, entry['signature'])
+            self._data[key] = {'signature': signature, 'published_at': now, 'last_seen': now}
+            self._index(key, signature)
+
+    def prune(self, field=None):
+        """Видаляє історії, не бачені у фідах довше за TTL; повертає кількість видалених."""
+        removed = super().prune(field)
+        if removed or not self._buckets:
+            with self._lock:
+                self._rebuild()
+        return removed
@@ -0,0 +1,83 @@
+"""
+Спільна основа локальних стабів HTTP API (translation_stub_server.py, openai_stub_server.py).
+
+Ключові класи/функції:
+- JsonStubHandler: обробник з відповідями JSON, розбором тіла запиту і тихим логом http.server.
+- StubServer: ThreadingHTTPServer з лічильником обслужених запитів (count_request / requests_served).
+- start_stub: запускає стаб у фоновому потоці (port=0 — вільний порт) — для скриптів і smoke-перевірок.
+- run_stub: точка входу `main()` стаба — аргументи --host/--port і serve_forever до Ctrl+C.
+"""
+
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler):
+        """Сервер стаба; лічильник запитів спільний для всіх потоків обробки."""
+        super().__init__(address, handler)
+        self.requests_served = 0
+        self._counter_lock = threading.Lock()
+
+    def count_request(self):
+        """Збільшує лічильник і повертає номер поточного запиту."""
+        with self._counter_lock:
+            self.requests_served += 1
+            return self.requests_served
+
+    @property
+    def base_url(self):
+        """http://host:port сервера (з фактичним портом, якщо запускали з port=0)."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class JsonStubHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self, error):
+        """Повертає тіло запиту як JSON; при помилці відповідає 400 з `error` і повертає None."""
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            return json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, error)
+            return None
+
+    def log_message(self, format, *args):
+        # Стандартний лог http.server не потрібен — вистачає рядка про кожен запит
+        pass
+
+
+def start_stub(handler, host='127.0.0.1', port=0):
+    """Запускає стаб у фоновому потоці й повертає StubServer (зупинка — shutdown() і server_close())."""
+    server = StubServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_stub(handler, description, default_port, path=''):
+    """Розбирає --host/--port і обслуговує запити до Ctrl+C; `path` — шлях API для рядка запуску."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=default_port)
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), handler)
+    print(f"{description} слухає {server.base_url}{path} (Ctrl+C — зупинити)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,82 @@
+"""
+Попередньо скомпільоване очищення тексту новин для ContentGenerator.
+
+Ключові функції:
+- clean_text: прибирає HTML/URL/копірайт/рекламу/службові рядки та нормалізує пробіли
+  (результат ідентичний старому ланцюжку з ~20 викликів re.sub — див. bench_text_cleaner.py).
+- is_unwanted_sentence: одна скомпільована альтернатива замість окремого re.search на кожен патерн.
+
+Кожен крок має дешеву перевірку-маркер (`in` по рядку): якщо маркера немає, регулярний вираз не запускається.
+Порядок кроків збережено — попередні видалення можуть «склеїти» текст у збіг для наступних.
+"""
+
+import re
+
+# (маркери, перевіряти по casefold-копії, патерн) — маркер є необхідною умовою збігу патерну.
+# Для IGNORECASE-патернів маркери перевіряються по text.casefold(): re вважає рівними, наприклад, 's' і 'ſ'
+_CLEANING_STEPS = [
+    # HTML теги та entities
+    (('<',), False, re.compile(r'<[^>]+>')),
+    (('&',), False, re.compile(r'&[a-zA-Z0-9#]+;')),
+    # Посилання та URL (окремими кроками: `www.` перед видаленим http-посиланням має лишитись)
+    (('http',), False, re.compile(r'https?://[^\s]+')),
+    (('www.',), False, re.compile(r'www\.[^\s]+')),
+    # Зірочки
+    (('*',), False, re.compile(r'\*+')),
+    # Слово "Реклама" і варіації
+    (('еклама',), True, re.compile(r'\b[Рр]еклама\b', re.IGNORECASE)),
+    (('dvert',), True, re.compile(r'\b[Аа]dvertisement\b', re.IGNORECASE)),
+    # Посилання на джерела зображень
+    (('©',), False, re.compile(r'©\s*[^\s]+\.[a-z]{2,4}', re.IGNORECASE)),
+    (('©',), False, re.compile(r'[Кк]урс валют?\s*/\s*©.*')),
+    (('unsplash',), True, re.compile(r'unsplash\.com', re.IGNORECASE)),
+    (('getty',), True, re.compile(r'getty\s*images?', re.IGNORECASE)),
+    (('shutterstock',), True, re.compile(r'shutterstock', re.IGNORECASE)),
+    # Технічна інформація до кінця рядка: чотири колишні кроки в одному (обрізання рядка з найранішого маркера
+    # дає той самий результат, що й послідовні обрізання)
+    (('©', 'Джерело:', 'Фото:', 'Повний текст новини'), False,
+     re.compile(r'(?:©|Джерело:|Фото:|Повний текст новини).*$', re.MULTILINE)),
+]
+
+_UNWANTED_SENTENCE = re.compile(
+    '|'.join([
+        r'\*+',  # Зірочки
+        r'[Рр]еклама',  # Реклама
+        r'©.*',  # Копірайт
+        r'unsplash',  # Unsplash
+        r'getty',  # Getty Images
+        r'shutterstock',  # Shutterstock
+        r'[Дд]жерело:',  # Джерело
+        r'[Фф]ото:',  # Фото
+        r'курс валют.*©',  # Курс валют з копірайтом
+    ]),
+    re.IGNORECASE
+)
+
+
+def clean_text(text):
+    """Повністю прибирає HTML/URL/копірайт/рекламу/службові рядки; нормалізує пробіли."""
+    if not text:
+        return text
+
+    folded = None
+    for markers, by_casefold, pattern in _CLEANING_STEPS:
+        if by_casefold:
+            if folded is None:
+                folded = text.casefold()
+            haystack = folded
+        else:
+            haystack = text
+        if any(marker in haystack for marker in markers):
+            cleaned = pattern.sub('', text)
+            if cleaned != text:
+                text = cleaned
+                folded = None
+
+    # Зайві пробіли та порожні рядки: те саме, що re.sub(r'\s+', ' ') + strip(), без регулярного виразу
+    return ' '.join(text.split())
+
+
+def is_unwanted_sentence(sentence):
+    """Повертає True, якщо речення містить небажані патерни (реклама/копірайт/посилання тощо)."""
+    return _UNWANTED_SENTENCE.search(sentence) is not None
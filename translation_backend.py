@@ -0,0 +1,178 @@
+"""
+Бекенди перекладу з пакетною обробкою та постійним кешем.
+
+Ключові класи/функції:
+- TranslationBackend: інтерфейс бекенда — translate_batch(texts, source, target) повертає переклади в тому ж порядку.
+- NullBackend: без перекладу (тексти повертаються як є) — поведінка за замовчуванням.
+- LibreTranslateBackend: HTTP API, сумісне з LibreTranslate (`q` — масив сегментів): пакети до TRANSLATION_BATCH_CHARS
+  символів, не більше TRANSLATION_MAX_CONCURRENCY одночасних запитів (локальний стаб — translation_stub_server.py).
+- TranslationCache: постійний кеш перекладів за хешем вихідного тексту (JSON, TTL).
+- BatchTranslator: прибирає повтори, бере готове з кешу і перекладає всі промахи одним викликом бекенда.
+- get_translation_backend: бекенд за налаштуванням TRANSLATION_BACKEND.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http_client import http_post_json
+from news_cache import JsonFileStore, content_hash
+from config import (
+    TRANSLATION_BACKEND, TRANSLATION_API_URL, TRANSLATION_API_KEY, TRANSLATION_BATCH_CHARS,
+    TRANSLATION_MAX_CONCURRENCY, TRANSLATION_TIMEOUT_SECONDS, TRANSLATION_CACHE_FILE, TRANSLATION_CACHE_TTL_DAYS
+)
+
+
+class TranslationError(RuntimeError):
+    """Бекенд перекладу повернув помилку або відповідь неочікуваного формату."""
+
+
+class TranslationBackend:
+    # False — бекенд нічого не перекладає, і BatchTranslator не витрачає час на кеш
+    enabled = True
+
+    def translate_batch(self, texts, source='auto', target='uk'):
+        """Повертає список перекладів `texts` (той самий розмір і порядок)."""
+        raise NotImplementedError
+
+
+class NullBackend(TranslationBackend):
+    enabled = False
+
+    def translate_batch(self, texts, source='auto', target='uk'):
+        """Повертає тексти без змін."""
+        return list(texts)
+
+
+class LibreTranslateBackend(TranslationBackend):
+    def __init__(self, url=TRANSLATION_API_URL, api_key=TRANSLATION_API_KEY, batch_chars=TRANSLATION_BATCH_CHARS,
+                 max_concurrency=TRANSLATION_MAX_CONCURRENCY, timeout=TRANSLATION_TIMEOUT_SECONDS):
+        """Налаштовує клієнт API; семафор обмежує одночасні запити з усіх потоків процесу."""
+        self.url = url
+        self.api_key = api_key
+        self.batch_chars = batch_chars
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    def _batches(self, texts):
+        """Розбиває сегменти на пакети до `batch_chars` символів (сегмент, довший за ліміт, — окремий пакет)."""
+        batches = []
+        current, size = [], 0
+        for text in texts:
+            if current and size + len(text) > self.batch_chars:
+                batches.append(current)
+                current, size = [], 0
+            current.append(text)
+            size += len(text)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _post(self, batch, source, target):
+        """Надсилає один пакет і повертає його переклади."""
+        payload = {'q': batch, 'source': source, 'target': target, 'format': 'text'}
+        if self.api_key:
+            payload['api_key'] = self.api_key
+        with self._slots:
+            response = http_post_json(self.url, payload, timeout=self.timeout)
+        if response.status_code != 200:
+            raise TranslationError(f"HTTP {response.status_code}: {response.text[:200]}")
+        translated = response.json().get('translatedText')
+        if isinstance(translated, str) and len(batch) == 1:
+            translated = [translated]
+        if not isinstance(translated, list) or len(translated) != len(batch):
+            raise TranslationError("кількість перекладів не збігається з кількістю сегментів")
+        return translated
+
+    def translate_batch(self, texts, source='auto', target='uk'):
+        """Перекладає сегменти пакетами; кілька пакетів відправляються паралельно (в межах ліміту)."""
+        batches = self._batches(list(texts))
+        if not batches:
+            return []
+        if len(batches) == 1:
+            return self._post(batches[0], source, target)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches)),
+                                thread_name_prefix='translate') as executor:
+            results = executor.map(lambda batch: self._post(batch, source, target), batches)
+            return [translated for batch_result in results for translated in batch_result]
+
+
+class TranslationCache(JsonFileStore):
+    timestamp_field = 'used_at'
+
+    def __init__(self, path=TRANSLATION_CACHE_FILE, ttl_days=TRANSLATION_CACHE_TTL_DAYS):
+        """Завантажує кеш перекладів і відкидає записи, що не використовувались довше за TTL."""
+        super().__init__(path)
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self.prune()
+
+    @staticmethod
+    def key(text, source, target):
+        """Ключ запису: напрям перекладу + хеш вихідного тексту."""
+        return f"{source}>{target}:{content_hash(text)}"
+
+    def get(self, key):
+        """Повертає збережений переклад або None (і оновлює час використання)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if not entry:
+                return None
+            entry['used_at'] = time.time()
+            return entry.get('text')
+
+    def add(self, key, translated):
+        """Запам'ятовує переклад для ключа."""
+        with self._lock:
+            self._data[key] = {'used_at': time.time(), 'text': translated}
+
+
+class BatchTranslator:
+    def __init__(self, backend=None, cache=None):
+        """Поєднує бекенд і кеш; кеш створюється лише для бекенда, що справді перекладає."""
+        self.backend = backend or get_translation_backend()
+        self.cache = cache if cache is not None else (TranslationCache() if self.backend.enabled else None)
+
+    def translate(self, texts, source='auto', target='uk'):
+        """Повертає переклади сегментів; усі промахи кешу — одним викликом бекенда, при збої — оригінали."""
+        results = list(texts)
+        if not self.backend.enabled:
+            return results
+
+        # Однакові сегменти (повтори речень, заголовок у тексті) перекладаємо один раз
+        missing = {}
+        for index, text in enumerate(results):
+            if not text or not text.strip():
+                continue
+            cached = self.cache.get(TranslationCache.key(text, source, target))
+            if cached is not None:
+                results[index] = cached
+            else:
+                missing.setdefault(text, []).append(index)
+
+        if not missing:
+            return results
+
+        unique_texts = list(missing)
+        try:
+            translated = self.backend.translate_batch(unique_texts, source, target)
+        except Exception as e:
+            print(f"Переклад недоступний, залишаю оригінал ({len(unique_texts)} сегментів): {e}")
+            return results
+
+        for text, translated_text in zip(unique_texts, translated):
+            self.cache.add(TranslationCache.key(text, source, target), translated_text)
+            for index in missing[text]:
+                results[index] = translated_text
+        self.cache.save()
+        return results
+
+
+def get_translation_backend(name=TRANSLATION_BACKEND):
+    """Повертає бекенд перекладу за назвою ('none' | 'libretranslate')."""
+    name = (name or 'none').strip().lower()
+    if name == 'libretranslate':
+        return LibreTranslateBackend()
+    if name != 'none':
+        print(f"Невідомий бекенд перекладу '{name}', переклад вимкнено")
+    return NullBackend()
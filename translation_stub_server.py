@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Локальний стаб API перекладу (сумісний з LibreTranslate) для ручних тестів.
+
+Запуск:
+    python translation_stub_server.py --port 5000
+    TRANSLATION_BACKEND=libretranslate TRANSLATION_API_URL=http://127.0.0.1:5000/translate python test_post.py
+
+POST /translate приймає {"q": рядок | [рядки], "source": ..., "target": ...} і повертає
+{"translatedText": ...} того ж вигляду: кожен сегмент з префіксом "[<target>] ".
+У консоль пишеться кількість сегментів у кожному запиті — зручно перевіряти, що переклад іде пакетами.
+"""
+
+from stub_server import JsonStubHandler, run_stub
+
+
+class StubTranslateHandler(JsonStubHandler):
+    def do_GET(self):
+        """GET /languages — мінімальний список мов, як у LibreTranslate."""
+        if self.path.rstrip('/') == '/languages':
+            self._send_json(200, [{'code': 'en', 'name': 'English'}, {'code': 'uk', 'name': 'Ukrainian'}])
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        """POST /translate — «перекладає» сегменти додаванням префікса цільової мови."""
+        if self.path.rstrip('/') != '/translate':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        payload = self._read_json({'error': 'Invalid JSON'})
+        if payload is None:
+            return
+
+        segments = payload.get('q')
+        target = payload.get('target', 'uk')
+        if isinstance(segments, str):
+            translated = f"[{target}] {segments}"
+            count = 1
+        elif isinstance(segments, list):
+            translated = [f"[{target}] {segment}" for segment in segments]
+            count = len(segments)
+        else:
+            self._send_json(400, {'error': "Invalid request: missing q parameter"})
+            return
+
+        served = self.server.count_request()
+        print(f"Запит #{served}: {count} сегментів, {payload.get('source', 'auto')} → {target}")
+        self._send_json(200, {'translatedText': translated})
+
+
+def main():
+    run_stub(StubTranslateHandler, 'Стаб API перекладу (LibreTranslate-сумісний)', 5000, '/translate')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,122 +1,113 @@
-import requests
 import re
+from keywords import keyword_scores
+from translation_backend import BatchTranslator
 # from googletrans import Translator
 
 class NewsTranslator:
-    def __init__(self):
-        # self.translator = Translator()
-        pass
+    # Довгі тексти ділимо на речення (з розділовими знаками та пробілами, щоб зібрати назад без втрат)
+    SEGMENT_MIN_CHARS = 1000
+    TRANSLATED_FIELDS = ('title', 'summary', 'text')
+    
+    def __init__(self, batch_translator=None):
+        # Пакетний перекладач: кеш за хешем тексту + один запит до бекенда на всі сегменти
+        self.batch_translator = batch_translator or BatchTranslator()
     
     def detect_language(self, text):
         """Визначає мову тексту (спрощена версія)"""
-        # Простий детектор на основі українських символів
+        # Частка українських (кириличних) літер серед усіх літер тексту
         ukrainian_chars = set('абвгґдеєжзиіїйклмнопрстуфхцчшщьюя')
-        text_chars = set(text.lower())
+        letters = [char for char in text.lower() if char.isalpha()]
+        ukrainian_letters = sum(1 for char in letters if char in ukrainian_chars)
         
-        if len(text_chars & ukrainian_chars) > len(text) * 0.1:
+        if letters and ukrainian_letters > len(letters) * 0.5:
             return 'uk'
         else:
             return 'en'  # припускаємо англійську
     
     def translate_to_ukrainian(self, text):
-        """Спрощений переклад - якщо новина вже українська, залишаємо як є"""
+        """Перекладає один текст на українську (українські тексти повертаються як є)"""
         if not text or len(text.strip()) < 3:
             return text
         
-        # Якщо текст містить українські символи, залишаємо як є
-        lang = self.detect_language(text)
-        if lang == 'uk':
+        if self.detect_language(text) == 'uk':
             return text
         
-        # Для англійських новин повертаємо як є (оригінальні новини будуть з українських джерел)
-        return text
+        return self.batch_translator.translate([text])[0]
+    
+    def split_segments(self, text):
+        """Розбиває текст на сегменти для перекладу: [речення, роздільник, речення, ...]"""
+        if len(text) <= self.SEGMENT_MIN_CHARS:
+            return [text]
+        return re.split(r'(?<=[.!?])(\s+)', text)
     
     def translate_news_article(self, article):
-        """Перекладає статтю новини на українську"""
-        translated_article = article.copy()
+        """Перекладає статтю новини на українську (усі сегменти статті — одним запитом до бекенда)"""
+        return self.translate_articles([article])[0]
+    
+    def translate_articles(self, articles):
+        """Перекладає список статей одним пакетом сегментів; бот перекладає лише обрану статтю (prepare_post)"""
+        translated_articles = [article.copy() for article in articles]
         
-        # Перекладаємо заголовок
-        if article.get('title'):
-            translated_title = self.translate_to_ukrainian(article['title'])
-            translated_article['title'] = translated_title
+        # План збирання: (стаття, поле, сегменти) — роздільники між реченнями не перекладаються
+        plan = []
+        segments = []
+        for translated_article in translated_articles:
+            for field in self.TRANSLATED_FIELDS:
+                value = translated_article.get(field)
+                if not value or len(value.strip()) < 3 or self.detect_language(value) == 'uk':
+                    continue
+                parts = self.split_segments(value) if field == 'text' else [value]
+                positions = []
+                for index, part in enumerate(parts):
+                    # Непарні позиції re.split з групою — роздільники
+                    if index % 2 == 0 and part.strip():
+                        positions.append(len(segments))
+                        segments.append(part)
+                    else:
+                        positions.append(None)
+                plan.append((translated_article, field, parts, positions))
         
-        # Перекладаємо короткий опис
-        if article.get('summary'):
-            translated_summary = self.translate_to_ukrainian(article['summary'])
-            translated_article['summary'] = translated_summary
+        if not segments:
+            return translated_articles
         
-        # Перекладаємо повний текст
-        if article.get('text'):
-            # Для довгих текстів розбиваємо на частини
-            text = article['text']
-            if len(text) > 1000:
-                # Розбиваємо на речення
-                sentences = re.split(r'[.!?]+', text)
-                translated_sentences = []
-                
-                for sentence in sentences:
-                    if sentence.strip():
-                        translated_sentence = self.translate_to_ukrainian(sentence.strip())
-                        translated_sentences.append(translated_sentence)
-                
-                translated_text = '. '.join(translated_sentences)
-            else:
-                translated_text = self.translate_to_ukrainian(text)
-            
-            translated_article['text'] = translated_text
+        translations = self.batch_translator.translate(segments)
+        for translated_article, field, parts, positions in plan:
+            translated_article[field] = ''.join(
+                part if position is None else translations[position]
+                for part, position in zip(parts, positions)
+            )
         
-        return translated_article
+        return translated_articles
     
     def filter_ukraine_related(self, articles):
         """Фільтрує новини пов'язані з Україною"""
-        ukraine_keywords = [
-            'україн', 'ukraine', 'київ', 'kyiv', 'київський', 'харків', 'kharkiv',
-            'одеса', 'odesa', 'львів', 'lviv', 'дніпро', 'dnipro', 'запоріжжя',
-            'війна', 'war', 'конфлікт', 'conflict', 'росія', 'russia', 'путін', 'putin',
-            'зеленський', 'zelensky', 'нато', 'nato', 'євросоюз', 'eu', 'european union',
-            'санкції', 'sanctions', 'мобілізація', 'mobilization', 'фронт', 'front',
-            'окупац', 'occupation', 'звільнен', 'liberation', 'донбас', 'donbas',
-            'луганськ', 'luhansk', 'донецьк', 'donetsk', 'крим', 'crimea', 'херсон',
-            'миколаїв', 'refugee', 'біженц', 'гуманітар', 'humanitarian', 'обстріл',
-            'ракет', 'missile', 'дрон', 'drone', 'авіаудар', 'airstrike'
-        ]
-        
         filtered_articles = []
         
         for article in articles:
-            # Перевіряємо заголовок та текст на наявність ключових слів
-            title = (article.get('title', '') or '').lower()
-            text = (article.get('text', '') or article.get('summary', '') or '').lower()
-            full_text = title + ' ' + text
-            
-            # Якщо знайшли ключове слово, додаємо статтю
-            if any(keyword in full_text for keyword in ukraine_keywords):
+            # Перевіряємо заголовок та текст на наявність ключових слів (один прохід автомата)
+            scores = keyword_scores(article.get('title', '') or '', self._article_body(article))
+            if scores['ukraine']['ukraine']:
                 filtered_articles.append(article)
         
         return filtered_articles
     
     def prioritize_war_news(self, articles):
         """Віддає пріоритет новинам про війну"""
-        war_keywords = [
-            'війна', 'war', 'бойові дії', 'combat', 'фронт', 'front', 'наступ', 'offensive',
-            'оборона', 'defense', 'обстріл', 'shelling', 'ракет', 'missile', 'авіаудар',
-            'втрати', 'casualties', 'загиблі', 'killed', 'поранені', 'wounded',
-            'військов', 'military', 'армія', 'army', 'техніка', 'equipment',
-            'танк', 'tank', 'артилерія', 'artillery', 'дрон', 'drone'
-        ]
-        
         war_articles = []
         other_articles = []
         
         for article in articles:
-            title = (article.get('title', '') or '').lower()
-            text = (article.get('text', '') or article.get('summary', '') or '').lower()
-            full_text = title + ' ' + text
-            
-            if any(keyword in full_text for keyword in war_keywords):
-                war_articles.append(article)
+            scores = keyword_scores(article.get('title', '') or '', self._article_body(article))
+            war_score = scores['war_priority']['war']
+            if war_score:
+                war_articles.append((war_score, article))
             else:
                 other_articles.append(article)
         
-        # Повертаємо спочатку військові новини, потім інші
-        return war_articles + other_articles
+        # Повертаємо спочатку військові новини (більше збігів — вище), потім інші
+        war_articles.sort(key=lambda item: item[0], reverse=True)
+        return [article for _, article in war_articles] + other_articles
+    
+    def _article_body(self, article):
+        """Текст статті для пошуку ключових слів (повний текст або короткий опис)."""
+        return article.get('text', '') or article.get('summary', '') or ''